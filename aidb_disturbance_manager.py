@@ -15,6 +15,15 @@ Species Management:
     - Get available species from AIDB
     - Create species-to-yield-curve mappings
 
+Backends:
+    The database is reached through an AIDBBackend chosen from the file
+    extension: .mdb/.accdb use MS Access over pyodbc, .sqlite/.sqlite3/.db
+    use SQLite (same table names and columns). import_aidb_to_sqlite()
+    converts an Access AIDB, or a directory of per-table CSV fixtures, to
+    SQLite so everything here can run without Access:
+
+        python aidb_disturbance_manager.py --import-from aidb.accdb --sqlite aidb.sqlite
+
 Usage:
     from aidb_disturbance_manager import ensure_disturbances_exist, get_aidb_species
 
@@ -24,14 +33,33 @@ Usage:
 
     # Species management
     species_df = get_aidb_species(aidb_path)
+
+    # Many calls against one connection
+    with AIDBSession(aidb_path) as session:
+        species_df = get_aidb_species(session)
+        eco_df = get_eco_boundaries(session)
 """
 
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import pickle
 import re
 import os
+import sqlite3
 import warnings
-import pyodbc
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+
+try:
+    import pyodbc
+except ImportError:  # Access backend unavailable (e.g. Linux batch nodes)
+    pyodbc = None
 
 
 # Suppress the pandas warning about pyodbc connections
@@ -62,6 +90,36 @@ STANDARD_TYPES = ['97% clear-cut', 'Planting']
 # Disturbance matrix structure ID for biomass transfers
 DM_STRUCTURE_ID = 2
 
+# Tables used by this module (copied by import_aidb_to_sqlite)
+AIDB_TABLES = [
+    'tblDMValuesLookup',
+    'tblDM',
+    'tblDisturbanceTypeDefault',
+    'tblDMAssociationDefault',
+    'tblEcoBoundaryDefault',
+    'tblSpeciesTypeDefault',
+    'tblGenusTypeDefault',
+    'tblForestTypeDefault',
+    'tblSPUDefault',
+    'tblBioTotalStemwoodSpeciesTypeDefault',
+]
+
+# Indexes created on SQLite copies for the lookups done here
+SQLITE_INDEXES = {
+    'tblDMValuesLookup': ['DMID'],
+    'tblDMAssociationDefault': ['DefaultDisturbanceTypeID'],
+    'tblDisturbanceTypeDefault': ['DistTypeID'],
+}
+
+ACCESS_SUFFIXES = {'.mdb', '.accdb'}
+SQLITE_SUFFIXES = {'.sqlite', '.sqlite3', '.db'}
+
+# Optional directory for the on-disk template cache (None = in-process only)
+TEMPLATE_CACHE_DIR = os.environ.get('AIDB_TEMPLATE_CACHE_DIR')
+
+# Tolerance for the row-sum == 1 check on scaled matrices
+ROW_SUM_TOLERANCE = 0.001
+
 
 # =============================================================================
 # DATABASE CONNECTION (matches original notebook pattern)
@@ -73,6 +131,8 @@ def connect_aidb(db_path: str) -> pyodbc.Connection:
     """
     if not os.path.exists(db_path):
         raise FileNotFoundError(f"Database not found at {db_path}")
+    if pyodbc is None:
+        raise ImportError("pyodbc is required for MS Access AIDBs; use a SQLite copy instead")
 
     connection_string = (
         f"Driver={{Microsoft Access Driver (*.mdb, *.accdb)}};DBQ={db_path};"
@@ -80,15 +140,256 @@ def connect_aidb(db_path: str) -> pyodbc.Connection:
     return pyodbc.connect(connection_string)
 
 
-def get_sqlalchemy_engine(db_path: str):
+def get_sqlalchemy_engine(db_path: str, fast_executemany: bool = False):
     """
     Create SQLAlchemy engine for bulk inserts (matches original notebook pattern).
+
+    With fast_executemany=True, multi-row inserts bind all parameter sets in
+    one round trip (pyodbc's fast_executemany).
     """
     connection_string = (
         f"access+pyodbc:///?odbc_connect="
         f"Driver={{Microsoft Access Driver (*.mdb, *.accdb)}};DBQ={db_path};"
     )
-    return create_engine(connection_string)
+    engine = create_engine(connection_string)
+
+    if fast_executemany:
+        @event.listens_for(engine, "before_cursor_execute")
+        def _fast_executemany(conn, cursor, statement, params, context, executemany):
+            if executemany:
+                cursor.fast_executemany = True
+
+    return engine
+
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+
+class AIDBBackend:
+    """
+    Access to one AIDB file: a DB-API connection for reads and a SQLAlchemy
+    engine for bulk appends. Subclasses bind a database engine; table names
+    and columns are the same for all of them.
+    """
+
+    name = None
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+
+    def connect(self):
+        """Open a DB-API connection."""
+        raise NotImplementedError
+
+    def engine(self, fast_executemany: bool = False):
+        """Create a SQLAlchemy engine for bulk inserts."""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.db_path!r})"
+
+
+class AccessBackend(AIDBBackend):
+    """MS Access AIDB over pyodbc (Windows, Access ODBC driver)."""
+
+    name = 'access'
+
+    def connect(self):
+        return connect_aidb(self.db_path)
+
+    def engine(self, fast_executemany: bool = False):
+        return get_sqlalchemy_engine(self.db_path, fast_executemany=fast_executemany)
+
+
+class SQLiteBackend(AIDBBackend):
+    """SQLite copy of an AIDB (see import_aidb_to_sqlite)."""
+
+    name = 'sqlite'
+
+    def connect(self):
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Database not found at {self.db_path}")
+        return sqlite3.connect(self.db_path)
+
+    def engine(self, fast_executemany: bool = False):
+        # sqlite3 executemany is already a single prepared statement
+        return create_engine(f"sqlite:///{Path(self.db_path).resolve()}")
+
+
+def get_backend(db_path) -> AIDBBackend:
+    """
+    Return the backend for an AIDB path (chosen by file extension), the
+    backend itself if one is passed, or the backend of an AIDBSession.
+    """
+    if isinstance(db_path, AIDBSession):
+        return db_path.backend
+    if isinstance(db_path, AIDBBackend):
+        return db_path
+    suffix = Path(str(db_path)).suffix.lower()
+    if suffix in ACCESS_SUFFIXES:
+        return AccessBackend(db_path)
+    if suffix in SQLITE_SUFFIXES:
+        return SQLiteBackend(db_path)
+    raise ValueError(
+        f"Unknown AIDB file type '{suffix}' for {db_path}; "
+        f"expected one of {sorted(ACCESS_SUFFIXES | SQLITE_SUFFIXES)}"
+    )
+
+
+# =============================================================================
+# SESSIONS
+# =============================================================================
+
+class AIDBSession:
+    """
+    One AIDB connection and one bulk-insert engine shared by many calls.
+
+    Every helper that takes db_path also accepts a session, so loops over
+    the query helpers reuse a single connection instead of opening one per
+    call. Read-only reference queries (species, eco-boundaries, ...) are
+    cached for the life of the session; the cache is dropped whenever the
+    session writes to the AIDB.
+
+    Usage:
+        with AIDBSession(aidb_path) as session:
+            species = get_aidb_species(session)
+            for eco_id in get_eco_boundaries(session).EcoBoundaryID:
+                get_species_by_eco_boundary(session, eco_id)
+            ensure_disturbances_exist(session, specs)
+    """
+
+    def __init__(self, db_path):
+        self.backend = get_backend(db_path)
+        self._conn = None
+        self._engine = None
+        self._reference = {}
+
+    @property
+    def db_path(self) -> str:
+        return self.backend.db_path
+
+    @property
+    def conn(self):
+        """DB-API connection, opened on first use."""
+        if self._conn is None:
+            self._conn = self.backend.connect()
+        return self._conn
+
+    def engine(self):
+        """SQLAlchemy engine (fast_executemany), created on first use."""
+        if self._engine is None:
+            self._engine = self.backend.engine(fast_executemany=True)
+        return self._engine
+
+    def read_reference(self, query: str) -> pd.DataFrame:
+        """Run a read-only query once per session and return a copy of the result."""
+        if query not in self._reference:
+            self._reference[query] = pd.read_sql(query, con=self.conn)
+        return self._reference[query].copy()
+
+    def invalidate(self):
+        """Drop cached reference tables (called after writes)."""
+        self._reference.clear()
+
+    def close(self):
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._reference.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __repr__(self):
+        return f"AIDBSession({self.db_path!r})"
+
+
+@contextlib.contextmanager
+def _open_session(db_path):
+    """Yield db_path if it is already a session, else a session closed on exit."""
+    if isinstance(db_path, AIDBSession):
+        yield db_path
+        return
+    session = AIDBSession(db_path)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@contextlib.contextmanager
+def _open_conn(conn):
+    """
+    Yield a DB-API connection: conn itself, the connection of an
+    AIDBSession, or that of a session opened on a db_path/AIDBBackend
+    (closed on exit).
+    """
+    if isinstance(conn, (AIDBSession, AIDBBackend, str, Path)):
+        with _open_session(conn) as session:
+            yield session.conn
+        return
+    yield conn
+
+
+def _read_source_table(source, table: str, conn) -> pd.DataFrame | None:
+    """Read one table from an AIDB connection or a CSV fixture directory."""
+    if conn is None:
+        csv_path = Path(source) / f"{table}.csv"
+        return pd.read_csv(csv_path) if csv_path.exists() else None
+    try:
+        return pd.read_sql(f"SELECT * FROM {table}", con=conn)
+    except Exception as exc:  # table missing in this AIDB
+        print(f"WARNING: could not read {table}: {exc}")
+        return None
+
+
+def import_aidb_to_sqlite(source, sqlite_path, tables: list = None) -> dict:
+    """
+    Copy AIDB tables into a SQLite database.
+
+    Parameters:
+        source: AIDB path (.mdb/.accdb/.sqlite), or a directory holding one
+                <table>.csv fixture per table
+        sqlite_path: Destination .sqlite file (tables are replaced)
+        tables: Table names to copy (default: AIDB_TABLES)
+
+    Returns:
+        dict mapping table name -> rows copied (tables not found are skipped)
+    """
+    tables = tables or AIDB_TABLES
+    from_dir = Path(str(source)).is_dir()
+    conn = None if from_dir else get_backend(source).connect()
+    engine = SQLiteBackend(sqlite_path).engine()
+    copied = {}
+
+    try:
+        with engine.begin() as c:
+            for table in tables:
+                df = _read_source_table(source, table, conn)
+                if df is None:
+                    print(f"  {table}: not found, skipped")
+                    continue
+                df.to_sql(table, con=c, if_exists="replace", index=False)
+                for col in SQLITE_INDEXES.get(table, []):
+                    if col in df.columns:
+                        c.exec_driver_sql(
+                            f'CREATE INDEX IF NOT EXISTS "ix_{table}_{col}" ON "{table}" ("{col}")'
+                        )
+                copied[table] = len(df)
+                print(f"  {table}: {len(df)} rows")
+    finally:
+        engine.dispose()
+        if conn is not None:
+            conn.close()
+
+    return copied
 
 
 # =============================================================================
@@ -165,41 +466,364 @@ def parse_disturbance_type(dist_type: str) -> dict | None:
 def get_existing_disturbances(conn: pyodbc.Connection) -> dict:
     """
     Get all existing disturbance types from AIDB.
+    conn may be an open connection, an AIDBSession or a db_path.
     Returns dict mapping lowercase name -> info dict
     """
-    # Query disturbance types (simple query like original notebook)
-    df_dist = pd.read_sql("SELECT * FROM tblDisturbanceTypeDefault", con=conn)
+    # Only the columns the lookup needs
+    with _open_conn(conn) as conn:
+        df_dist = pd.read_sql(
+            "SELECT DistTypeID, DistTypeName FROM tblDisturbanceTypeDefault", con=conn
+        )
+        df_assoc = pd.read_sql(
+            "SELECT DefaultDisturbanceTypeID, DMID FROM tblDMAssociationDefault", con=conn
+        )
 
-    # Query DM associations to get DMID mapping
-    df_assoc = pd.read_sql("SELECT * FROM tblDMAssociationDefault", con=conn)
+    # First association per disturbance type, as one hash lookup
+    first_assoc = df_assoc.drop_duplicates('DefaultDisturbanceTypeID')
+    dmid_by_type = dict(zip(first_assoc['DefaultDisturbanceTypeID'], first_assoc['DMID']))
 
-    # Build result dict
-    result = {}
-    for _, row in df_dist.iterrows():
-        name = row['DistTypeName']
-        dist_type_id = row['DistTypeID']
-
-        if name:
-            key = name.lower().strip()
-
-            # Find DMID from associations
-            assoc_match = df_assoc[df_assoc['DefaultDisturbanceTypeID'] == dist_type_id]
-            dmid = assoc_match['DMID'].iloc[0] if len(assoc_match) > 0 else None
-
-            if key not in result:
-                result[key] = {
-                    'dist_type_id': dist_type_id,
-                    'dmid': dmid,
-                    'name': name
-                }
+    # First type wins for duplicate (case/whitespace-insensitive) names
+    df_dist = df_dist[df_dist['DistTypeName'].notna() & (df_dist['DistTypeName'] != '')]
+    df_dist = df_dist.assign(key=df_dist['DistTypeName'].str.lower().str.strip())
+    df_dist = df_dist.drop_duplicates('key')
 
-    return result
+    return {
+        key: {
+            'dist_type_id': dist_type_id,
+            'dmid': dmid_by_type.get(dist_type_id),
+            'name': name
+        }
+        for key, dist_type_id, name in zip(
+            df_dist['key'], df_dist['DistTypeID'], df_dist['DistTypeName']
+        )
+    }
 
 
 # =============================================================================
 # DISTURBANCE CREATION (matches original notebook logic exactly)
 # =============================================================================
 
+def load_template_matrix(conn: pyodbc.Connection, dmid: int) -> tuple:
+    """
+    Load a template disturbance matrix in one query.
+
+    Parameters:
+        conn: open AIDB connection, AIDBSession or db_path
+        dmid: DMID of the template matrix
+
+    Returns:
+        (scaled_rows, stable_rows): DMRow/DMColumn/Proportion frames for the
+        values with Proportion <> 1 and Proportion = 1 respectively.
+    """
+    with _open_conn(conn) as conn:
+        df = pd.read_sql(
+            "SELECT DMRow, DMColumn, Proportion FROM tblDMValuesLookup WHERE DMID = {}".format(dmid),
+            con=conn
+        )
+    df = df[df.Proportion.notna()]
+    return df[df.Proportion != 1].copy(), df[df.Proportion == 1].copy()
+
+
+# =============================================================================
+# TEMPLATE CACHE
+# =============================================================================
+
+# (resolved AIDB path, mtime_ns) -> {'templates': {category: (scaled, stable)}, 'eco': DataFrame}
+_TEMPLATE_CACHE = {}
+
+
+def _template_cache_key(db_path) -> tuple:
+    """Cache key for an AIDB: resolved path and file modification time."""
+    path = Path(get_backend(db_path).db_path).resolve()
+    return str(path), path.stat().st_mtime_ns
+
+
+def load_aidb_templates(conn: pyodbc.Connection, db_path, cache_dir=TEMPLATE_CACHE_DIR) -> dict:
+    """
+    Load the scaling template matrices and the eco-boundary list, cached.
+
+    Entries are kept for the life of the process and, when cache_dir is
+    set, pickled there so later runs against the same unchanged AIDB skip
+    the queries. Any write to the AIDB changes its mtime and so its key.
+
+    Parameters:
+        conn: open AIDB connection or AIDBSession (used on a cache miss)
+        db_path: Path to the AIDB, an AIDBBackend or an AIDBSession
+        cache_dir: Optional directory for the on-disk cache
+
+    Returns:
+        dict with 'templates' ({category: (scaled_rows, stable_rows)}) and
+        'eco' (EcoBoundaryID/EcoBoundaryName frame)
+    """
+    key = _template_cache_key(db_path)
+    if key in _TEMPLATE_CACHE:
+        return _TEMPLATE_CACHE[key]
+
+    cache_file = None
+    if cache_dir is not None:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        cache_file = Path(cache_dir) / f"aidb_templates_{digest}.pkl"
+        if cache_file.exists():
+            with open(cache_file, 'rb') as f:
+                cached = pickle.load(f)
+            _TEMPLATE_CACHE[key] = cached
+            return cached
+
+    with _open_conn(conn) as conn:
+        cached = {
+            'templates': {
+                category: load_template_matrix(conn, template['dmid'])
+                for category, template in TEMPLATES.items()
+            },
+            'eco': pd.read_sql(
+                "SELECT EcoBoundaryID, EcoBoundaryName FROM tblEcoBoundaryDefault", con=conn
+            ),
+        }
+    _TEMPLATE_CACHE[key] = cached
+
+    if cache_file is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, 'wb') as f:
+            pickle.dump(cached, f)
+
+    return cached
+
+
+def clear_template_cache():
+    """Drop all in-process template cache entries."""
+    _TEMPLATE_CACHE.clear()
+
+
+# =============================================================================
+# DISTURBANCE MATRIX SCALING
+# =============================================================================
+
+def scale_template_matrices(
+    scaled_rows: pd.DataFrame,
+    stable_rows: pd.DataFrame,
+    start_val: float,
+    end_vals
+) -> tuple:
+    """
+    Scale one template matrix to many removal percentages at once.
+    (Logic matches original DisturbanceUpdateAIDB notebook)
+
+    Sink pool transfers (off-diagonal, Proportion <> 1) are multiplied by
+    end_val / start_val, each source pool keeps 1 minus its row's scaled
+    transfers, and stable pools (Proportion = 1) are copied unchanged.
+
+    Parameters:
+        scaled_rows, stable_rows: template frames from load_template_matrix
+        start_val: removal fraction of the template
+        end_vals: sequence of target removal fractions (k values)
+
+    Returns:
+        (dm_row, dm_column, proportions, row_sums): entry coordinates shared
+        by all matrices (length m, ordered stable, sink, source pools), the
+        (k, m) proportion stack, and the (k, n_rows) row sums
+    """
+    end_vals = np.asarray(end_vals, dtype=float).reshape(-1)
+
+    # Get sink pool transfers (non-diagonal elements)
+    sink = scaled_rows.loc[scaled_rows.DMRow != scaled_rows.DMColumn]
+    sink_row = sink.DMRow.to_numpy()
+    sink_col = sink.DMColumn.to_numpy()
+
+    # Scale proportions (matches original: (endVal/startVal) * Proportion)
+    sink_prop = np.outer(end_vals / start_val, sink.Proportion.to_numpy(dtype=float))
+
+    # Calculate source pool retention (diagonal elements), rows in sorted order
+    source_row, sink_inv = np.unique(sink_row, return_inverse=True)
+    source_prop = np.zeros((len(end_vals), len(source_row)))
+    np.add.at(source_prop.T, sink_inv, sink_prop.T)
+    source_prop = 1 - source_prop
+
+    # Stable pools (Proportion = 1) come from the template itself
+    # Note: Original uses DMID=136, but that seems like a bug - should be copyID
+    stable_row = stable_rows.DMRow.to_numpy()
+    stable_col = stable_rows.DMColumn.to_numpy()
+    stable_prop = np.broadcast_to(
+        stable_rows.Proportion.to_numpy(dtype=float), (len(end_vals), len(stable_rows))
+    )
+
+    dm_row = np.concatenate([stable_row, sink_row, source_row])
+    dm_column = np.concatenate([stable_col, sink_col, source_row])
+    proportions = np.hstack([stable_prop, sink_prop, source_prop])
+
+    # Row sums for every matrix at once
+    _, row_inv = np.unique(dm_row, return_inverse=True)
+    row_sums = np.zeros((row_inv.max() + 1 if len(row_inv) else 0, len(end_vals)))
+    np.add.at(row_sums, row_inv, proportions.T)
+
+    return dm_row, dm_column, proportions, row_sums.T
+
+
+def build_scaled_matrix(
+    scaled_rows: pd.DataFrame,
+    stable_rows: pd.DataFrame,
+    start_val: float,
+    end_val: float,
+    new_dmid: int,
+    name: str
+) -> pd.DataFrame:
+    """
+    Scale a template matrix from start_val to end_val removal.
+    (Single-matrix form of scale_template_matrices)
+    """
+    return build_scaled_matrices(
+        scaled_rows, stable_rows, start_val, [end_val], [new_dmid], [name]
+    )
+
+
+def build_scaled_matrices(
+    scaled_rows: pd.DataFrame,
+    stable_rows: pd.DataFrame,
+    start_val: float,
+    end_vals,
+    new_dmids,
+    names
+) -> pd.DataFrame:
+    """
+    Build tblDMValuesLookup rows for several scalings of one template.
+
+    Returns:
+        DataFrame with DMRow, DMColumn, Proportion, DMID; matrices are
+        stacked in the order of end_vals
+    """
+    dm_row, dm_column, proportions, row_sums = scale_template_matrices(
+        scaled_rows, stable_rows, start_val, end_vals
+    )
+
+    # Validate: each row should sum to 1
+    bad = (np.abs(row_sums - 1) > ROW_SUM_TOLERANCE).any(axis=1)
+    for name in np.asarray(names, dtype=object)[bad]:
+        print(f"WARNING: Matrix row sums don't equal 1 for {name}")
+
+    k, m = proportions.shape
+    return pd.DataFrame({
+        'DMRow': np.tile(dm_row, k),
+        'DMColumn': np.tile(dm_column, k),
+        'Proportion': proportions.ravel(),
+        'DMID': np.repeat(np.asarray(new_dmids), m),
+    })
+
+
+def create_scaled_disturbances(
+    conn: pyodbc.Connection,
+    db_path: str,
+    items: list
+) -> list:
+    """
+    Create many scaled disturbance types in one transaction.
+
+    Template matrices and the eco-boundary list come from the template
+    cache (see load_aidb_templates); the matrices for each template are
+    scaled together as one stacked array. All tblDMValuesLookup, tblDM,
+    tblDisturbanceTypeDefault and tblDMAssociationDefault rows are built in
+    memory and appended through a single engine and transaction using
+    fast_executemany.
+
+    Parameters:
+        conn: open AIDB connection or AIDBSession (used for reads)
+        db_path: Path to the AIDB, AIDBBackend or AIDBSession (used for the write engine)
+        items: list of dicts with 'name', 'target_pct', 'category',
+               'new_dmid' and 'new_dist_type_id'
+
+    Returns:
+        list of {'dmid', 'dist_type_id'} dicts, in the order of items
+    """
+    if not items:
+        return []
+
+    # Templates and eco-boundaries come from the (path, mtime) cache
+    cached = load_aidb_templates(conn, db_path)
+    df_eco_base = cached['eco']
+
+    # Scale every matrix of a category as one stacked array
+    values_frames = []
+    for category in TEMPLATES:
+        positions = [i for i, item in enumerate(items) if item['category'] == category]
+        if not positions:
+            continue
+        scaled_rows, stable_rows = cached['templates'][category]
+        frame = build_scaled_matrices(
+            scaled_rows, stable_rows, TEMPLATES[category]['base_pct'],
+            [items[i]['target_pct'] for i in positions],
+            [items[i]['new_dmid'] for i in positions],
+            [items[i]['name'] for i in positions],
+        )
+        frame['_item'] = np.repeat(positions, len(frame) // len(positions))
+        values_frames.append(frame)
+
+    dm_records = []
+    dist_type_records = []
+    assoc_frames = []
+
+    for item in items:
+        name = item['name']
+        template = TEMPLATES[item['category']]
+        new_dmid = item['new_dmid']
+        new_dist_type_id = item['new_dist_type_id']
+
+        Description = name
+        StandReplacing = False
+
+        # tblDM row
+        dm_records.append({
+            "DMID": new_dmid,
+            "Name": name,
+            "Description": Description,
+            "DMStructureID": template['dm_structure_id']
+        })
+
+        # tblDisturbanceTypeDefault row
+        dist_type_records.append({
+            "DistTypeID": new_dist_type_id,
+            "DistTypeName": name,
+            "OnOffSwitch": True,
+            "Description": Description,
+            "IsStandReplacing": StandReplacing,
+            "IsMultiYear": False,
+            "MultiYearCount": 0
+        })
+
+        # tblDMAssociationDefault rows (one per eco-boundary)
+        df_eco = df_eco_base.copy()
+        df_eco.loc[:, "DefaultDisturbanceTypeID"] = new_dist_type_id
+        df_eco.loc[:, "AnnualOrder"] = 1
+        df_eco.loc[:, "DMID"] = new_dmid
+        df_eco.loc[:, "DefaultEcoBoundaryID"] = df_eco.EcoBoundaryID
+        df_eco.loc[:, "Name"] = name + "-" + df_eco.EcoBoundaryName
+        df_eco.loc[:, "Description"] = Description
+        del df_eco['EcoBoundaryID'], df_eco['EcoBoundaryName']
+        assoc_frames.append(df_eco)
+
+    # Matrices in item order
+    dfDMValuesUpdate = pd.concat(values_frames, ignore_index=True)
+    dfDMValuesUpdate = (
+        dfDMValuesUpdate.sort_values('_item', kind='stable')
+        .drop(columns='_item')
+        .reset_index(drop=True)
+    )
+    dfDMUpdate = pd.DataFrame.from_records(dm_records)
+    dfDistTypUpdate = pd.DataFrame.from_records(dist_type_records)
+    dfAssocUpdate = pd.concat(assoc_frames, ignore_index=True)
+
+    # One engine, one transaction, one executemany per table
+    with _open_session(db_path) as session:
+        with session.engine().begin() as c:
+            dfDMValuesUpdate.to_sql("tblDMValuesLookup", con=c, if_exists="append", index=False)
+            dfDMUpdate.to_sql("tblDM", con=c, if_exists="append", index=False)
+            dfDistTypUpdate.to_sql("tblDisturbanceTypeDefault", con=c, if_exists="append", index=False)
+            dfAssocUpdate.to_sql("tblDMAssociationDefault", con=c, if_exists="append", index=False)
+        session.invalidate()
+
+    return [
+        {'dmid': item['new_dmid'], 'dist_type_id': item['new_dist_type_id']}
+        for item in items
+    ]
+
+
 def create_scaled_disturbance(
     conn: pyodbc.Connection,
     db_path: str,
@@ -211,100 +835,251 @@ def create_scaled_disturbance(
 ) -> dict:
     """
     Create a new disturbance type by scaling a template matrix.
-    (Logic matches original DisturbanceUpdateAIDB notebook)
+    (Single-item form of create_scaled_disturbances; conn may be an
+    AIDBSession, and db_path the same session)
     """
-    template = TEMPLATES[category]
-    copyID = template['dmid']
-    startVal = template['base_pct']
-    endVal = target_pct
-    DMStructureID = template['dm_structure_id']
+    return create_scaled_disturbances(conn, db_path, [{
+        'name': name,
+        'target_pct': target_pct,
+        'category': category,
+        'new_dmid': new_dmid,
+        'new_dist_type_id': new_dist_type_id,
+    }])[0]
 
-    Description = name
-    StandReplacing = False
 
-    # Get template matrix values with Proportion <> 1 (matches original notebook)
-    df = pd.read_sql(
-        "SELECT * FROM tblDMValuesLookup WHERE DMID = {} AND Proportion <> 1".format(copyID),
-        con=conn
-    )
+# =============================================================================
+# CHANGE PLANNING
+# =============================================================================
 
-    # Get sink pool transfers (non-diagonal elements)
-    dfSinkPool = df.loc[df.DMRow != df.DMColumn, ['DMRow', 'DMColumn', 'Proportion']].copy()
+# Columns of a disturbance change plan (one row per distinct spec name)
+PLAN_COLUMNS = [
+    'name', 'action', 'category', 'percent', 'template_dmid', 'dmid', 'dist_type_id',
+    'n_values_rows', 'n_assoc_rows', 'n_insert_rows',
+    'base_dmid', 'base_dist_type_id', 'warning',
+]
 
-    # Scale proportions (matches original: (endVal/startVal) * Proportion)
-    dfSinkPool.loc[:, 'Proportion'] = (endVal / startVal) * dfSinkPool.Proportion
 
-    # Calculate source pool retention (diagonal elements)
-    dfSourcePool = dfSinkPool.groupby(['DMRow'])['Proportion'].sum().reset_index()
-    dfSourcePool.loc[:, 'DMColumn'] = dfSourcePool.DMRow
-    dfSourcePool.loc[:, 'Proportion'] = 1 - dfSourcePool.Proportion
-    dfSourcePool = dfSourcePool[['DMRow', 'DMColumn', 'Proportion']]
+def _as_int(value):
+    """int(value), or None for missing values (plans round-trip through CSV)."""
+    return None if pd.isna(value) else int(value)
 
-    # Get stable pools (Proportion = 1) from template
-    # Note: Original uses DMID=136, but that seems like a bug - should be copyID
-    # Using copyID to be consistent
-    dfStablePool = pd.read_sql(
-        "SELECT DMRow, DMColumn, Proportion FROM tblDMValuesLookup WHERE DMID = {} AND Proportion = 1".format(copyID),
-        con=conn
-    )
 
-    # Combine all matrix values
-    dfDMValuesUpdate = pd.concat([dfStablePool, dfSinkPool, dfSourcePool])
+def _as_str(value):
+    return None if pd.isna(value) else value
 
-    # Validate: each row should sum to 1
-    chk = dfDMValuesUpdate.groupby("DMRow")["Proportion"].sum().values
-    if any(abs(value - 1) > 0.001 for value in chk):
-        print(f"WARNING: Matrix row sums don't equal 1 for {name}")
 
-    dfDMValuesUpdate.loc[:, 'DMID'] = new_dmid
+def _scaled_matrix_size(scaled_rows: pd.DataFrame, stable_rows: pd.DataFrame) -> int:
+    """Number of tblDMValuesLookup rows in a matrix scaled from this template."""
+    sink = scaled_rows[scaled_rows.DMRow != scaled_rows.DMColumn]
+    return len(stable_rows) + len(sink) + sink.DMRow.nunique()
 
-    # Prepare tblDM update
-    dfDMUpdate = pd.DataFrame.from_records({
-        "DMID": [new_dmid],
-        "Name": [name],
-        "Description": [Description],
-        "DMStructureID": [DMStructureID]
-    })
 
-    # Prepare tblDisturbanceTypeDefault update
-    dfDistTypUpdate = pd.DataFrame.from_records({
-        "DistTypeID": [new_dist_type_id],
-        "DistTypeName": [name],
-        "OnOffSwitch": [True],
-        "Description": [Description],
-        "IsStandReplacing": [StandReplacing],
-        "IsMultiYear": [False],
-        "MultiYearCount": [0]
-    })
+def plan_disturbance_changes(db_path, disturbance_specs: list) -> pd.DataFrame:
+    """
+    Compute the full AIDB change set for a list of disturbance specs.
 
-    # Prepare tblDMAssociationDefault update
-    df_eco = pd.read_sql("SELECT EcoBoundaryID, EcoBoundaryName FROM tblEcoBoundaryDefault", con=conn)
-    df_eco.loc[:, "DefaultDisturbanceTypeID"] = new_dist_type_id
-    df_eco.loc[:, "AnnualOrder"] = 1
-    df_eco.loc[:, "DMID"] = new_dmid
-    df_eco.loc[:, "DefaultEcoBoundaryID"] = df_eco.EcoBoundaryID
-    df_eco.loc[:, "Name"] = name + "-" + df_eco.EcoBoundaryName
-    df_eco.loc[:, "Description"] = Description
+    Every spec is classified in one pass against the existing disturbance
+    types: 'exists', 'create', 'missing' (not in the AIDB and no scaling
+    parameters) or 'invalid' (unknown category). Types to create get their
+    new DMID/DistTypeID and the number of rows each insert will add. Specs
+    repeating a name (case-insensitive) are planned once.
 
-    del df_eco['EcoBoundaryID'], df_eco['EcoBoundaryName']
+    Parameters:
+        db_path: Path to the AIDB (.mdb/.accdb or SQLite copy), an AIDBBackend or an AIDBSession
+        disturbance_specs: List of spec dicts (see ensure_disturbances_exist)
+
+    Returns:
+        DataFrame with PLAN_COLUMNS, in spec order
+    """
+    specs = pd.DataFrame.from_records(
+        list(disturbance_specs), columns=['name', 'percent', 'category']
+    )
+    specs['name'] = specs['name'].fillna('').astype(str).str.strip()
+    specs = specs[specs['name'] != '']
+    specs = specs.assign(key=specs['name'].str.lower()).drop_duplicates('key')
 
-    # Write to database using SQLAlchemy engine (matches original notebook)
-    engine = get_sqlalchemy_engine(db_path)
+    with _open_session(db_path) as session:
+        conn = session.conn
 
-    with engine.begin() as c:
-        dfDMValuesUpdate.to_sql("tblDMValuesLookup", con=c, if_exists="append", index=False)
-        dfDMUpdate.to_sql("tblDM", con=c, if_exists="append", index=False)
-        dfDistTypUpdate.to_sql("tblDisturbanceTypeDefault", con=c, if_exists="append", index=False)
-        df_eco.to_sql("tblDMAssociationDefault", con=c, if_exists="append", index=False)
+        existing = get_existing_disturbances(conn)
 
-    del engine
+        # Get current max IDs (matches original notebook pattern)
+        cursor = conn.cursor()
+        base_dmid = fetch_max(cursor, "SELECT MAX(DMID) FROM tblDMValuesLookup")
+        base_dist_type_id = fetch_max(cursor, "SELECT MAX(DistTypeID) FROM tblDisturbanceTypeDefault")
+        cursor.close()
 
+        existing_df = pd.DataFrame(
+            [(key, info['dmid'], info['dist_type_id']) for key, info in existing.items()],
+            columns=['key', 'existing_dmid', 'existing_dist_type_id'],
+        )
+        plan = specs.merge(existing_df, on='key', how='left')
+
+        found = plan['key'].isin(existing_df['key'])
+        no_params = plan['percent'].isna() | plan['category'].isna()
+        bad_category = ~plan['category'].isin(list(TEMPLATES))
+        plan['action'] = np.select(
+            [found, no_params, bad_category], ['exists', 'missing', 'invalid'], 'create'
+        )
+        create = (plan['action'] == 'create').to_numpy()
+
+        # New IDs follow the current maxima in spec order
+        ordinal = np.cumsum(create)
+        plan['dmid'] = np.where(create, base_dmid + ordinal, plan['existing_dmid'])
+        plan['dist_type_id'] = np.where(create, base_dist_type_id + ordinal, plan['existing_dist_type_id'])
+        plan['template_dmid'] = plan['category'].map(
+            {category: t['dmid'] for category, t in TEMPLATES.items()}
+        ).where(create)
+
+        # Row counts for each insert
+        n_values = pd.Series(0, index=plan.index)
+        n_assoc = 0
+        if create.any():
+            cached = load_aidb_templates(conn, session)
+            sizes = {
+                category: _scaled_matrix_size(*cached['templates'][category])
+                for category in TEMPLATES
+            }
+            n_values = plan['category'].map(sizes).where(create, 0)
+            n_assoc = len(cached['eco'])
+        plan['n_values_rows'] = n_values.astype(int)
+        plan['n_assoc_rows'] = np.where(create, n_assoc, 0)
+        # + one tblDM and one tblDisturbanceTypeDefault row
+        plan['n_insert_rows'] = np.where(create, plan['n_values_rows'] + plan['n_assoc_rows'] + 2, 0)
+
+    for column in ('dmid', 'dist_type_id', 'template_dmid'):
+        plan[column] = pd.to_numeric(plan[column]).astype('Int64')
+    plan['base_dmid'] = base_dmid
+    plan['base_dist_type_id'] = base_dist_type_id
+    plan['warning'] = np.select(
+        [plan['action'] == 'missing', plan['action'] == 'invalid'],
+        [
+            "'" + plan['name'] + "' not found in AIDB (no percent/category provided for creation)",
+            "Unknown category '" + plan['category'].astype(str) + "' for '" + plan['name']
+            + "'. Must be 'precommercial' or 'commercial'.",
+        ],
+        None,
+    )
+    return plan[PLAN_COLUMNS].reset_index(drop=True)
+
+
+def summarize_plan(plan: pd.DataFrame) -> dict:
+    """Totals of a change plan (counts per action and rows to insert)."""
+    create = plan[plan['action'] == 'create']
     return {
-        'dmid': new_dmid,
-        'dist_type_id': new_dist_type_id
+        'n_specs': len(plan),
+        **{f"n_{action}": int((plan['action'] == action).sum())
+           for action in ('exists', 'create', 'missing', 'invalid')},
+        'n_values_rows': int(create['n_values_rows'].sum()),
+        'n_assoc_rows': int(create['n_assoc_rows'].sum()),
+        'n_insert_rows': int(create['n_insert_rows'].sum()),
     }
 
 
+def write_plan(plan: pd.DataFrame, path) -> Path:
+    """Write a change plan as CSV for review."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    plan.to_csv(path, index=False)
+    return path
+
+
+def read_plan(path) -> pd.DataFrame:
+    """Read a change plan written by write_plan."""
+    plan = pd.read_csv(path, keep_default_na=False, na_values=[''])[PLAN_COLUMNS]
+    for column in ('dmid', 'dist_type_id', 'template_dmid'):
+        plan[column] = plan[column].astype('Int64')
+    return plan
+
+
+def _plan_result(plan: pd.DataFrame, dry_run: bool = False) -> dict:
+    """ensure_disturbances_exist-style result dict for a plan."""
+    result = {}
+    for row in plan.itertuples(index=False):
+        category = _as_str(row.category)
+        if row.action == 'missing':
+            info = {
+                'dmid': None,
+                'dist_type_id': None,
+                'created': False,
+                'category': None,
+                'warning': "Not found and no scaling parameters provided"
+            }
+        elif row.action == 'invalid':
+            info = {
+                'dmid': None,
+                'dist_type_id': None,
+                'created': False,
+                'category': category,
+                'warning': f"Unknown category: {category}"
+            }
+        else:
+            info = {
+                'dmid': _as_int(row.dmid),
+                'dist_type_id': _as_int(row.dist_type_id),
+                'created': row.action == 'create',
+                'category': category
+            }
+            if row.action == 'create' and dry_run:
+                info['dry_run'] = True
+        result[row.name] = info
+    return result
+
+
+def apply_disturbance_plan(db_path, plan) -> dict:
+    """
+    Execute the 'create' rows of a change plan exactly as planned.
+
+    The plan is refused if the AIDB has changed since it was made (its max
+    DMID/DistTypeID no longer match the plan, or a planned name now exists).
+
+    Parameters:
+        db_path: Path to the AIDB (.mdb/.accdb or SQLite copy), an AIDBBackend or an AIDBSession
+        plan: DataFrame from plan_disturbance_changes, or path to a written plan
+
+    Returns:
+        dict as returned by ensure_disturbances_exist
+    """
+    if not isinstance(plan, pd.DataFrame):
+        plan = read_plan(plan)
+    create = plan[plan['action'] == 'create']
+
+    with _open_session(db_path) as session:
+        if len(create):
+            conn = session.conn
+            cursor = conn.cursor()
+            base_dmid = fetch_max(cursor, "SELECT MAX(DMID) FROM tblDMValuesLookup")
+            base_dist_type_id = fetch_max(cursor, "SELECT MAX(DistTypeID) FROM tblDisturbanceTypeDefault")
+            cursor.close()
+            planned = (_as_int(create['base_dmid'].iloc[0]), _as_int(create['base_dist_type_id'].iloc[0]))
+            if (base_dmid, base_dist_type_id) != planned:
+                raise ValueError(
+                    f"AIDB changed since the plan was made: max DMID/DistTypeID are "
+                    f"{(base_dmid, base_dist_type_id)}, plan expects {planned}"
+                )
+            existing = get_existing_disturbances(conn)
+            clash = [name for name in create['name'] if name.lower() in existing]
+            if clash:
+                raise ValueError(f"Planned disturbance types already exist in AIDB: {clash}")
+
+            items = [
+                {
+                    'name': row.name,
+                    'target_pct': float(row.percent),
+                    'category': row.category,
+                    'new_dmid': int(row.dmid),
+                    'new_dist_type_id': int(row.dist_type_id),
+                }
+                for row in create.itertuples(index=False)
+            ]
+            created = create_scaled_disturbances(conn=conn, db_path=session, items=items)
+            for item, created_info in zip(items, created):
+                print(f"Created: {item['name']} (DMID: {created_info['dmid']}, "
+                      f"DistTypeID: {created_info['dist_type_id']})")
+
+    return _plan_result(plan)
+
+
 # =============================================================================
 # MAIN ENTRY POINT
 # =============================================================================
@@ -312,13 +1087,14 @@ def create_scaled_disturbance(
 def ensure_disturbances_exist(
     db_path: str,
     disturbance_specs: list,
-    dry_run: bool = False
+    dry_run: bool = False,
+    plan_path=None
 ) -> dict:
     """
     Ensure all disturbance types exist in the AIDB, creating missing ones.
 
     Parameters:
-        db_path: Path to the AIDB .mdb or .accdb file
+        db_path: Path to the AIDB (.mdb/.accdb or SQLite copy), an AIDBBackend or an AIDBSession
         disturbance_specs: List of dicts, each with:
             - 'name': str - The disturbance type name (e.g., "30% precommercial thinning")
             - 'percent': float - The removal percentage as decimal (e.g., 0.30 for 30%)
@@ -328,6 +1104,9 @@ def ensure_disturbances_exist(
             you can pass just {'name': '...'} with percent and category omitted.
 
         dry_run: If True, report what would be created without making changes
+        plan_path: Optional path to write the change plan (CSV) to; a plan
+                   written in a dry run can be executed later with
+                   apply_disturbance_plan()
 
     Returns:
         dict mapping disturbance name -> {
@@ -346,107 +1125,26 @@ def ensure_disturbances_exist(
         ]
         result = ensure_disturbances_exist(aidb_path, specs)
     """
-    conn = connect_aidb(db_path)
-
-    try:
-        # Get existing disturbances
-        existing = get_existing_disturbances(conn)
-
-        # Get current max IDs (matches original notebook pattern)
-        cursor = conn.cursor()
-        base_dmid = fetch_max(cursor, "SELECT MAX(DMID) FROM tblDMValuesLookup")
-        base_dist_type_id = fetch_max(cursor, "SELECT MAX(DistTypeID) FROM tblDisturbanceTypeDefault")
-        cursor.close()
-
-        idx = 0  # Counter for new IDs (matches original notebook pattern)
-        result = {}
-        warnings_list = []
-
-        for spec in disturbance_specs:
-            name = spec.get('name', '').strip()
-            percent = spec.get('percent')
-            category = spec.get('category')
-
-            if not name:
-                continue
-
-            key = name.lower()
-
-            # Check if already exists
-            if key in existing:
-                result[name] = {
-                    'dmid': existing[key]['dmid'],
-                    'dist_type_id': existing[key]['dist_type_id'],
-                    'created': False,
-                    'category': category
-                }
-                continue
-
-            # If no percent/category provided, it's a standard type that should already exist
-            if percent is None or category is None:
-                warnings_list.append(f"'{name}' not found in AIDB (no percent/category provided for creation)")
-                result[name] = {
-                    'dmid': None,
-                    'dist_type_id': None,
-                    'created': False,
-                    'category': None,
-                    'warning': "Not found and no scaling parameters provided"
-                }
-                continue
-
-            # Validate category
-            if category not in TEMPLATES:
-                warnings_list.append(f"Unknown category '{category}' for '{name}'. Must be 'precommercial' or 'commercial'.")
-                result[name] = {
-                    'dmid': None,
-                    'dist_type_id': None,
-                    'created': False,
-                    'category': category,
-                    'warning': f"Unknown category: {category}"
-                }
-                continue
-
-            # Increment counter for new IDs
-            idx += 1
-            new_dmid = base_dmid + idx
-            new_dist_type_id = base_dist_type_id + idx
-
-            # Create the disturbance type
-            if dry_run:
-                result[name] = {
-                    'dmid': new_dmid,
-                    'dist_type_id': new_dist_type_id,
-                    'created': True,
-                    'category': category,
-                    'dry_run': True
-                }
-                print(f"[DRY RUN] Would create: {name} (DMID: {new_dmid}, DistTypeID: {new_dist_type_id})")
-            else:
-                created_info = create_scaled_disturbance(
-                    conn=conn,
-                    db_path=db_path,
-                    name=name,
-                    target_pct=percent,
-                    category=category,
-                    new_dmid=new_dmid,
-                    new_dist_type_id=new_dist_type_id
-                )
-                result[name] = {
-                    'dmid': created_info['dmid'],
-                    'dist_type_id': created_info['dist_type_id'],
-                    'created': True,
-                    'category': category
-                }
-                print(f"Created: {name} (DMID: {new_dmid}, DistTypeID: {new_dist_type_id})")
-
-        # Print warnings
-        for warning in warnings_list:
-            print(f"WARNING: {warning}")
+    with _open_session(db_path) as session:
+        plan = plan_disturbance_changes(session, disturbance_specs)
+        if plan_path is not None:
+            write_plan(plan, plan_path)
+
+        if dry_run:
+            for row in plan[plan['action'] == 'create'].itertuples(index=False):
+                print(f"[DRY RUN] Would create: {row.name} (DMID: {row.dmid}, DistTypeID: {row.dist_type_id})")
+            totals = summarize_plan(plan)
+            print(f"[DRY RUN] {totals['n_create']} to create: {totals['n_values_rows']} matrix values, "
+                  f"{totals['n_assoc_rows']} associations, {totals['n_insert_rows']} rows in total")
+            result = _plan_result(plan, dry_run=True)
+        else:
+            result = apply_disturbance_plan(session, plan)
 
-        return result
+    # Print warnings
+    for warning in plan['warning'].dropna():
+        print(f"WARNING: {warning}")
 
-    finally:
-        conn.close()
+    return result
 
 
 # =============================================================================
@@ -458,20 +1156,15 @@ def get_aidb_species(db_path: str) -> pd.DataFrame:
     Query species types from AIDB.
 
     Parameters:
-        db_path: Path to the AIDB .mdb or .accdb file
+        db_path: Path to the AIDB (.mdb/.accdb or SQLite copy), an AIDBBackend or an AIDBSession
 
     Returns:
         DataFrame with SpeciesTypeID and SpeciesTypeName columns
     """
-    conn = connect_aidb(db_path)
-    try:
-        df = pd.read_sql(
-            "SELECT SpeciesTypeID, SpeciesTypeName FROM tblSpeciesTypeDefault ORDER BY SpeciesTypeName",
-            con=conn
+    with _open_session(db_path) as session:
+        return session.read_reference(
+            "SELECT SpeciesTypeID, SpeciesTypeName FROM tblSpeciesTypeDefault ORDER BY SpeciesTypeName"
         )
-        return df
-    finally:
-        conn.close()
 
 
 def get_species_with_hierarchy(db_path: str) -> pd.DataFrame:
@@ -482,13 +1175,12 @@ def get_species_with_hierarchy(db_path: str) -> pd.DataFrame:
     the genus name and forest type name for each species.
 
     Parameters:
-        db_path: Path to the AIDB .mdb or .accdb file
+        db_path: Path to the AIDB (.mdb/.accdb or SQLite copy), an AIDBBackend or an AIDBSession
 
     Returns:
         DataFrame with SpeciesTypeID, SpeciesTypeName, GenusName, ForestTypeName columns
     """
-    conn = connect_aidb(db_path)
-    try:
+    with _open_session(db_path) as session:
         # Query with joins to get hierarchy context
         query = """
             SELECT
@@ -501,10 +1193,7 @@ def get_species_with_hierarchy(db_path: str) -> pd.DataFrame:
             LEFT JOIN tblForestTypeDefault f ON g.ForestTypeID = f.ForestTypeID
             ORDER BY f.ForestTypeName, g.GenusName, s.SpeciesTypeName
         """
-        df = pd.read_sql(query, con=conn)
-        return df
-    finally:
-        conn.close()
+        return session.read_reference(query)
 
 
 def get_eco_boundaries(db_path: str) -> pd.DataFrame:
@@ -512,20 +1201,15 @@ def get_eco_boundaries(db_path: str) -> pd.DataFrame:
     Query ecological boundaries from AIDB.
 
     Parameters:
-        db_path: Path to the AIDB .mdb or .accdb file
+        db_path: Path to the AIDB (.mdb/.accdb or SQLite copy), an AIDBBackend or an AIDBSession
 
     Returns:
         DataFrame with EcoBoundaryID and EcoBoundaryName columns
     """
-    conn = connect_aidb(db_path)
-    try:
-        df = pd.read_sql(
-            "SELECT EcoBoundaryID, EcoBoundaryName FROM tblEcoBoundaryDefault ORDER BY EcoBoundaryName",
-            con=conn
+    with _open_session(db_path) as session:
+        return session.read_reference(
+            "SELECT EcoBoundaryID, EcoBoundaryName FROM tblEcoBoundaryDefault ORDER BY EcoBoundaryName"
         )
-        return df
-    finally:
-        conn.close()
 
 
 def get_species_by_eco_boundary(db_path: str, eco_boundary_id: int = None) -> pd.DataFrame:
@@ -536,14 +1220,13 @@ def get_species_by_eco_boundary(db_path: str, eco_boundary_id: int = None) -> pd
     biomass parameters defined for the specified ecological region.
 
     Parameters:
-        db_path: Path to the AIDB .mdb or .accdb file
+        db_path: Path to the AIDB (.mdb/.accdb or SQLite copy), an AIDBBackend or an AIDBSession
         eco_boundary_id: EcoBoundaryID to filter by (if None, returns all species)
 
     Returns:
         DataFrame with EcoBoundaryID, EcoBoundaryName, SpeciesTypeID, SpeciesTypeName columns
     """
-    conn = connect_aidb(db_path)
-    try:
+    with _open_session(db_path) as session:
         # MS Access requires parentheses around multiple JOINs
         # Use subquery approach that works with Access SQL
         query = """
@@ -575,10 +1258,7 @@ def get_species_by_eco_boundary(db_path: str, eco_boundary_id: int = None) -> pd
 
         query += " ORDER BY merged.Name"
 
-        df = pd.read_sql(query, con=conn)
-        return df
-    finally:
-        conn.close()
+        return session.read_reference(query)
 
 
 # =============================================================================
@@ -586,6 +1266,19 @@ def get_species_by_eco_boundary(db_path: str, eco_boundary_id: int = None) -> pd
 # =============================================================================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AIDB disturbance/species manager")
+    parser.add_argument("--import-from", default=None,
+                        help="AIDB file or CSV fixture directory to convert to SQLite")
+    parser.add_argument("--sqlite", default=None, help="Destination SQLite file for --import-from")
+    args = parser.parse_args()
+
+    if args.import_from:
+        if not args.sqlite:
+            parser.error("--import-from requires --sqlite")
+        print(f"Importing {args.import_from} -> {args.sqlite}")
+        import_aidb_to_sqlite(args.import_from, args.sqlite)
+        raise SystemExit(0)
+
     # Example of how to use the module
     print("Example disturbance specifications:")
     print("-" * 50)
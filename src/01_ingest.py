@@ -30,12 +30,14 @@ from config import (
     ACTION_TO_DISTURBANCE,
     STAND_KEY_RENAMES,
 )
+from instrumentation import instrument
 
 
 # =============================================================================
 # SPATIAL DATA
 # =============================================================================
 
+@instrument
 def load_spatial(path=SHAPEFILE):
     """Load the shapefile, compute AREA_HA, flag non-forest stands."""
     # pyogrio handles the 0000/00/00 date issue that trips fiona
@@ -153,6 +155,7 @@ def _fix_pipe_values(df, age_cols):
     return df
 
 
+@instrument
 def load_yields1(path=YIELDS1_CSV):
     """Load Yields1 (stand-specific base yield curves)."""
     df = pd.read_csv(path)
@@ -176,6 +179,7 @@ def load_yields1(path=YIELDS1_CSV):
     return df
 
 
+@instrument
 def load_yields2(path=YIELDS2_CSV):
     """Load Yields2 (regeneration SI-based yield curves)."""
     df = pd.read_csv(path)
@@ -199,6 +203,7 @@ def load_yields2(path=YIELDS2_CSV):
     return df
 
 
+@instrument
 def load_yields3(path=YIELDS3_CSV):
     """Load Yields3 (thinning simulation yield curves)."""
     df = pd.read_csv(path)
@@ -227,6 +232,7 @@ def load_yields3(path=YIELDS3_CSV):
 # CONDITION FILE
 # =============================================================================
 
+@instrument
 def load_condition(path=CONDITION_XLSX):
     """Load condition file, extract period-0 initial conditions."""
     df = pd.read_excel(path, sheet_name="Condition")
@@ -248,6 +254,7 @@ def load_condition(path=CONDITION_XLSX):
 # MANAGEMENT SCHEDULE
 # =============================================================================
 
+@instrument
 def load_schedule(path=SCHEDULE_XLSX, sheet=SCHEDULE_SHEET):
     """Load management schedule, build event table."""
     df = pd.read_excel(path, sheet_name=sheet)
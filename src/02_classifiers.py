@@ -21,6 +21,7 @@ from config import (
     GROWTH_PERIOD_CURRENT,
     GROWTH_PERIOD_POST_REGEN,
 )
+from instrumentation import instrument
 
 
 def round_si(si_value):
@@ -31,6 +32,7 @@ def round_si(si_value):
     return f"SI{rounded}"
 
 
+@instrument
 def assign_classifiers(spatial, condition_initial, yields1):
     """
     Assign classifier values to each stand based on the condition file
@@ -33,6 +33,7 @@ from config import (
     CLASSIFIER_NAMES,
     SI_CLASS_INTERVAL,
 )
+from instrumentation import instrument
 
 
 def _age_cols(max_age):
@@ -115,6 +116,7 @@ _SPECIES_TO_REGEN = {
 }
 
 
+@instrument
 def build_current_yield_curves(stands, yields1, yields3):
     """
     Build yield curves for growth_period=current stands.
@@ -227,6 +229,7 @@ def build_current_yield_curves(stands, yields1, yields3):
     return result
 
 
+@instrument
 def build_regen_yield_curves(stands, yields2):
     """
     Build yield curves for growth_period=post_regen.
@@ -341,6 +344,7 @@ def build_regen_yield_curves(stands, yields2):
     return result
 
 
+@instrument
 def deduplicate_curves(df):
     """
     Group rows with identical classifier combos + volume trajectories
@@ -15,6 +15,8 @@ Outputs:
   - disturbance_events.csv in SIT format
 """
 
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 import geopandas as gpd
@@ -30,7 +32,9 @@ from config import (
     MAX_AGE_YIELDS1,
     MAX_AGE_YIELDS2,
     SI_CLASS_INTERVAL,
+    CLEARCUT_PCT_VOLUME_REMOVED,
 )
+from instrumentation import instrument
 
 
 # =============================================================================
@@ -56,7 +60,8 @@ def extract_disturbance_events(schedule):
 
     # Tag rotation: for each thinning event, check if a clearcut happened
     # earlier in the schedule for the same stand
-    events = events.sort_values(["stand_key", "year"])
+    # Stable sort: same-year events keep their schedule order
+    events = events.sort_values(["stand_key", "year"], kind="stable")
     events["rotation"] = 1  # default: 1st rotation
 
     for sk in events["stand_key"].unique():
@@ -235,6 +240,7 @@ def _round_si(si_value):
     return max(50, min(100, rounded))  # clamp to Yields2 range
 
 
+@instrument
 def calc_thinning_pct(events, yields1, yields3, yields2):
     """
     Calculate thinning volume removal percentage for each thinning event.
@@ -250,8 +256,6 @@ def calc_thinning_pct(events, yields1, yields3, yields2):
 
     if len(thin_events) == 0:
         print("  No thinning events found.")
-        events["pct_volume_removed"] = np.nan
-        return events
 
     pct_list = []
     n_warnings = 0
@@ -345,7 +349,7 @@ def calc_thinning_pct(events, yields1, yields3, yields2):
     if n_warnings > 5:
         print(f"    ... and {n_warnings - 5} more zero-volume warnings")
 
-    thin_events["pct_volume_removed"] = pct_list
+    thin_events["pct_volume_removed"] = np.array(pct_list, dtype=float)
 
     # Merge back
     events = events.merge(
@@ -354,7 +358,7 @@ def calc_thinning_pct(events, yields1, yields3, yields2):
     )
 
     # Standard clearcuts: 97% removal
-    events.loc[events["disturbance_type"] == "Clearcut", "pct_volume_removed"] = 97.0
+    events.loc[events["disturbance_type"] == "Clearcut", "pct_volume_removed"] = CLEARCUT_PCT_VOLUME_REMOVED
     # Partial clearcuts: use the area-based percentage
     partial_mask = events["disturbance_type"].str.endswith("% clearcut", na=False)
     for idx in events[partial_mask].index:
@@ -380,12 +384,14 @@ def calc_thinning_pct(events, yields1, yields3, yields2):
 # 6c: BUILD SPATIAL DISTURBANCE LAYERS
 # =============================================================================
 
-def build_spatial_disturbance_layers(events, spatial):
+@instrument
+def build_spatial_disturbance_layers(events, spatial, output_dir=OUTPUT_DIR):
     """
     Join disturbance events to stand polygons and write a single GeoPackage
     with a year column. Also outputs disturbance_events.csv in SIT format.
     """
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
 
     # Join events to spatial geometry
     geom = spatial[["STAND_KEY", "geometry"]].copy()
@@ -395,7 +401,7 @@ def build_spatial_disturbance_layers(events, spatial):
     events_geo = gpd.GeoDataFrame(events_geo, geometry="geometry", crs=spatial.crs)
 
     # Write single GeoPackage with year column
-    out_path = OUTPUT_DIR / "disturbances.gpkg"
+    out_path = output_dir / "disturbances.gpkg"
     out_cols = ["stand_key", "year", "disturbance_type", "pct_volume_removed", "geometry"]
     events_geo[out_cols].to_file(out_path, driver="GPKG")
     n_years = events_geo["year"].nunique()
@@ -407,7 +413,7 @@ def build_spatial_disturbance_layers(events, spatial):
 
     sit_cols = ["timestep", "stand_key", "disturbance_type", "pct_volume_removed",
                 "year", "age", "area"]
-    sit_out = OUTPUT_DIR / "disturbance_events.csv"
+    sit_out = output_dir / "disturbance_events.csv"
     sit_events[sit_cols].to_csv(sit_out, index=False)
     print(f"  Wrote {sit_out} ({len(sit_events)} events)")
 
@@ -418,7 +424,7 @@ def build_spatial_disturbance_layers(events, spatial):
 # MAIN
 # =============================================================================
 
-def run(schedule, spatial, yields1, yields3, yields2, condition_initial=None):
+def run(schedule, spatial, yields1, yields3, yields2, condition_initial=None, output_dir=OUTPUT_DIR):
     """Main entry point."""
     print("=" * 60)
     print("05_disturbances: Building disturbance layers")
@@ -431,7 +437,7 @@ def run(schedule, spatial, yields1, yields3, yields2, condition_initial=None):
         events = classify_partial_clearcuts(events, condition_initial)
 
     events = calc_thinning_pct(events, yields1, yields3, yields2)
-    events_geo = build_spatial_disturbance_layers(events, spatial)
+    events_geo = build_spatial_disturbance_layers(events, spatial, output_dir=output_dir)
 
     return events, events_geo
 
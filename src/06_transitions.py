@@ -15,9 +15,19 @@ After 1st/2nd Thin:
 After Site Prep:
   - No yield curve change (preparatory action)
 
+Optionally, rules are compressed into wildcard ("?") rules keyed on the
+fewest source classifiers that determine the target (e.g. species +
+growth_period for Clearcut), verified to resolve every event identically,
+including at the states later events see once earlier ones have applied.
+
 Output: transition_rules.csv in SIT format.
 """
 
+from importlib import import_module
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
 from config import (
@@ -25,7 +35,10 @@ from config import (
     CLASSIFIER_NAMES,
     GROWTH_PERIOD_CURRENT,
     GROWTH_PERIOD_POST_REGEN,
+    WILDCARD,
+    COMPRESS_TRANSITION_RULES,
 )
+from instrumentation import instrument
 
 
 # Species transitions after clearcut (replanting to commercial species)
@@ -40,10 +53,14 @@ _CLEARCUT_SPECIES_MAP = {
 }
 
 
+@instrument
 def build_transition_rules(events, stands):
     """
     Build transition rules from disturbance events.
 
+    Events are joined to their stand's classifiers in one merge, and target
+    classifiers are computed with column expressions per disturbance type.
+
     Parameters:
         events: DataFrame from 05_disturbances (with disturbance_type, thin ages, etc.)
         stands: DataFrame from 02_classifiers (with current classifier assignments)
@@ -55,81 +72,57 @@ def build_transition_rules(events, stands):
     print("06_transitions: Building transition rules")
     print("=" * 60)
 
-    rules = []
-
-    # Get unique disturbance events with their classifier context
-    for _, evt in events.iterrows():
-        sk = evt["stand_key"]
-        dist_type = evt["disturbance_type"]
-
-        # Look up current classifiers for this stand
-        stand_row = stands[stands["stand_key"] == sk]
-        if len(stand_row) == 0:
-            continue
-        stand_row = stand_row.iloc[0]
-
-        # Source classifiers (before disturbance)
-        src = {c: stand_row[c] for c in CLASSIFIER_NAMES}
-
-        # Target classifiers (after disturbance)
-        tgt = dict(src)  # start with copy
-
-        # Schedule columns thin1/thin2 reflect state BEFORE this action:
-        # At aHTHIN1: thin1=0, actual thin age = AGE column (evt["age"])
-        # At aHTHIN2: thin1=<prior 1st thin age>, actual thin age = AGE column
-        age = int(evt["age"])
-        prior_thin1 = int(evt["thin1"])
-        fert1 = int(evt["fert1"])
-        fert2 = int(evt["fert2"])
-
-        if dist_type == "Clearcut":
-            # Transition to post_regen growth period
-            tgt["growth_period"] = GROWTH_PERIOD_POST_REGEN
-            # Species may change (replanting)
-            tgt["species"] = _CLEARCUT_SPECIES_MAP.get(src["species"], src["species"])
-            # Trajectory for new rotation — starts at no-thin baseline
-            tgt["mgmt_trajectory"] = "T1-0-T2-0-F1-0-F2-0"
-            reset_age = 0
-
-        elif dist_type == "1st_Thin":
-            # Move to post-1st-thin trajectory; age does NOT reset
-            actual_thin1_age = age
-            tgt["mgmt_trajectory"] = f"T1-{actual_thin1_age}-T2-0-F1-{fert1}-F2-{fert2}"
-            reset_age = -1  # -1 = no age reset
-
-        elif dist_type == "2nd_Thin":
-            # Move to post-2nd-thin trajectory; age does NOT reset
-            actual_thin2_age = age
-            tgt["mgmt_trajectory"] = f"T1-{prior_thin1}-T2-{actual_thin2_age}-F1-{fert1}-F2-{fert2}"
-            reset_age = -1
-
-        elif dist_type == "Site_Prep":
-            # No yield curve change
-            reset_age = -1
-
-        elif dist_type.endswith("% clearcut"):
-            # Partial (split-year) clearcut — no yield curve change.
-            # Only the final standard "Clearcut" triggers transition.
-            reset_age = -1
-
-        else:
-            continue
-
-        rule = {
-            "disturbance_type": dist_type,
-        }
-        for c in CLASSIFIER_NAMES:
-            rule[f"src_{c}"] = src[c]
-            rule[f"tgt_{c}"] = tgt[c]
-        rule["reset_age"] = reset_age
-
-        rules.append(rule)
-
-    rules_df = pd.DataFrame(rules)
+    # Source classifiers (before disturbance): first stand row per stand_key.
+    # Inner merge drops events for unknown stands and keeps event order.
+    src_cols = {c: f"src_{c}" for c in CLASSIFIER_NAMES}
+    stand_src = stands.drop_duplicates(subset=["stand_key"])[CLASSIFIER_NAMES].rename(columns=src_cols)
+    stand_src["stand_key"] = stand_src["src_stand_key"]
+
+    evt = events[["stand_key", "disturbance_type", "age", "thin1", "fert1", "fert2"]]
+    df = evt.merge(stand_src, on="stand_key", how="inner")
+
+    dist_type = df["disturbance_type"].astype(str)
+    is_cc = dist_type == "Clearcut"
+    is_thin1 = dist_type == "1st_Thin"
+    is_thin2 = dist_type == "2nd_Thin"
+    is_partial_cc = dist_type.str.endswith("% clearcut")
+    known = is_cc | is_thin1 | is_thin2 | (dist_type == "Site_Prep") | is_partial_cc
+    df, is_cc, is_thin1, is_thin2 = df[known], is_cc[known], is_thin1[known], is_thin2[known]
+
+    # Schedule columns thin1/thin2 reflect state BEFORE this action:
+    # At aHTHIN1: thin1=0, actual thin age = AGE column (evt["age"])
+    # At aHTHIN2: thin1=<prior 1st thin age>, actual thin age = AGE column
+    age = df["age"].astype(int).astype(str)
+    prior_thin1 = df["thin1"].astype(int).astype(str)
+    fert_tail = "-F1-" + df["fert1"].astype(int).astype(str) + "-F2-" + df["fert2"].astype(int).astype(str)
+
+    # Target classifiers (after disturbance): start as a copy of source
+    tgt = {c: df[f"src_{c}"] for c in CLASSIFIER_NAMES}
+
+    # Clearcut: post_regen growth period, replanted species, no-thin baseline
+    tgt["growth_period"] = tgt["growth_period"].where(~is_cc, GROWTH_PERIOD_POST_REGEN)
+    replant = df["src_species"].map(_CLEARCUT_SPECIES_MAP).fillna(df["src_species"])
+    tgt["species"] = tgt["species"].where(~is_cc, replant)
+
+    traj = tgt["mgmt_trajectory"].where(~is_cc, "T1-0-T2-0-F1-0-F2-0")
+    # 1st/2nd thin: move to post-thin trajectory; age does NOT reset
+    traj = traj.where(~is_thin1, "T1-" + age + "-T2-0" + fert_tail)
+    traj = traj.where(~is_thin2, "T1-" + prior_thin1 + "-T2-" + age + fert_tail)
+    tgt["mgmt_trajectory"] = traj
+    # Site_Prep and partial ("XX.XX% clearcut") events: no yield curve change.
+    # Only the final standard "Clearcut" triggers the transition.
+
+    rules_df = pd.DataFrame({"disturbance_type": df["disturbance_type"]})
+    for c in CLASSIFIER_NAMES:
+        rules_df[f"src_{c}"] = df[f"src_{c}"]
+        rules_df[f"tgt_{c}"] = tgt[c]
+    rules_df["reset_age"] = np.where(is_cc, 0, -1)  # -1 = no age reset
+    rules_df = rules_df.reset_index(drop=True)
 
     # Deduplicate: same source classifiers + disturbance type -> same target
     dedup_cols = ["disturbance_type"] + [f"src_{c}" for c in CLASSIFIER_NAMES]
-    rules_df = rules_df.drop_duplicates(subset=dedup_cols)
+    row_hash = pd.util.hash_pandas_object(rules_df[dedup_cols], index=False)
+    rules_df = rules_df[~row_hash.duplicated()]
 
     print(f"\n  Transition rules: {len(rules_df)}")
     print(f"    By disturbance type: {rules_df['disturbance_type'].value_counts().to_dict()}")
@@ -137,19 +130,326 @@ def build_transition_rules(events, stands):
     return rules_df
 
 
-def write_transition_rules(rules_df):
+# =============================================================================
+# WILDCARD COMPRESSION
+# =============================================================================
+
+def _event_sources(events, stands):
+    """Source classifiers for every event: disturbance_type + CLASSIFIER_NAMES."""
+    stand_src = stands.drop_duplicates(subset=["stand_key"])[CLASSIFIER_NAMES]
+    return events[["disturbance_type", "stand_key"]].merge(stand_src, on="stand_key", how="inner")
+
+
+def _group_rules(grp, key, gid, wildcard_tgt):
+    """One wildcard rule per key combination of a disturbance type's rules."""
+    first = grp.groupby(gid, sort=False).head(1)
+    first_gid = gid.loc[first.index]
+    out = pd.DataFrame({"disturbance_type": first["disturbance_type"].values})
+    for c in CLASSIFIER_NAMES:
+        out[f"src_{c}"] = first[f"src_{c}"].values if c in key else WILDCARD
+        out[f"tgt_{c}"] = np.where(
+            wildcard_tgt[c].loc[first_gid].values, WILDCARD, first[f"tgt_{c}"].values
+        )
+    out["reset_age"] = first["reset_age"].values
+    return out
+
+
+def _same_resolution(expected, actual):
+    """Row mask: matched alike and, where matched, the same target and reset_age."""
+    cols = [f"tgt_{c}" for c in CLASSIFIER_NAMES] + ["reset_age"]
+    same = expected["matched"].to_numpy() == actual["matched"].to_numpy()
+    return same & ~(
+        expected["matched"].to_numpy()
+        & (expected[cols].astype(str).to_numpy() != actual[cols].astype(str).to_numpy()).any(axis=1)
+    )
+
+
+def _compress_group(grp, sources, expected):
+    """
+    Find the set of source classifiers that determines the target with the
+    fewest rules for one disturbance type, and emit one wildcard rule per
+    key combination.
+
+    Target classifiers this disturbance type never changes become "?"
+    (unchanged). A classifier it does change is written explicitly when it
+    is constant for the key, otherwise it must equal the source for every
+    rule sharing the key and becomes "?".
+
+    A key must also resolve every source state of this disturbance type
+    (sources, resolved by the full table to expected) the same way: a
+    wildcard must not make a rule match a state no rule matched before
+    (e.g. Clearcut rules keep growth_period where post-regen states would
+    otherwise match). The full classifier set always qualifies, since rules
+    are unique on it.
+    """
+    keep = {c: grp[f"tgt_{c}"].eq(grp[f"src_{c}"]) for c in CLASSIFIER_NAMES}
+
+    # Source values of the rules and of the states no rule matches, as
+    # shared integer codes per classifier
+    unmatched = sources[~expected["matched"].to_numpy(bool)]
+    codes, free_codes, n_values = {}, {}, {}
+    for c in CLASSIFIER_NAMES:
+        values, uniques = pd.factorize(pd.concat([grp[f"src_{c}"], unmatched[c]]).astype(str))
+        codes[c], free_codes[c] = values[:len(grp)], values[len(grp):]
+        n_values[c] = len(uniques)
+
+    candidates = []
+    for size in range(len(CLASSIFIER_NAMES) + 1):
+        for key in combinations(CLASSIFIER_NAMES, size):
+            rule_key = np.zeros(len(grp), dtype=np.int64)
+            free_key = np.zeros(len(unmatched), dtype=np.int64)
+            for c in key:
+                both, _ = pd.factorize(np.concatenate([rule_key, free_key]) * n_values[c]
+                                       + np.concatenate([codes[c], free_codes[c]]))
+                rule_key, free_key = both[:len(grp)], both[len(grp):]
+            # A wildcard must not widen a rule to a state no rule matched
+            if np.isin(free_key, rule_key).any():
+                continue
+            gid = pd.Series(pd.factorize(rule_key)[0], index=grp.index)
+            n_rules = int(gid.max()) + 1
+            if grp["reset_age"].groupby(gid).nunique().max() > 1:
+                continue
+
+            wildcard_tgt = {}
+            for c in CLASSIFIER_NAMES:
+                if keep[c].all():
+                    wildcard_tgt[c] = pd.Series(True, index=range(n_rules))
+                    continue
+                all_keep = keep[c].groupby(gid).all()
+                constant = grp[f"tgt_{c}"].groupby(gid).nunique(dropna=False) <= 1
+                if not (all_keep | constant).all():
+                    break
+                wildcard_tgt[c] = ~constant
+            else:
+                candidates.append((n_rules, len(candidates), key, gid, wildcard_tgt))
+
+    for _, _, key, gid, wildcard_tgt in sorted(candidates, key=lambda t: t[:2]):
+        out = _group_rules(grp, key, gid, wildcard_tgt)
+        if len(key) == len(CLASSIFIER_NAMES) or _same_resolution(
+            expected, resolve_transition_rules(out, sources)
+        ).all():
+            return out, key
+
+
+class RuleIndex:
+    """
+    Transition rules indexed for resolution: one hash index per wildcard
+    pattern (set of non-wildcard source columns) of int64 keys over the
+    disturbance type and the pattern's source values.
+
+    Built once per rule table; match() then costs one probe per pattern
+    for any number of sources.
+    """
+
+    def __init__(self, rules_df):
+        self.rules = rules_df.reset_index(drop=True)
+        src = self.rules[[f"src_{c}" for c in CLASSIFIER_NAMES]].astype(str)
+        self.dist_types = pd.Index(pd.unique(self.rules["disturbance_type"].astype(str)))
+        self.values = {
+            c: pd.Index(pd.unique(src[f"src_{c}"][src[f"src_{c}"] != WILDCARD]))
+            for c in CLASSIFIER_NAMES
+        }
+        sizes = [len(self.dist_types)] + [len(self.values[c]) for c in CLASSIFIER_NAMES]
+        if np.prod([float(max(n, 1)) for n in sizes]) >= 2**63:
+            raise ValueError(f"Too many transition rule source values to index: {sizes}")
+        self.radix = np.cumprod([max(n, 1) for n in sizes]).astype(np.int64)
+
+        specific = src.ne(WILDCARD).to_numpy()
+        bits = specific.astype(np.int64) @ (1 << np.arange(len(CLASSIFIER_NAMES), dtype=np.int64))
+        dist = self.dist_types.get_indexer(self.rules["disturbance_type"].astype(str))
+        codes = self.value_codes(self.rules, prefix="src_")
+
+        # Most specific pattern first, then in table order
+        _, first = np.unique(bits, return_index=True)
+        first = sorted(first, key=lambda i: (-specific[i].sum(), i))
+        self.patterns = []
+        for i in first:
+            rows = np.flatnonzero(bits == bits[i])
+            keys, pos = np.unique(self._keys(dist[rows], codes[rows], specific[i]), return_index=True)
+            self.patterns.append((specific[i], pd.Index(keys), rows[pos]))
+
+        self.reset_age = self.rules["reset_age"].to_numpy()
+
+    def value_codes(self, df, prefix=""):
+        """(n, len(CLASSIFIER_NAMES)) codes of df's classifier values; -1 where no rule has the value."""
+        return np.column_stack([
+            self.values[c].get_indexer(df[f"{prefix}{c}"].astype(str)) for c in CLASSIFIER_NAMES
+        ]).reshape(len(df), len(CLASSIFIER_NAMES)).astype(np.int64)
+
+    def _keys(self, dist, value_codes, fixed):
+        """int64 key of the disturbance type and the fixed columns; -1 if one has no code."""
+        kept = value_codes[:, fixed]
+        keys = dist + kept @ self.radix[:-1][fixed]
+        keys[(dist < 0) | (kept < 0).any(axis=1)] = -1
+        return keys
+
+    def match(self, dist, value_codes):
+        """
+        Position of the rule each source resolves to (-1: none).
+
+        Parameters:
+            dist: Disturbance type codes (positions in dist_types, -1 unknown)
+            value_codes: Array from value_codes()
+        """
+        rule = np.full(len(dist), -1, dtype=np.int64)
+        for fixed, index, positions in self.patterns:
+            todo = np.flatnonzero(rule < 0)
+            if len(todo) == 0:
+                break
+            keys = self._keys(dist[todo], value_codes[todo], fixed)
+            pos = index.get_indexer(keys)
+            hit = (pos >= 0) & (keys >= 0)
+            rule[todo[hit]] = positions[pos[hit]]
+        return rule
+
+    def resolve(self, sources):
+        """See resolve_transition_rules."""
+        dist = self.dist_types.get_indexer(sources["disturbance_type"].astype(str))
+        rule = self.match(dist, self.value_codes(sources))
+        hit = rule >= 0
+        at = rule.clip(min=0)
+        out = pd.DataFrame(index=pd.RangeIndex(len(sources)))
+        for c in CLASSIFIER_NAMES:
+            tgt = self.rules[f"tgt_{c}"].to_numpy(object)[at] if len(self.rules) else np.full(len(at), None)
+            tgt = np.where(tgt == WILDCARD, sources[c].to_numpy(object), tgt)
+            out[f"tgt_{c}"] = pd.Series(np.where(hit, tgt, pd.NA), dtype=object)
+        reset = self.reset_age[at] if len(self.rules) else np.zeros(len(at))
+        out["reset_age"] = pd.array(np.where(hit, reset, 0), dtype="Int64")
+        out.loc[~hit, "reset_age"] = pd.NA
+        out["rule"] = pd.array(np.where(hit, rule, 0), dtype="Int64")
+        out.loc[~hit, "rule"] = pd.NA
+        out["matched"] = hit
+        return out
+
+
+def resolve_transition_rules(rules_df, sources):
+    """
+    Resolve source classifier states against (possibly wildcard) transition rules.
+
+    Rules are tried most-specific first (most non-wildcard source columns),
+    in table order within equal specificity; wildcard targets keep the
+    source value.
+
+    Parameters:
+        rules_df: DataFrame in transition_rules.csv layout, or a RuleIndex
+        sources: DataFrame with disturbance_type + CLASSIFIER_NAMES columns
+
+    Returns:
+        DataFrame aligned to `sources` with tgt_* columns, reset_age, the
+        position of the matched rule in rules_df ("rule") and a boolean
+        "matched" column.
+    """
+    index = rules_df if isinstance(rules_df, RuleIndex) else RuleIndex(rules_df)
+    return index.resolve(sources.reset_index(drop=True))
+
+
+def _replayed_sources(rules_df, events, stands):
+    """
+    Every source state the rules can be asked to resolve: each event at its
+    stand's state from 02_classifiers, and at the state the replay of the
+    stand's earlier events through rules_df leaves it in
+    (qa_volume_sim.resolve_event_states; events in SIM_START_YEAR-SIM_END_YEAR).
+
+    Returns:
+        (distinct sources: disturbance_type + CLASSIFIER_NAMES, replayed
+        record events from resolve_event_states, StateCodec, initial state codes)
+    """
+    sim = import_module("qa_volume_sim")
+    stand_state = stands.drop_duplicates(subset=["stand_key"]).reset_index(drop=True)
+    codec = sim.StateCodec([stand_state, rules_df])
+    state0 = codec.encode(stand_state)
+    ev = sim.resolve_event_states(sim.record_events(events, stand_state), state0,
+                                  RuleIndex(rules_df), codec)
+
+    replayed = codec.decode(ev["src"].clip(lower=0).to_numpy())[ev["src"].to_numpy() >= 0]
+    replayed.insert(0, "disturbance_type", ev["disturbance_type"].to_numpy()[ev["src"].to_numpy() >= 0])
+    sources = pd.concat([_event_sources(events, stands), replayed], ignore_index=True)
+    sources = sources[sources["disturbance_type"].isin(rules_df["disturbance_type"])]
+    sources = sources.astype(str).drop_duplicates(ignore_index=True)
+    return sources, ev, codec, state0
+
+
+def compress_transition_rules(rules_df, events, stands):
+    """
+    Fold transition rules into wildcard rules and verify them against every event.
+
+    Events are checked at the stand's classifier state and at every state
+    the replay of the stand's earlier events reaches (_replayed_sources),
+    so a wildcard never changes which rule fires later in a stand's life.
+
+    Parameters:
+        rules_df: DataFrame from build_transition_rules()
+        events: DataFrame from 05_disturbances
+        stands: DataFrame from 02_classifiers
+
+    Returns:
+        Compressed DataFrame in the same layout as rules_df.
+
+    Raises:
+        ValueError if any event resolves to a different target (or to a
+        rule where the original table had none, or vice versa) under the
+        compressed table.
+    """
+    sources, ev, codec, state0 = _replayed_sources(rules_df, events, stands)
+    expected = resolve_transition_rules(rules_df, sources)
+
+    parts = []
+    for dist_type, grp in rules_df.groupby("disturbance_type", sort=False):
+        of_type = (sources["disturbance_type"] == dist_type).to_numpy()
+        compressed, key = _compress_group(
+            grp, sources[of_type].reset_index(drop=True), expected[of_type].reset_index(drop=True)
+        )
+        parts.append(compressed)
+        if len(grp) > 1 or key:
+            print(f"    {dist_type}: {len(grp)} -> {len(compressed)} rules "
+                  f"(key: {', '.join(key) if key else 'all wildcard'})")
+    compressed = pd.concat(parts, ignore_index=True)[rules_df.columns]
+
+    # Every event must resolve the same way under both tables, at the
+    # stand's state and after replaying its earlier events
+    actual = resolve_transition_rules(compressed, sources)
+    mismatch = ~_same_resolution(expected, actual)
+    replay = import_module("qa_volume_sim").resolve_event_states(
+        ev[["row", "stand_key", "year", "disturbance_type", "pct_volume_removed", "rank"]],
+        state0, RuleIndex(compressed), codec,
+    )
+    replay_mismatch = (
+        (replay["matched"].to_numpy() != ev["matched"].to_numpy())
+        | (replay["tgt"].to_numpy() != ev["tgt"].to_numpy())
+        | (replay["reset_age"].to_numpy() != ev["reset_age"].to_numpy())
+    )
+    if mismatch.any() or replay_mismatch.any():
+        example = (sources[mismatch].iloc[0].to_dict() if mismatch.any()
+                   else ev[replay_mismatch].iloc[0][["stand_key", "year", "disturbance_type"]].to_dict())
+        raise ValueError(
+            f"Compressed transition rules resolve {int(mismatch.sum())} of {len(sources)} "
+            f"source states and {int(replay_mismatch.sum())} of {len(ev)} replayed events "
+            f"differently, e.g. {example}"
+        )
+
+    reduction = 1 - len(compressed) / len(rules_df) if len(rules_df) else 0.0
+    print(f"\n  Compressed transition rules: {len(rules_df)} -> {len(compressed)} "
+          f"({reduction:.1%} reduction), verified against {len(sources)} source states "
+          f"and {len(ev)} replayed events")
+    return compressed
+
+
+def write_transition_rules(rules_df, output_dir=OUTPUT_DIR):
     """Write transition_rules.csv."""
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    out_path = OUTPUT_DIR / "transition_rules.csv"
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    out_path = output_dir / "transition_rules.csv"
     rules_df.to_csv(out_path, index=False)
     print(f"  Wrote {out_path}")
     return out_path
 
 
-def run(events, stands):
+def run(events, stands, compress=COMPRESS_TRANSITION_RULES, output_dir=OUTPUT_DIR):
     """Main entry point."""
     rules_df = build_transition_rules(events, stands)
-    write_transition_rules(rules_df)
+    if compress:
+        rules_df = compress_transition_rules(rules_df, events, stands)
+    write_transition_rules(rules_df, output_dir=output_dir)
     return rules_df
 
 
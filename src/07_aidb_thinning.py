@@ -10,17 +10,31 @@ Disturbance type names follow: "XX.XX% commercial thinning"
 
 Usage:
     python 07_aidb_thinning.py --aidb-path /path/to/aidb.accdb [--dry-run]
+    python 07_aidb_thinning.py --aidb-path /path/to/aidb.sqlite [--dry-run]
+    python 07_aidb_thinning.py --aidb-path /path/to/aidb.accdb --apply-plan output/aidb_change_plan.csv
+
+Every run writes the planned AIDB changes to OUTPUT_DIR/aidb_change_plan.csv;
+a plan reviewed after --dry-run can be executed unchanged with --apply-plan.
+
+Several AIDBs (one per scenario / ecozone parameterization) can be given at
+once; the thinning specs are built once and applied to every database in
+parallel worker processes, each with its own connection:
+
+    python 07_aidb_thinning.py --aidb-path a.accdb b.accdb c.sqlite [--workers 3]
 """
 
 import argparse
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 import pandas as pd
 
 # Import the existing AIDB manager from project root
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
-from aidb_disturbance_manager import ensure_disturbances_exist
+from aidb_disturbance_manager import apply_disturbance_plan, ensure_disturbances_exist
 
 from config import OUTPUT_DIR
 
@@ -70,23 +84,112 @@ def build_disturbance_specs(pcts):
     return specs
 
 
-def run(aidb_path, events_or_csv=None, dry_run=False):
+def _plan_path(aidb_path, index, n_databases, output_dir=OUTPUT_DIR):
+    """Change-plan CSV for one AIDB (suffixed per database when fanning out)."""
+    if n_databases == 1:
+        return Path(output_dir) / "aidb_change_plan.csv"
+    return Path(output_dir) / f"aidb_change_plan_{index}_{Path(aidb_path).stem}.csv"
+
+
+def process_aidb(aidb_path, specs, dry_run=False, plan_path=None, apply_plan=None):
+    """
+    Apply the disturbance specs (or a reviewed plan) to one AIDB.
+
+    Runs in a worker process when several AIDBs are processed, so it opens
+    its own connection through ensure_disturbances_exist/apply_disturbance_plan.
+
+    Returns:
+        (result dict, elapsed seconds)
+    """
+    start = time.perf_counter()
+    if apply_plan is not None:
+        print(f"\n  Applying change plan: {apply_plan} -> {aidb_path}")
+        result = apply_disturbance_plan(db_path=str(aidb_path), plan=apply_plan)
+    else:
+        result = ensure_disturbances_exist(
+            db_path=str(aidb_path),
+            disturbance_specs=specs,
+            dry_run=dry_run,
+            plan_path=plan_path,
+        )
+        if plan_path is not None:
+            print(f"\n  Wrote AIDB change plan: {plan_path}")
+    return result, time.perf_counter() - start
+
+
+def summarize_aidb_results(results, timings):
+    """
+    Per-database summary of ensure_disturbances_exist results.
+
+    Returns:
+        DataFrame with aidb_path, n_created, n_existing, n_warnings, seconds
+    """
+    rows = []
+    for path, result in results.items():
+        rows.append({
+            "aidb_path": str(path),
+            "n_created": sum(1 for r in result.values() if r["created"]),
+            "n_existing": sum(1 for r in result.values() if not r["created"] and "warning" not in r),
+            "n_warnings": sum(1 for r in result.values() if "warning" in r),
+            "seconds": round(timings[path], 3),
+        })
+    return pd.DataFrame(rows)
+
+
+def run(aidb_path, events_or_csv=None, dry_run=False, apply_plan=None, workers=None,
+        output_dir=OUTPUT_DIR):
     """
     Main entry point.
 
     Parameters:
-        aidb_path: Path to AIDB .mdb or .accdb file
+        aidb_path: Path to AIDB .mdb/.accdb file or SQLite copy (.sqlite/.db),
+                   or a list of distinct such paths to update in parallel
         events_or_csv: DataFrame or path to disturbance_events.csv
-                       If None, reads from OUTPUT_DIR/disturbance_events.csv
-        dry_run: If True, only report what would be created
+                       If None, reads from output_dir/disturbance_events.csv
+        dry_run: If True, only report what would be created (not with apply_plan)
+        apply_plan: Optional path to a change plan from an earlier run (or a
+                    list, one per AIDB); if given it is executed instead of
+                    planning again
+        workers: Max worker processes for several AIDBs (default: one per
+                 database, capped at the CPU count)
+        output_dir: Directory for the change plans, summary and mapping CSVs
+
+    Returns:
+        (result, pct_to_dist_name) where result is the
+        ensure_disturbances_exist dict for a single AIDB, or a dict of
+        aidb_path -> result for a list of AIDBs
+
+    Raises:
+        ValueError if dry_run is combined with apply_plan, or an AIDB is
+        given twice (workers would write the same database concurrently)
     """
     print("=" * 60)
     print("07_aidb_thinning: Adding thinning disturbance matrices to AIDB")
     print("=" * 60)
 
+    if dry_run and apply_plan is not None:
+        raise ValueError("--dry-run cannot be combined with --apply-plan (a plan is applied as is)")
+
+    single = isinstance(aidb_path, (str, Path))
+    aidb_paths = [aidb_path] if single else list(aidb_path)
+    resolved = pd.Series([str(Path(p).resolve()) for p in aidb_paths])
+    if resolved.duplicated().any():
+        raise ValueError(
+            f"AIDB given more than once: {sorted(set(resolved[resolved.duplicated()]))}"
+        )
+    if apply_plan is None or isinstance(apply_plan, (str, Path)):
+        apply_plans = [apply_plan] * len(aidb_paths)
+    else:
+        apply_plans = list(apply_plan)
+        if len(apply_plans) != len(aidb_paths):
+            raise ValueError(
+                f"{len(apply_plans)} change plans given for {len(aidb_paths)} AIDBs"
+            )
+
     if events_or_csv is None:
-        events_or_csv = OUTPUT_DIR / "disturbance_events.csv"
+        events_or_csv = Path(output_dir) / "disturbance_events.csv"
 
+    # Specs are built once and shared by every AIDB
     pcts = get_unique_thinning_pcts(events_or_csv)
     print(f"\n  Unique thinning removal %: {len(pcts)}")
     for p in pcts:
@@ -94,12 +197,38 @@ def run(aidb_path, events_or_csv=None, dry_run=False):
 
     specs = build_disturbance_specs(pcts)
     print(f"\n  Disturbance specs to process: {len(specs)}")
+    print(f"  AIDBs to process: {len(aidb_paths)}")
 
-    result = ensure_disturbances_exist(
-        db_path=str(aidb_path),
-        disturbance_specs=specs,
-        dry_run=dry_run,
-    )
+    jobs = [
+        (path, _plan_path(path, i, len(aidb_paths), output_dir), plan)
+        for i, (path, plan) in enumerate(zip(aidb_paths, apply_plans))
+    ]
+    results, timings = {}, {}
+    if len(jobs) == 1:
+        path, plan_path, plan = jobs[0]
+        results[path], timings[path] = process_aidb(path, specs, dry_run, plan_path, plan)
+    else:
+        n_workers = min(len(jobs), workers or os.cpu_count() or 1)
+        print(f"  Worker processes: {n_workers}")
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = {
+                pool.submit(process_aidb, path, specs, dry_run, plan_path, plan): path
+                for path, plan_path, plan in jobs
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                results[path], timings[path] = future.result()
+        results = {path: results[path] for path in aidb_paths}
+
+    summary = summarize_aidb_results(results, timings)
+    print("\n  Per-AIDB results:")
+    for row in summary.itertuples(index=False):
+        print(f"    {row.aidb_path}: {row.n_created} created, {row.n_existing} existing, "
+              f"{row.n_warnings} warnings ({row.seconds:.2f}s)")
+    if not single:
+        summary_path = Path(output_dir) / "aidb_thinning_summary.csv"
+        summary.to_csv(summary_path, index=False)
+        print(f"  Wrote per-AIDB summary: {summary_path}")
 
     # Build mapping: pct -> disturbance type name (for use in other modules)
     pct_to_dist_name = {}
@@ -112,22 +241,30 @@ def run(aidb_path, events_or_csv=None, dry_run=False):
         {"pct_volume_removed": pct, "disturbance_type_name": name}
         for pct, name in pct_to_dist_name.items()
     ])
-    mapping_path = OUTPUT_DIR / "thinning_disturbance_mapping.csv"
+    mapping_path = Path(output_dir) / "thinning_disturbance_mapping.csv"
     mapping_df.to_csv(mapping_path, index=False)
     print(f"\n  Wrote thinning-to-disturbance mapping: {mapping_path}")
 
-    return result, pct_to_dist_name
+    return (results[aidb_paths[0]] if single else results), pct_to_dist_name
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Add thinning disturbances to AIDB")
-    parser.add_argument("--aidb-path", required=True, help="Path to AIDB .mdb or .accdb file")
+    parser.add_argument("--aidb-path", required=True, nargs="+",
+                        help="Path(s) to AIDB .mdb/.accdb files or SQLite copies (.sqlite/.db)")
     parser.add_argument("--dry-run", action="store_true", help="Report without modifying AIDB")
     parser.add_argument("--events-csv", default=None, help="Path to disturbance_events.csv")
+    parser.add_argument("--apply-plan", default=None, nargs="+",
+                        help="Execute change plan(s) written by an earlier run (one per AIDB)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Max worker processes when several AIDBs are given")
     args = parser.parse_args()
 
+    single = len(args.aidb_path) == 1
     run(
-        aidb_path=args.aidb_path,
+        aidb_path=args.aidb_path[0] if single else args.aidb_path,
         events_or_csv=args.events_csv,
         dry_run=args.dry_run,
+        apply_plan=args.apply_plan[0] if single and args.apply_plan else args.apply_plan,
+        workers=args.workers,
     )
@@ -2,87 +2,401 @@
 08_tiler_config.py — Mojadata Tiler Configuration
 ===================================================
 Generates a tiler.py script for the mojadata tiler that defines:
-  - Bounding box from inventory layer
+  - Bounding box from inventory layer, with a pixel size and worker count
+    chosen by the tiler plan (extent, stand areas, memory, cores)
   - Classifier layers from inventory.gpkg attributes
   - Age layer from initial_age attribute
   - Disturbance layers (one per year, 2026-2075)
   - Mean annual temperature raster placeholder
 
-Output: output/gcbm_input/tiler.py
+Outputs:
+  - output/gcbm_input/tiler.py
+  - output/gcbm_input/tiler_plan.json
 """
 
 import json
+import math
+import os
+import sqlite3
 from pathlib import Path
 
-import geopandas as gpd
+import numpy as np
 
 from config import (
     OUTPUT_DIR,
     CLASSIFIER_NAMES,
     SIM_START_YEAR,
     SIM_END_YEAR,
+    TILER_PIXEL_SIZES,
+    TILER_MAX_AREA_ERROR,
+    TILER_SMALL_STAND_QUANTILE,
+    TILER_TILE_EXTENT,
+    TILER_BLOCK_EXTENT,
+    TILER_MEMORY_FRACTION,
 )
+from instrumentation import instrument
 
+# Metres per degree of latitude (and of longitude at the equator)
+_M_PER_DEG = 111_320.0
 
-def generate_tiler_script(inventory_path=None):
+# Bytes per pixel held by a worker while rasterizing one layer
+# (int32 value grid + GDAL working copy)
+_BYTES_PER_PIXEL = 8
+
+
+# =============================================================================
+# GEOPACKAGE METADATA
+# =============================================================================
+
+def _gpkg_feature_table(conn):
+    """Return (table_name, geometry_column) of the first feature table in a GeoPackage."""
+    row = conn.execute(
+        "SELECT c.table_name, g.column_name FROM gpkg_contents c "
+        "JOIN gpkg_geometry_columns g ON g.table_name = c.table_name "
+        "WHERE c.data_type = 'features' ORDER BY c.table_name LIMIT 1"
+    ).fetchone()
+    if row is None:
+        raise ValueError("GeoPackage has no feature table")
+    return row
+
+
+def read_gpkg_extent(path):
+    """
+    Read a GeoPackage layer extent without loading any geometry.
+
+    Uses the extent recorded in gpkg_contents; if the writer left it empty,
+    falls back to the min/max of the layer's R-tree spatial index.
+
+    Returns:
+        (minx, miny, maxx, maxy)
+    """
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        table, geom_col = _gpkg_feature_table(conn)
+        bounds = conn.execute(
+            "SELECT min_x, min_y, max_x, max_y FROM gpkg_contents WHERE table_name = ?",
+            (table,),
+        ).fetchone()
+        if bounds is None or any(b is None for b in bounds):
+            bounds = conn.execute(
+                f'SELECT MIN(minx), MIN(miny), MAX(maxx), MAX(maxy) '
+                f'FROM "rtree_{table}_{geom_col}"'
+            ).fetchone()
+        if bounds is None or any(b is None for b in bounds):
+            raise ValueError(f"No extent metadata or spatial index in {path}")
+        return tuple(float(b) for b in bounds)
+    finally:
+        conn.close()
+
+
+def read_gpkg_column(path, column):
+    """Return one attribute column of a GeoPackage layer as a float array (no geometry read)."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        table, _ = _gpkg_feature_table(conn)
+        rows = conn.execute(f'SELECT "{column}" FROM "{table}"').fetchall()
+        return np.array([r[0] for r in rows if r[0] is not None], dtype=float)
+    finally:
+        conn.close()
+
+
+def read_gpkg_distinct(path, column):
+    """Return sorted distinct values of an attribute column via SQL (no geometry read)."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        table, _ = _gpkg_feature_table(conn)
+        rows = conn.execute(
+            f'SELECT DISTINCT "{column}" FROM "{table}" WHERE "{column}" IS NOT NULL'
+        ).fetchall()
+        return sorted(r[0] for r in rows)
+    finally:
+        conn.close()
+
+
+# =============================================================================
+# TILER PLANNING
+# =============================================================================
+
+def _available_memory():
+    """Physical memory in bytes, or None if the platform does not report it."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _n_cells(lo, hi, extent):
+    """Number of grid cells of size `extent` (aligned to 0) touched by [lo, hi]."""
+    return int(math.floor(hi / extent) - math.floor(lo / extent)) + 1
+
+
+def _area_error(area_ha, pixel_m):
+    """
+    Estimated relative area error when rasterizing a stand of `area_ha`.
+
+    Treats the stand as a square of side s. Each of the ~4s/pixel boundary
+    pixels adds an independent error uniform in +/- half a pixel area, so the
+    relative standard error is sqrt(1/3) * (pixel / s) ** 1.5.
+    """
+    side_m = math.sqrt(area_ha * 10_000.0)
+    return math.sqrt(1.0 / 3.0) * (pixel_m / side_m) ** 1.5
+
+
+def plan_tiler(bounds, stand_areas_ha, n_layers, memory_bytes=None, cores=None,
+               fixed_pixel_size=None):
+    """
+    Choose tiler settings for an inventory extent and stand-size distribution.
+
+    Parameters:
+        bounds: (minx, miny, maxx, maxy) in degrees (EPSG:4326)
+        stand_areas_ha: array of stand areas in hectares
+        n_layers: number of layers the tiler will rasterize
+        memory_bytes: physical memory available (default: detected)
+        cores: CPU cores available (default: os.cpu_count())
+        fixed_pixel_size: Plan for this pixel size (e.g. the grid of rasters
+                          from 09_rasterize) instead of choosing one
+
+    Returns:
+        dict with the chosen pixel_size / workers / use_multiprocessing and
+        the raster, tile, block and memory estimates behind them. When one
+        worker would exceed the memory budget at the pixel size the area
+        error asks for (accuracy_pixel_size), the next coarser candidates
+        are tried and memory_limited is set.
+    """
+    minx, miny, maxx, maxy = bounds
+    memory_bytes = memory_bytes if memory_bytes is not None else _available_memory()
+    cores = cores if cores is not None else (os.cpu_count() or 1)
+
+    # Pixel size: coarsest candidate that keeps small-stand error under threshold
+    mid_lat = math.radians((miny + maxy) / 2.0)
+    m_per_deg = _M_PER_DEG * math.sqrt(max(math.cos(mid_lat), 1e-6))  # geometric mean of x/y
+    areas = np.asarray(stand_areas_ha, dtype=float)
+    areas = areas[areas > 0]
+    small_area = float(np.quantile(areas, TILER_SMALL_STAND_QUANTILE)) if len(areas) else 0.0
+
+    # No stand areas: coarsest. No candidate meets the error threshold:
+    # finest, which comes closest (the memory budget may still coarsen it)
+    pixel_size = TILER_PIXEL_SIZES[0]
+    if small_area > 0:
+        pixel_size = TILER_PIXEL_SIZES[-1]
+        for candidate in TILER_PIXEL_SIZES:
+            if _area_error(small_area, candidate * m_per_deg) <= TILER_MAX_AREA_ERROR:
+                pixel_size = candidate
+                break
+        else:
+            print(f"  [WARN] Small-stand area error {TILER_MAX_AREA_ERROR} cannot be met by any "
+                  f"pixel size; using the finest ({pixel_size} deg)")
+
+    def worker_bytes_at(size):
+        # Each worker rasterizes one layer over the full extent at a time
+        cols = int(math.ceil((maxx - minx) / size))
+        rows = int(math.ceil((maxy - miny) / size))
+        block_pixels = int(round(TILER_BLOCK_EXTENT / size)) ** 2
+        return (rows * cols + block_pixels) * _BYTES_PER_PIXEL
+
+    # Over the memory budget: trade area accuracy for a coarser pixel
+    accuracy_pixel_size = pixel_size
+    budget = int(memory_bytes * TILER_MEMORY_FRACTION) if memory_bytes else None
+    if fixed_pixel_size is not None:
+        pixel_size = fixed_pixel_size
+    elif budget is not None:
+        i = TILER_PIXEL_SIZES.index(pixel_size)
+        while i > 0 and worker_bytes_at(TILER_PIXEL_SIZES[i]) > budget:
+            i -= 1
+        pixel_size = TILER_PIXEL_SIZES[i]
+    memory_limited = fixed_pixel_size is None and pixel_size != accuracy_pixel_size
+    area_error = _area_error(small_area, pixel_size * m_per_deg) if small_area > 0 else None
+
+    # Raster dimensions and tile/block counts
+    cols = int(math.ceil((maxx - minx) / pixel_size))
+    rows = int(math.ceil((maxy - miny) / pixel_size))
+    n_tiles = _n_cells(minx, maxx, TILER_TILE_EXTENT) * _n_cells(miny, maxy, TILER_TILE_EXTENT)
+    n_blocks = _n_cells(minx, maxx, TILER_BLOCK_EXTENT) * _n_cells(miny, maxy, TILER_BLOCK_EXTENT)
+    block_pixels = int(round(TILER_BLOCK_EXTENT / pixel_size)) ** 2
+
+    worker_bytes = worker_bytes_at(pixel_size)
+    workers = max(1, min(cores, n_layers))
+    if budget is not None:
+        workers = max(1, min(workers, budget // max(worker_bytes, 1)))
+        if memory_limited:
+            print(f"  [WARN] Pixel size coarsened from {accuracy_pixel_size} to {pixel_size} deg "
+                  f"to fit the {budget / 2**30:.1f} GB worker budget")
+        if worker_bytes > budget:
+            print(f"  [WARN] One tiler worker needs ~{worker_bytes / 2**30:.1f} GB, "
+                  f"over the {budget / 2**30:.1f} GB budget even at the coarsest pixel size")
+
+    return {
+        "bounds": [float(b) for b in bounds],
+        "pixel_size": pixel_size,
+        "pixel_size_m": round(pixel_size * m_per_deg, 2),
+        "accuracy_pixel_size": accuracy_pixel_size,
+        "memory_limited": memory_limited,
+        "small_stand_area_ha": round(small_area, 4),
+        "small_stand_area_error": round(area_error, 4) if area_error is not None else None,
+        "n_stands": int(len(areas)),
+        "raster_cols": cols,
+        "raster_rows": rows,
+        "n_layers": int(n_layers),
+        "n_tiles": n_tiles,
+        "n_blocks": n_blocks,
+        "block_pixels": block_pixels,
+        "memory_per_worker_mb": round(worker_bytes / 2**20, 1),
+        "memory_available_mb": round(memory_bytes / 2**20, 1) if memory_bytes else None,
+        "cores": cores,
+        "workers": int(workers),
+        "use_multiprocessing": workers > 1,
+    }
+
+
+def write_tiler_plan(plan, output_dir=OUTPUT_DIR):
+    """Write tiler_plan.json next to the generated tiler script."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    out_path = output_dir / "tiler_plan.json"
+    with open(out_path, "w") as f:
+        json.dump(plan, f, indent=2)
+    return out_path
+
+
+# =============================================================================
+# TILER SCRIPT
+# =============================================================================
+
+@instrument
+def generate_tiler_script(inventory_path=None, events=None, raster_manifest=None,
+                          output_dir=OUTPUT_DIR):
     """
     Generate a mojadata tiler script based on the processed inventory and
     disturbance layers.
 
+    Only GeoPackage metadata is read (layer extent, distinct years), so the
+    cost does not depend on polygon count.
+
     Parameters:
-        inventory_path: Path to inventory.gpkg (default: OUTPUT_DIR/inventory.gpkg)
+        inventory_path: Path to inventory.gpkg (default: output_dir/inventory.gpkg)
+        events: Optional in-memory disturbance events DataFrame (from 05_disturbances);
+                when given, disturbance years are taken from it instead of disturbances.gpkg
+        raster_manifest: Optional manifest from 09_rasterize; when given, the script
+                reads the pre-built rasters instead of the vector layers
+        output_dir: Directory for tiler.py and tiler_plan.json
     """
     print("=" * 60)
     print("08_tiler_config: Generating mojadata tiler configuration")
     print("=" * 60)
 
     if inventory_path is None:
-        inventory_path = OUTPUT_DIR / "inventory.gpkg"
-
-    # Read inventory to get bounding box
-    inv = gpd.read_file(inventory_path)
-    bounds = inv.total_bounds  # (minx, miny, maxx, maxy)
-
-    # Disturbance layer is now a single GeoPackage with a year column
-    dist_path = OUTPUT_DIR / "disturbances.gpkg"
-    dist_gdf = gpd.read_file(dist_path)
-    dist_years = sorted(dist_gdf["year"].unique())
+        inventory_path = Path(output_dir) / "inventory.gpkg"
+
+    # Bounding box from GeoPackage metadata (minx, miny, maxx, maxy)
+    bounds = read_gpkg_extent(inventory_path)
+
+    # Disturbance layer is a single GeoPackage with a year column
+    if events is not None:
+        dist_years = sorted(int(y) for y in events["year"].dropna().unique())
+    else:
+        dist_path = Path(output_dir) / "disturbances.gpkg"
+        dist_years = [int(y) for y in read_gpkg_distinct(dist_path, "year")]
+
+    # Plan pixel size / workers from extent, stand areas and machine resources
+    # (classifiers + age + 2 historical disturbance + MAT + one per year)
+    n_layers = len(CLASSIFIER_NAMES) + 4 + len(dist_years)
+    # Rasters are already on a grid; the tiler must use the same pixel size
+    grid = raster_manifest["grid"] if raster_manifest is not None else None
+    plan = plan_tiler(bounds, read_gpkg_column(inventory_path, "area_ha"), n_layers,
+                      fixed_pixel_size=grid["pixel_size"] if grid is not None else None)
+    if grid is not None and (plan["raster_rows"], plan["raster_cols"]) != (grid["rows"], grid["cols"]):
+        raise ValueError(
+            f"Raster grid ({grid['cols']} x {grid['rows']} px) does not match the extent of "
+            f"{inventory_path} ({plan['raster_cols']} x {plan['raster_rows']} px); "
+            f"rerun 09_rasterize for this inventory"
+        )
+    plan_path = write_tiler_plan(plan, output_dir)
 
     # Generate the tiler script
-    script = _build_tiler_script(bounds, dist_years)
+    script = _build_tiler_script(bounds, dist_years, plan, raster_manifest)
 
-    out_path = OUTPUT_DIR / "tiler.py"
+    out_path = Path(output_dir) / "tiler.py"
     with open(out_path, "w") as f:
         f.write(script)
 
     print(f"\n  Inventory bounding box: {bounds}")
     print(f"  Disturbance years: {len(dist_years)}")
+    print(f"  Pixel size: {plan['pixel_size']} deg (~{plan['pixel_size_m']} m), "
+          f"small-stand area error {plan['small_stand_area_error']}")
+    print(f"  Raster: {plan['raster_cols']} x {plan['raster_rows']} px, "
+          f"{plan['n_tiles']} tiles, {plan['n_blocks']} blocks")
+    print(f"  Workers: {plan['workers']} (~{plan['memory_per_worker_mb']} MB each)")
+    print(f"  Wrote {plan_path}")
     print(f"  Wrote {out_path}")
     return out_path
 
 
-def _build_tiler_script(bounds, dist_years):
+def _raster_layer_expr(entry):
+    """Python expression building a RasterLayer for one 09_rasterize manifest entry."""
+    args = f'str(RASTER_DIR / "{entry["path"]}"), nodata_value={entry["nodata"]}'
+    if entry["attribute_table"] is not None:
+        attr = entry["name"] if entry["kind"] != "disturbance" else "disturbance_type"
+        args += (f', attributes=["{attr}"], '
+                 f'attribute_table=_attribute_table("{entry["attribute_table"]}")')
+    return f"RasterLayer({args})"
+
+
+def _build_tiler_script(bounds, dist_years, plan, raster_manifest=None):
     """Build the tiler.py script content."""
     minx, miny, maxx, maxy = bounds
 
-    dist_layer_lines = []
-    for year in dist_years:
-        dist_layer_lines.append(
-            f'        DisturbanceLayer(\n'
-            f'            VectorLayer("disturbance_type", DIST_PATH, "disturbance_type",\n'
-            f'                        raw_filter="year = {year}"),\n'
-            f'            year={year},\n'
-            f'        ),'
-        )
-
-    dist_layers_str = "\n".join(dist_layer_lines)
+    if raster_manifest is not None:
+        by_kind = {}
+        for entry in raster_manifest["layers"]:
+            by_kind.setdefault(entry["kind"], []).append(entry)
 
-    classifier_lines = []
-    for clf in CLASSIFIER_NAMES:
-        classifier_lines.append(
-            f'        ClassifierLayer("{clf}", INV_PATH, "{clf}"),'
+        dist_layers_str = "\n".join(
+            f'        DisturbanceLayer({_raster_layer_expr(e)}, year={e["year"]}),'
+            for e in by_kind.get("disturbance", [])
+        )
+        classifiers_str = "\n".join(
+            f'        ClassifierLayer("{e["name"]}", {_raster_layer_expr(e)}),'
+            for e in by_kind["classifier"]
         )
-    classifiers_str = "\n".join(classifier_lines)
+        age_str = _raster_layer_expr(by_kind["age"][0])
+        hist_str = _raster_layer_expr(by_kind["historical"][0])
+        last_str = _raster_layer_expr(by_kind["last_pass"][0])
+        raster_paths_str = (
+            '\n# Pre-built rasters from 09_rasterize.py\n'
+            'RASTER_DIR = BASE_DIR / "rasters"\n'
+            '\n\n'
+            'def _attribute_table(name):\n'
+            '    """Read a 09_rasterize attribute table as {pixel value: [attribute value]}."""\n'
+            '    with open(RASTER_DIR / name, newline="") as f:\n'
+            '        return {int(row[0]): [row[1]] for row in list(csv.reader(f))[1:]}\n'
+        )
+        csv_import = "import csv\n"
+    else:
+        dist_layer_lines = []
+        for year in dist_years:
+            dist_layer_lines.append(
+                f'        DisturbanceLayer(\n'
+                f'            VectorLayer("disturbance_type", DIST_PATH, "disturbance_type",\n'
+                f'                        raw_filter="year = {year}"),\n'
+                f'            year={year},\n'
+                f'        ),'
+            )
+
+        dist_layers_str = "\n".join(dist_layer_lines)
+
+        classifier_lines = []
+        for clf in CLASSIFIER_NAMES:
+            classifier_lines.append(
+                f'        ClassifierLayer("{clf}", INV_PATH, "{clf}"),'
+            )
+        classifiers_str = "\n".join(classifier_lines)
+        age_str = 'VectorLayer("initial_age", INV_PATH, "initial_age")'
+        hist_str = ('VectorLayer("historical_disturbance_type", INV_PATH, '
+                    '"historical_disturbance_type")')
+        last_str = ('VectorLayer("last_pass_disturbance_type", INV_PATH, '
+                    '"last_pass_disturbance_type")')
+        raster_paths_str = ""
+        csv_import = ""
 
     script = f'''"""
 Mojadata tiler configuration for IWC Boothill GCBM simulation.
@@ -94,7 +408,7 @@ Usage:
     python tiler.py
 """
 
-from pathlib import Path
+{csv_import}from pathlib import Path
 
 from mojadata.boundingbox import BoundingBox
 from mojadata.layer.vectorlayer import VectorLayer
@@ -119,6 +433,22 @@ DIST_PATH = BASE_DIR / "disturbances.gpkg"
 # Mean annual temperature raster (user must provide)
 # Download from WorldClim or PRISM and place here:
 MAT_RASTER = BASE_DIR / "mean_annual_temp.tif"
+{raster_paths_str}
+
+# =============================================================================
+# TILER PLAN (from 08_tiler_config; see tiler_plan.json)
+# =============================================================================
+#   Stands: {plan['n_stands']}, 5th-percentile area {plan['small_stand_area_ha']} ha
+#   Small-stand area error at chosen pixel size: {plan['small_stand_area_error']}
+#   Memory-limited (pixel coarsened from {plan['accuracy_pixel_size']}): {plan['memory_limited']}
+#   Raster: {plan['raster_cols']} cols x {plan['raster_rows']} rows, {plan['n_layers']} layers
+#   Tiles: {plan['n_tiles']}, blocks: {plan['n_blocks']} ({plan['block_pixels']} px each)
+#   Memory per worker: ~{plan['memory_per_worker_mb']} MB (available: {plan['memory_available_mb']} MB)
+#   Cores: {plan['cores']}, workers: {plan['workers']}
+
+PIXEL_SIZE = {plan['pixel_size']}  # ~{plan['pixel_size_m']} m at this latitude
+USE_MULTIPROCESSING = {plan['use_multiprocessing']}
+WORKERS = {plan['workers']}  # capped so every worker fits the memory budget
 
 
 # =============================================================================
@@ -127,7 +457,7 @@ MAT_RASTER = BASE_DIR / "mean_annual_temp.tif"
 
 BBOX = BoundingBox(
     VectorLayer("bbox", INV_PATH),
-    pixel_size=0.001,  # ~100m at this latitude
+    pixel_size=PIXEL_SIZE,
 )
 
 
@@ -136,7 +466,7 @@ BBOX = BoundingBox(
 # =============================================================================
 
 def main():
-    tiler = Tiler2D(BBOX, use_multiprocessing=True)
+    tiler = Tiler2D(BBOX, use_multiprocessing=USE_MULTIPROCESSING, workers=WORKERS)
 
     # Classifiers
     classifiers = [
@@ -144,11 +474,11 @@ def main():
     ]
 
     # Age
-    age_layer = VectorLayer("initial_age", INV_PATH, "initial_age")
+    age_layer = {age_str}
 
     # Historical / last-pass disturbance type
-    hist_dist = VectorLayer("historical_disturbance_type", INV_PATH, "historical_disturbance_type")
-    last_dist = VectorLayer("last_pass_disturbance_type", INV_PATH, "last_pass_disturbance_type")
+    hist_dist = {hist_str}
+    last_dist = {last_str}
 
     # Mean annual temperature
     mat_layer = RasterLayer(MAT_RASTER)
@@ -177,9 +507,9 @@ if __name__ == "__main__":
     return script
 
 
-def run(inventory_path=None):
+def run(inventory_path=None, events=None, output_dir=OUTPUT_DIR):
     """Main entry point."""
-    return generate_tiler_script(inventory_path)
+    return generate_tiler_script(inventory_path, events=events, output_dir=output_dir)
 
 
 if __name__ == "__main__":
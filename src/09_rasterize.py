@@ -0,0 +1,458 @@
+"""
+09_rasterize.py — Inventory & Disturbance Rasters
+===================================================
+Rasterizes the starting inventory once with NumPy and derives every tiler
+layer from it, so mojadata consumes ready-made rasters instead of
+re-rasterizing the stand polygons for each layer:
+
+  - Stand polygons are burned once into a stand-index grid (int32, -1 = no
+    stand), cached as a memory-mapped .npy keyed by the inventory file and grid
+  - Classifier, age and historical/last-pass disturbance rasters are array
+    lookups into the inventory attribute table
+  - Yearly disturbance rasters are lookups into a per-year stand event table
+
+The grid (extent, pixel size) comes from tiler_plan.json written by
+08_tiler_config, when it was planned for the inventory being rasterized. Rasters are raw single-band files with ENVI headers (read
+natively by GDAL) and are written block by block; categorical layers get an
+attribute table CSV (pixel value -> attribute value).
+
+After rasterizing, tiler.py is regenerated to read these rasters.
+
+Outputs (output/gcbm_input/rasters/):
+  - stand_index.npy + stand_index.json (cache key)
+  - <layer>.bin / <layer>.hdr, <layer>_attributes.csv
+  - manifest.json
+"""
+
+import json
+import os
+from importlib import import_module
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from config import (
+    OUTPUT_DIR,
+    CLASSIFIER_NAMES,
+)
+
+RASTER_DIR_NAME = "rasters"
+
+# Rows processed per block are sized so one int64 working block stays near this
+_BLOCK_BYTES = 64 * 2**20
+
+# ENVI data type codes
+_ENVI_DTYPES = {
+    np.dtype("uint8"): 1,
+    np.dtype("int16"): 2,
+    np.dtype("int32"): 3,
+    np.dtype("uint16"): 12,
+}
+
+
+# =============================================================================
+# GRID
+# =============================================================================
+
+def load_grid(inventory_path):
+    """
+    Return the raster grid (minx, maxy, pixel_size, rows, cols) from the tiler plan.
+
+    Uses tiler_plan.json when it was planned for the extent of inventory_path;
+    otherwise (no plan, or a plan for another inventory) plans the grid
+    from inventory_path through 08_tiler_config.
+    """
+    tiler = import_module("08_tiler_config")
+    bounds = tiler.read_gpkg_extent(inventory_path)
+    plan_path = OUTPUT_DIR / "tiler_plan.json"
+    plan = None
+    if plan_path.exists():
+        with open(plan_path) as f:
+            plan = json.load(f)
+        if not np.allclose(plan["bounds"], bounds, rtol=0, atol=1e-9):
+            print(f"  NOTE: {plan_path} was planned for another extent; planning for {inventory_path}")
+            plan = None
+    if plan is None:
+        areas = tiler.read_gpkg_column(inventory_path, "area_ha")
+        plan = tiler.plan_tiler(bounds, areas, n_layers=len(CLASSIFIER_NAMES) + 4)
+
+    minx, miny, maxx, maxy = plan["bounds"]
+    return {
+        "minx": minx,
+        "maxy": maxy,
+        "pixel_size": plan["pixel_size"],
+        "rows": plan["raster_rows"],
+        "cols": plan["raster_cols"],
+    }
+
+
+def _block_rows(grid):
+    """Number of raster rows per processing block."""
+    return max(1, _BLOCK_BYTES // (8 * (grid["cols"] + 1)))
+
+
+# =============================================================================
+# POLYGON BURN
+# =============================================================================
+
+def _polygon_edges(geoms):
+    """
+    Return (poly_idx, x0, y0, x1, y1) for every ring edge of a geometry array.
+    Holes are included; the even-odd fill rule treats them correctly.
+    """
+    parts, part_poly = shapely.get_parts(geoms, return_index=True)
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    coords, coord_ring = shapely.get_coordinates(rings, return_index=True)
+
+    same_ring = coord_ring[:-1] == coord_ring[1:]
+    start = np.nonzero(same_ring)[0]
+    poly_idx = part_poly[ring_part[coord_ring[start]]]
+    return (
+        poly_idx,
+        coords[start, 0], coords[start, 1],
+        coords[start + 1, 0], coords[start + 1, 1],
+    )
+
+
+def _polygon_spans(geoms, grid):
+    """
+    Compute horizontal pixel spans covered by each polygon.
+
+    Pixel centres are tested against the polygon with an even-odd scanline
+    rule: every edge crossing of a row's centre line is found at once, the
+    crossings are sorted by (polygon, row, x) and consecutive pairs become
+    [c0, c1) column spans.
+
+    Returns:
+        (poly_idx, row, c0, c1) arrays, sorted by row
+    """
+    minx, maxy, p = grid["minx"], grid["maxy"], grid["pixel_size"]
+    rows, cols = grid["rows"], grid["cols"]
+
+    poly, x0, y0, x1, y1 = _polygon_edges(geoms)
+    keep = y0 != y1  # horizontal edges never cross a centre line
+    poly, x0, y0, x1, y1 = poly[keep], x0[keep], y0[keep], x1[keep], y1[keep]
+
+    # Rows whose centre y lies in [ylo, yhi) for each edge
+    ylo = np.minimum(y0, y1)
+    yhi = np.maximum(y0, y1)
+    r_start = np.floor((maxy - yhi) / p - 0.5).astype(np.int64) + 1
+    r_end = np.floor((maxy - ylo) / p - 0.5).astype(np.int64)
+    r_start = np.clip(r_start, 0, rows)
+    r_end = np.clip(r_end, -1, rows - 1)
+    counts = np.maximum(r_end - r_start + 1, 0)
+
+    # One entry per (edge, row) crossing
+    edge = np.repeat(np.arange(len(counts)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    row = r_start[edge] + offset
+    yc = maxy - (row + 0.5) * p
+    xc = x0[edge] + (yc - y0[edge]) * (x1[edge] - x0[edge]) / (y1[edge] - y0[edge])
+    cpoly = poly[edge]
+
+    order = np.lexsort((xc, row, cpoly))
+    cpoly, row, xc = cpoly[order], row[order], xc[order]
+
+    # Each (polygon, row) group has an even number of crossings
+    xa, xb = xc[0::2], xc[1::2]
+    span_poly, span_row = cpoly[0::2], row[0::2]
+    c0 = np.clip(np.ceil((xa - minx) / p - 0.5).astype(np.int64), 0, cols)
+    c1 = np.clip(np.ceil((xb - minx) / p - 0.5).astype(np.int64), 0, cols)
+
+    nonempty = c1 > c0
+    span_poly, span_row, c0, c1 = span_poly[nonempty], span_row[nonempty], c0[nonempty], c1[nonempty]
+    by_row = np.argsort(span_row, kind="stable")
+    return span_poly[by_row], span_row[by_row], c0[by_row], c1[by_row]
+
+
+def burn_stand_index(geoms, grid, out_path):
+    """
+    Burn polygons into a memory-mapped int32 grid of polygon indices (-1 = none).
+
+    Spans are written row block by row block with a difference array, so
+    memory use is bounded by the block size rather than the raster size.
+    Where polygons overlap, the later polygon wins.
+    """
+    rows, cols = grid["rows"], grid["cols"]
+    span_poly, span_row, c0, c1 = _polygon_spans(geoms, grid)
+
+    grid_arr = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.int32, shape=(rows, cols))
+    n_overlap = 0
+    step = _block_rows(grid)
+    for r0 in range(0, rows, step):
+        r1 = min(rows, r0 + step)
+        lo, hi = np.searchsorted(span_row, [r0, r1])
+        rr = span_row[lo:hi] - r0
+        value = span_poly[lo:hi].astype(np.int64) + 1
+
+        diff = np.zeros((r1 - r0, cols + 1), dtype=np.int64)
+        hits = np.zeros((r1 - r0, cols + 1), dtype=np.int32)
+        np.add.at(diff, (rr, c0[lo:hi]), value)
+        np.add.at(diff, (rr, c1[lo:hi]), -value)
+        np.add.at(hits, (rr, c0[lo:hi]), 1)
+        np.add.at(hits, (rr, c1[lo:hi]), -1)
+        block = np.cumsum(diff, axis=1)[:, :cols] - 1
+        overlap = np.cumsum(hits, axis=1)[:, :cols] > 1
+
+        if overlap.any():
+            # Replay only the spans on overlapping rows, in polygon order
+            for r in np.unique(np.nonzero(overlap)[0]):
+                sel = np.nonzero(rr == r)[0]
+                for k in sel[np.argsort(span_poly[lo:hi][sel], kind="stable")]:
+                    block[r, c0[lo + k]:c1[lo + k]] = span_poly[lo + k]
+            n_overlap += int(overlap.sum())
+
+        grid_arr[r0:r1] = block.astype(np.int32)
+
+    grid_arr.flush()
+    if n_overlap:
+        print(f"  [WARN] {n_overlap} pixels covered by more than one polygon")
+    return grid_arr
+
+
+def stand_index_grid(inventory, grid, inventory_path, raster_dir):
+    """
+    Return the stand-index grid, reusing the memory-mapped cache when the
+    inventory file and grid are unchanged.
+    """
+    npy_path = raster_dir / "stand_index.npy"
+    key_path = raster_dir / "stand_index.json"
+    stat = os.stat(inventory_path)
+    key = {
+        "inventory": str(inventory_path),
+        "inventory_mtime_ns": stat.st_mtime_ns,
+        "inventory_size": stat.st_size,
+        "n_polygons": len(inventory),
+        **grid,
+    }
+
+    if npy_path.exists() and key_path.exists():
+        with open(key_path) as f:
+            if json.load(f) == key:
+                print(f"  Stand index: cached ({npy_path})")
+                return np.load(npy_path, mmap_mode="r")
+
+    arr = burn_stand_index(inventory.geometry.values, grid, npy_path)
+    with open(key_path, "w") as f:
+        json.dump(key, f, indent=2)
+    n_burned = int(np.count_nonzero(np.asarray(arr) >= 0))
+    print(f"  Stand index: burned {len(inventory)} polygons -> {n_burned} pixels")
+    return np.load(npy_path, mmap_mode="r")
+
+
+# =============================================================================
+# ATTRIBUTE & DISTURBANCE LAYERS
+# =============================================================================
+
+def _code_dtype(n_codes):
+    """Smallest unsigned dtype that holds codes 0..n_codes (0 = nodata)."""
+    if n_codes < 2**8:
+        return np.dtype("uint8")
+    if n_codes < 2**16:
+        return np.dtype("uint16")
+    return np.dtype("int32")
+
+
+def _categorical_layer(name, values, kind, year=None):
+    """
+    Build a categorical layer: per-polygon codes (1..n, 0 = nodata) plus the
+    code -> value attribute table.
+    """
+    codes, uniques = pd.factorize(pd.Series(values), sort=True)
+    lut_dtype = _code_dtype(len(uniques))
+    lut = np.zeros(len(codes) + 1, dtype=lut_dtype)  # last entry = stand index -1
+    lut[:-1] = np.where(codes >= 0, codes + 1, 0)
+    table = pd.DataFrame({"value": np.arange(1, len(uniques) + 1), name: uniques})
+    return {"name": name, "kind": kind, "year": year, "lut": lut, "nodata": 0, "table": table}
+
+
+def build_layer_tables(inventory, events):
+    """
+    Build per-polygon lookup tables for every raster layer.
+
+    Parameters:
+        inventory: GeoDataFrame from 04_inventory (one row per polygon)
+        events: DataFrame of disturbance events from 05_disturbances
+
+    Returns:
+        list of layer dicts (name, kind, year, lut, nodata, table)
+    """
+    layers = []
+    for clf in CLASSIFIER_NAMES:
+        layers.append(_categorical_layer(clf, inventory[clf].values, "classifier"))
+
+    age = pd.to_numeric(inventory["initial_age"], errors="coerce").fillna(-1).astype(np.int16).values
+    age_lut = np.append(age, np.int16(-1))
+    layers.append({"name": "initial_age", "kind": "age", "year": None,
+                   "lut": age_lut, "nodata": -1, "table": None})
+
+    layers.append(_categorical_layer(
+        "historical_disturbance_type", inventory["historical_disturbance_type"].values, "historical"))
+    layers.append(_categorical_layer(
+        "last_pass_disturbance_type", inventory["last_pass_disturbance_type"].values, "last_pass"))
+
+    # Yearly disturbances: one code table shared by all years
+    if events is None or len(events) == 0:
+        return layers
+
+    dist_codes, dist_types = pd.factorize(events["disturbance_type"], sort=True)
+    dist_dtype = _code_dtype(len(dist_types))
+    table = pd.DataFrame({"value": np.arange(1, len(dist_types) + 1), "disturbance_type": dist_types})
+
+    # polygon -> stand_key position; events for stands outside the inventory are dropped
+    stand_keys, poly_stand = np.unique(inventory["stand_key"].values.astype(str), return_inverse=True)
+    evt_stand = pd.Index(stand_keys).get_indexer(events["stand_key"].astype(str))
+    evt = pd.DataFrame({
+        "year": events["year"].astype(int).values,
+        "stand": evt_stand,
+        "code": dist_codes + 1,
+    })
+    evt = evt[evt["stand"] >= 0]
+
+    # Same stand disturbed twice in a year: keep the last scheduled event
+    for year, grp in evt.groupby("year", sort=True):
+        grp = grp.drop_duplicates(subset=["stand"], keep="last")
+        stand_lut = np.zeros(len(stand_keys), dtype=dist_dtype)
+        stand_lut[grp["stand"].values] = grp["code"].values
+        lut = np.append(stand_lut[poly_stand], dist_dtype.type(0))
+        layers.append({"name": f"disturbance_{year}", "kind": "disturbance", "year": int(year),
+                       "lut": lut, "nodata": 0, "table": table})
+
+    return layers
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def _write_envi_header(path, grid, dtype, nodata):
+    """Write an ENVI .hdr so GDAL reads the raw band with georeferencing."""
+    header = (
+        "ENVI\n"
+        f"samples = {grid['cols']}\n"
+        f"lines = {grid['rows']}\n"
+        "bands = 1\n"
+        "header offset = 0\n"
+        "file type = ENVI Standard\n"
+        f"data type = {_ENVI_DTYPES[np.dtype(dtype)]}\n"
+        "interleave = bsq\n"
+        "byte order = 0\n"
+        f"map info = {{Geographic Lat/Lon, 1, 1, {grid['minx']!r}, {grid['maxy']!r}, "
+        f"{grid['pixel_size']!r}, {grid['pixel_size']!r}, WGS-84}}\n"
+        f"data ignore value = {nodata}\n"
+    )
+    with open(path, "w") as f:
+        f.write(header)
+
+
+def write_layers(stand_index, layers, grid, raster_dir):
+    """
+    Write every layer raster block by block from the stand-index grid.
+
+    Returns:
+        list of manifest entries (one per layer)
+    """
+    rows, cols = grid["rows"], grid["cols"]
+    outputs = []
+    entries = []
+    written_tables = set()
+    for layer in layers:
+        bin_path = raster_dir / f"{layer['name']}.bin"
+        dtype = layer["lut"].dtype
+        out = np.memmap(bin_path, mode="w+", dtype=dtype.newbyteorder("<"), shape=(rows, cols))
+        outputs.append(out)
+        _write_envi_header(raster_dir / f"{layer['name']}.hdr", grid, dtype, layer["nodata"])
+
+        table_path = None
+        if layer["table"] is not None:
+            # Yearly disturbance layers share one disturbance_type table
+            table_name = layer["table"].columns[1]
+            table_path = raster_dir / f"{table_name}_attributes.csv"
+            if table_path not in written_tables:
+                layer["table"].to_csv(table_path, index=False)
+                written_tables.add(table_path)
+
+        entries.append({
+            "name": layer["name"],
+            "kind": layer["kind"],
+            "year": layer["year"],
+            "path": bin_path.name,
+            "dtype": dtype.name,
+            "nodata": int(layer["nodata"]),
+            "attribute_table": table_path.name if table_path is not None else None,
+        })
+
+    # Block-outer loop: each stand-index block is read once for all layers
+    step = _block_rows(grid)
+    for r0 in range(0, rows, step):
+        r1 = min(rows, r0 + step)
+        block = np.asarray(stand_index[r0:r1])
+        for layer, out in zip(layers, outputs):
+            out[r0:r1] = layer["lut"][block]
+
+    for out in outputs:
+        out.flush()
+    return entries
+
+
+def rasterize(inventory=None, events=None, inventory_path=None):
+    """
+    Rasterize the inventory and disturbance events onto the tiler grid.
+
+    Parameters:
+        inventory: GeoDataFrame from 04_inventory (default: read inventory.gpkg)
+        events: DataFrame from 05_disturbances (default: read disturbance_events.csv)
+        inventory_path: Path to inventory.gpkg (default: OUTPUT_DIR/inventory.gpkg)
+
+    Returns:
+        manifest dict
+    """
+    print("=" * 60)
+    print("09_rasterize: Rasterizing inventory and disturbance layers")
+    print("=" * 60)
+
+    if inventory_path is None:
+        inventory_path = OUTPUT_DIR / "inventory.gpkg"
+    if inventory is None:
+        inventory = gpd.read_file(inventory_path)
+    if events is None:
+        events = pd.read_csv(OUTPUT_DIR / "disturbance_events.csv")
+    inventory = inventory.reset_index(drop=True)
+
+    raster_dir = OUTPUT_DIR / RASTER_DIR_NAME
+    raster_dir.mkdir(parents=True, exist_ok=True)
+
+    grid = load_grid(inventory_path)
+    print(f"\n  Grid: {grid['cols']} x {grid['rows']} px at {grid['pixel_size']} deg")
+
+    stand_index = stand_index_grid(inventory, grid, inventory_path, raster_dir)
+    layers = build_layer_tables(inventory, events)
+    entries = write_layers(stand_index, layers, grid, raster_dir)
+
+    manifest = {
+        "grid": grid,
+        "stand_index": "stand_index.npy",
+        "layers": entries,
+    }
+    manifest_path = raster_dir / "manifest.json"
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    n_dist = sum(1 for e in entries if e["kind"] == "disturbance")
+    print(f"  Wrote {len(entries)} rasters ({n_dist} yearly disturbance layers) to {raster_dir}")
+    print(f"  Wrote {manifest_path}")
+    return manifest
+
+
+def run(inventory=None, events=None, inventory_path=None):
+    """Main entry point. Rasterizes, then points tiler.py at the rasters."""
+    manifest = rasterize(inventory, events, inventory_path)
+    tiler = import_module("08_tiler_config")
+    tiler.generate_tiler_script(inventory_path, events=events, raster_manifest=manifest)
+    return manifest
+
+
+if __name__ == "__main__":
+    run()
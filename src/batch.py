@@ -0,0 +1,231 @@
+"""
+batch.py — Batch Runs over Many Projects
+=========================================
+Runs the pipeline for a list of project files (TOML/YAML, see
+config.ProjectConfig) in parallel worker processes. Every project runs in
+its own run_pipeline.py process with IWC_PROJECT_CONFIG set to its file, so
+it reads its own inputs and writes only to its own output and cache
+directories; these are checked to be distinct before anything starts.
+Each run's log goes to <output_dir>/pipeline.log.
+
+The aggregate report has one row per project and step with its status
+(ran/cached), wall and CPU time and peak RSS, taken from each run
+manifest, plus the status and wall time of each project. It is written to
+BATCH_DIR/batch_<timestamp>.csv (steps) and .json (projects + steps).
+
+Example project file (paths relative to root, which defaults to the
+file's directory; unset paths follow this repository's layout):
+
+    name = "boothill"
+    root = "/data/iwc/boothill"
+    schedule = "managment_schedule/IWC_2025_BTHILL_HSM_DRAFT7.xlsx"
+    output_dir = "output/draft7"
+
+    [constants]
+    SIM_START_YEAR = 2027
+
+Usage:
+    python batch.py projects/*.toml [--workers N] [run_pipeline options, e.g. --skip-aidb --jobs 2]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from config import BATCH_DIR, load_project
+from instrumentation import MANIFEST_NAME
+
+
+SRC_DIR = Path(__file__).resolve().parent
+
+STEP_COLUMNS = ["project", "step", "status", "wall_s", "cpu_s", "rss_peak_mb"]
+
+
+# =============================================================================
+# PROJECTS
+# =============================================================================
+
+def load_projects(paths):
+    """
+    Load project files and check that no two share a name, an output
+    directory or a step cache.
+
+    Returns:
+        list of ProjectConfig
+    """
+    projects = [load_project(p) for p in paths]
+    for attr in ("name", "output_dir", "cache_dir"):
+        values = pd.Series([str(getattr(p, attr)) for p in projects])
+        dupes = sorted(values[values.duplicated()].unique())
+        if dupes:
+            raise ValueError(f"Projects must have distinct {attr}; shared: {dupes}")
+    return projects
+
+
+def run_project(project, pipeline_args=()):
+    """
+    Run the pipeline for one project in its own process.
+
+    Returns:
+        dict with project, status (ok/failed), returncode, wall_s, log and
+        the run manifest (None if the run failed before writing it)
+    """
+    project.output_dir.mkdir(parents=True, exist_ok=True)
+    log_path = project.output_dir / "pipeline.log"
+    manifest_path = project.output_dir / MANIFEST_NAME
+    manifest_path.unlink(missing_ok=True)
+
+    env = {**os.environ, "IWC_PROJECT_CONFIG": str(project.source)}
+    cmd = [sys.executable, str(SRC_DIR / "run_pipeline.py"), *pipeline_args]
+    start = time.perf_counter()
+    with open(log_path, "w") as log:
+        proc = subprocess.run(cmd, cwd=SRC_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    wall = time.perf_counter() - start
+
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else None
+    return {
+        "project": project.name,
+        "status": "ok" if proc.returncode == 0 else "failed",
+        "returncode": proc.returncode,
+        "wall_s": round(wall, 3),
+        "log": str(log_path),
+        "manifest": manifest,
+    }
+
+
+def step_rows(run):
+    """Per-step rows of one project's run manifest (see STEP_COLUMNS)."""
+    manifest = run["manifest"]
+    if manifest is None:
+        return []
+    measured = {r["name"]: r for r in manifest["records"] if r["kind"] == "step"}
+    rows = []
+    for step in manifest["steps"]:
+        record = measured.get(step["step"], {})
+        rows.append({
+            "project": run["project"],
+            "step": step["step"],
+            "status": step["status"].split(" ")[0],
+            "wall_s": step["seconds"],
+            "cpu_s": record.get("cpu_s"),
+            "rss_peak_mb": record.get("rss_peak_mb"),
+        })
+    return rows
+
+
+# =============================================================================
+# BATCH
+# =============================================================================
+
+def run_batch(projects, workers=None, pipeline_args=()):
+    """
+    Run every project, up to `workers` at once.
+
+    Returns:
+        (runs, steps): DataFrame with one row per project (in input order)
+        and DataFrame with one row per project and step
+    """
+    n_workers = min(len(projects), workers or os.cpu_count() or 1)
+    print(f"  Projects: {len(projects)}, worker processes: {n_workers}\n")
+    runs = {}
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        futures = {pool.submit(run_project, p, pipeline_args): p for p in projects}
+        for future in as_completed(futures):
+            run = future.result()
+            runs[run["project"]] = run
+            print(f"  {run['project']:<24} {run['status']:<7} {run['wall_s']:>9.1f}s  "
+                  f"(log: {run['log']})")
+
+    ordered = [runs[p.name] for p in projects]
+    steps = pd.DataFrame([row for run in ordered for row in step_rows(run)], columns=STEP_COLUMNS)
+    runs = pd.DataFrame([{k: v for k, v in run.items() if k != "manifest"} for run in ordered])
+    return runs, steps
+
+
+def print_report(runs, steps, batch_wall):
+    """Print per-project totals and per-step time summed over projects."""
+    print("\n" + "=" * 60)
+    print("Batch report")
+    print("=" * 60)
+    ran = steps[steps["status"] == "ran"].groupby("project")["step"].count()
+    slowest = steps.sort_values("wall_s").groupby("project").tail(1).set_index("project")
+    for run in runs.itertuples(index=False):
+        detail = ""
+        if run.project in slowest.index:
+            s = slowest.loc[run.project]
+            detail = (f"{ran.get(run.project, 0)} steps ran, "
+                      f"slowest {s['step']} {s['wall_s']:.1f}s")
+        print(f"  {run.project:<24} {run.status:<7} {run.wall_s:>9.1f}s  {detail}")
+
+    if len(steps):
+        print("\n  Step time over all projects:")
+        per_step = steps.groupby("step", sort=False).agg(
+            total_s=("wall_s", "sum"), max_s=("wall_s", "max"),
+            max_rss_mb=("rss_peak_mb", "max"),
+        ).sort_values("total_s", ascending=False)
+        print(per_step.round(2).to_string())
+
+    total = runs["wall_s"].sum()
+    print(f"\n  {int((runs['status'] == 'ok').sum())}/{len(runs)} projects ok; "
+          f"{total:.1f}s of project time in {batch_wall:.1f}s "
+          f"({total / batch_wall if batch_wall else 0:.1f}x)")
+
+
+def write_report(runs, steps, batch_wall, out_dir=BATCH_DIR):
+    """Write the aggregate report; returns the CSV path."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = out_dir / f"batch_{datetime.now():%Y%m%d_%H%M%S}"
+    steps.to_csv(stem.with_suffix(".csv"), index=False)
+    stem.with_suffix(".json").write_text(json.dumps({
+        "batch_wall_s": round(batch_wall, 3),
+        "projects": runs.to_dict("records"),
+        "steps": steps.to_dict("records"),
+    }, indent=2, default=str))
+    return stem.with_suffix(".csv")
+
+
+def main(project_files, workers=None, pipeline_args=(), out_dir=BATCH_DIR):
+    """
+    Run the pipeline for every project file and report.
+
+    Returns:
+        (runs, steps) DataFrames (see run_batch)
+    """
+    print("=" * 60)
+    print("batch: Running the pipeline for several projects")
+    print("=" * 60)
+
+    projects = load_projects(project_files)
+    start = time.perf_counter()
+    runs, steps = run_batch(projects, workers=workers, pipeline_args=pipeline_args)
+    batch_wall = time.perf_counter() - start
+
+    print_report(runs, steps, batch_wall)
+    path = write_report(runs, steps, batch_wall, out_dir)
+    print(f"\n  Wrote batch report: {path} (+ .json)")
+    return runs, steps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the pipeline for several projects in parallel",
+        epilog="Other options are passed to run_pipeline.py for every project.",
+    )
+    parser.add_argument("projects", nargs="+", help="Project files (.toml/.yaml)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Projects run at once (default: CPU count)")
+    parser.add_argument("--out-dir", type=Path, default=BATCH_DIR, help="Report directory")
+    args, pipeline_args = parser.parse_known_args()
+
+    runs, _ = main(args.projects, workers=args.workers, pipeline_args=pipeline_args,
+                   out_dir=args.out_dir)
+    sys.exit(0 if (runs["status"] == "ok").all() else 1)
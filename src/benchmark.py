@@ -0,0 +1,426 @@
+"""
+benchmark.py — Scaling Benchmarks
+==================================
+Runs the full pipeline on synthetic datasets (synthetic_data.py) at several
+scales and records, from each run's manifest (instrumentation.py):
+  - every pipeline step and instrumented sub-function: wall/CPU time,
+    peak RSS and RSS increase, rows in/out
+  - the whole run: wall time of the pipeline process and its peak RSS
+
+Each run is a fresh `run_pipeline.py --skip-aidb --no-cache` process with
+IWC_PROJECT_ROOT pointing at the dataset, so every step is timed from cold.
+Datasets are generated once per (stands, seed) under SYNTHETIC_DIR and reused.
+
+The scaling table reports, per step, the exponent k in time ~ stands^k
+between consecutive scales; k near 2 marks a quadratic hot spot.
+
+Results go to BENCHMARK_DIR/<label>.json (all runs) and <label>.csv
+(median per scale and record). Two result files can be compared, or two
+commits benchmarked on the same datasets, each checked out in a temporary
+git worktree. Commits that predate IWC_PROJECT_ROOT get the dataset's
+source directories copied into the worktree's default layout, and are run
+with only the pipeline flags they support; without a run manifest only the
+whole run is timed. Records slower or larger than --threshold are
+reported as regressions and make the command exit with status 1.
+
+Usage:
+    python benchmark.py --scales 10000 100000 1000000 [--repeat 3] [--jobs 1] [--label NAME]
+    python benchmark.py --compare base.json head.json [--threshold 0.10]
+    python benchmark.py --commits main HEAD [--scales 10000 100000]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import PROJECT_ROOT, OUTPUT_DIR, SYNTHETIC_DIR, BENCHMARK_DIR
+from instrumentation import MANIFEST_NAME
+import synthetic_data
+
+
+SRC_DIR = Path(__file__).resolve().parent
+
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+
+# A record regresses when it is this much slower (or larger), relative...
+REGRESSION_THRESHOLD = 0.10
+# ...and by at least these absolute amounts (ignores noise on tiny steps)
+MIN_SECONDS = 0.1
+MIN_RSS_MB = 50.0
+
+# Source directories of a dataset, as laid out under PROJECT_ROOT
+DATASET_DIRS = ["spatial", "yields", "managment_schedule"]
+
+SUMMARY_COLUMNS = ["wall_s", "cpu_s", "rss_peak_mb", "rss_peak_delta_mb", "rows_in", "rows_out"]
+
+
+# =============================================================================
+# DATASETS
+# =============================================================================
+
+def dataset(n_stands, seed=0, data_dir=SYNTHETIC_DIR):
+    """Project root of the synthetic dataset for n_stands (generated if missing)."""
+    root = Path(data_dir) / f"{n_stands}_s{seed}"
+    manifest = synthetic_data.read_manifest(root)
+    if manifest is None or manifest["n_stands"] != n_stands or manifest["seed"] != seed:
+        synthetic_data.generate(root, n_stands=n_stands, seed=seed)
+    return root
+
+
+def stage_dataset(root, project_dir):
+    """
+    Copy a dataset's DATASET_DIRS over project_dir's own, for code that
+    reads its inputs from the default paths under PROJECT_ROOT.
+    """
+    for name in DATASET_DIRS:
+        target = Path(project_dir) / name
+        shutil.rmtree(target, ignore_errors=True)
+        shutil.copytree(Path(root) / name, target)
+    return Path(project_dir)
+
+
+# =============================================================================
+# RUNS
+# =============================================================================
+
+def run_once(root, src_dir=SRC_DIR, jobs=1, log_path=None):
+    """
+    Run the pipeline once on a dataset in a fresh process.
+
+    Returns:
+        (wall seconds of the process, run manifest dict)
+    """
+    manifest_path = Path(root) / OUTPUT_DIR.relative_to(PROJECT_ROOT) / MANIFEST_NAME
+    manifest_path.unlink(missing_ok=True)
+    env = {**os.environ, "IWC_PROJECT_ROOT": str(root)}
+    script = Path(src_dir) / "run_pipeline.py"
+    cmd = [sys.executable, str(script), "--skip-aidb"]
+    # Older commits lack the cache and --jobs; their runs are always cold and serial
+    options = script.read_text()
+    if '"--no-cache"' in options:
+        cmd.append("--no-cache")
+    if '"--jobs"' in options:
+        cmd += ["--jobs", str(jobs)]
+
+    log_path = Path(log_path or Path(root) / "benchmark.log")
+    start = time.perf_counter()
+    with open(log_path, "w") as log:
+        proc = subprocess.run(cmd, cwd=src_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"Pipeline failed on {root} (exit {proc.returncode}); see {log_path}")
+    if not manifest_path.exists():
+        # Commit without instrumentation: only the whole run is timed
+        return wall, {"records": []}
+    return wall, json.loads(manifest_path.read_text())
+
+
+def manifest_rows(manifest, wall_s):
+    """One row per manifest record plus a 'pipeline' row for the whole run."""
+    rows = [
+        {"kind": r["kind"], "name": r["name"], "parent": r.get("parent"),
+         **{c: r.get(c) for c in SUMMARY_COLUMNS}}
+        for r in manifest["records"]
+    ]
+    peaks = [r["rss_peak_mb"] for r in rows if r["rss_peak_mb"] is not None]
+    rows.append({
+        "kind": "pipeline", "name": "pipeline", "parent": None,
+        "wall_s": round(wall_s, 4),
+        "cpu_s": round(sum(r["cpu_s"] for r in rows if r["kind"] == "step"), 4),
+        "rss_peak_mb": max(peaks) if peaks else None,
+        "rss_peak_delta_mb": None, "rows_in": None, "rows_out": None,
+    })
+    return rows
+
+
+def run_benchmark(scales, seed=0, repeat=1, jobs=1, src_dir=SRC_DIR, data_dir=SYNTHETIC_DIR,
+                  project_dir=None):
+    """
+    Run the pipeline repeat times at every scale.
+
+    With project_dir (the checkout of code without IWC_PROJECT_ROOT
+    support), each dataset is copied into it (stage_dataset) and run there.
+
+    Returns:
+        DataFrame of records with scale and run columns
+    """
+    rows = []
+    for n_stands in scales:
+        root = dataset(n_stands, seed=seed, data_dir=data_dir)
+        if project_dir is not None:
+            root = stage_dataset(root, project_dir)
+        for run in range(repeat):
+            print(f"\n  {n_stands:,} stands, run {run + 1}/{repeat} ...", flush=True)
+            wall, manifest = run_once(root, src_dir=src_dir, jobs=jobs)
+            print(f"    {wall:.2f}s")
+            rows += [{"scale": n_stands, "run": run, **r} for r in manifest_rows(manifest, wall)]
+    return pd.DataFrame(rows)
+
+
+# =============================================================================
+# RESULTS
+# =============================================================================
+
+def summarize(records):
+    """
+    Median over runs per (scale, kind, name).
+
+    Functions called several times in a run are summed within the run
+    first; peak RSS takes the maximum instead.
+    """
+    keys = ["scale", "kind", "name"]
+    per_run = records.groupby(keys + ["run"], sort=False).agg(
+        wall_s=("wall_s", "sum"), cpu_s=("cpu_s", "sum"),
+        rss_peak_mb=("rss_peak_mb", "max"), rss_peak_delta_mb=("rss_peak_delta_mb", "max"),
+        rows_in=("rows_in", "sum"), rows_out=("rows_out", "sum"),
+    )
+    return per_run.groupby(keys, sort=False).median().round(4).reset_index()
+
+
+def scaling_table(summary):
+    """
+    Wall time per step and scale, with the scaling exponent between
+    consecutive scales (log(t2/t1) / log(n2/n1)).
+    """
+    steps = summary[summary["kind"].isin(["step", "pipeline"])]
+    table = steps.pivot_table(index="name", columns="scale", values="wall_s", sort=False)
+    scales = list(table.columns)
+    for a, b in zip(scales, scales[1:]):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            table[f"k {a}->{b}"] = (np.log(table[b] / table[a]) / np.log(b / a)).round(2)
+    return table
+
+
+def git_label(ref="HEAD", repo=PROJECT_ROOT):
+    """Short commit hash of ref (with -dirty for uncommitted changes to HEAD)."""
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", ref], cwd=repo,
+                             capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    if ref == "HEAD":
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=repo, capture_output=True, text=True).stdout.strip()
+        if dirty:
+            sha += "-dirty"
+    return sha
+
+
+def save_results(records, label, meta, out_dir=BENCHMARK_DIR):
+    """Write <label>.json (meta + all records) and <label>.csv (summary)."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"{label}.json"
+    payload = {**meta, "label": label, "records": records.to_dict("records")}
+    path.write_text(json.dumps(payload, indent=2, default=str))
+    summarize(records).to_csv(out_dir / f"{label}.csv", index=False)
+    return path
+
+
+def load_results(path):
+    """Returns (meta dict, records DataFrame) from a results JSON."""
+    payload = json.loads(Path(path).read_text())
+    records = pd.DataFrame(payload.pop("records"))
+    return payload, records
+
+
+def benchmark(scales, label=None, seed=0, repeat=1, jobs=1, src_dir=SRC_DIR,
+              data_dir=SYNTHETIC_DIR, out_dir=BENCHMARK_DIR, commit=None, project_dir=None):
+    """
+    Run the benchmark suite and save the results.
+
+    Parameters:
+        scales: Stand counts to benchmark
+        label: Result file name (default: commit hash)
+        seed: Dataset seed
+        repeat: Runs per scale (medians are reported)
+        jobs: --jobs for run_pipeline
+        src_dir: src/ directory of the code under test
+        data_dir: Where datasets are generated / reused
+        out_dir: Where results are written
+        commit: Commit recorded in the results (default: current HEAD)
+        project_dir: Run each dataset copied into this project directory
+                     (code without IWC_PROJECT_ROOT support, see run_benchmark)
+
+    Returns:
+        (results path, summary DataFrame)
+    """
+    print("=" * 60)
+    print(f"benchmark: {len(scales)} scale(s) x {repeat} run(s)")
+    print("=" * 60)
+
+    commit = commit or git_label()
+    label = label or commit
+    records = run_benchmark(scales, seed=seed, repeat=repeat, jobs=jobs,
+                            src_dir=src_dir, data_dir=data_dir, project_dir=project_dir)
+    meta = {
+        "commit": commit, "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0], "platform": platform.platform(),
+        "cpu_count": os.cpu_count(), "scales": list(scales), "seed": seed,
+        "repeat": repeat, "jobs": jobs, "staged_dataset": project_dir is not None,
+    }
+    path = save_results(records, label, meta, out_dir=out_dir)
+    summary = summarize(records)
+
+    print("\n  Wall time (s) and scaling exponent per step:")
+    print(scaling_table(summary).to_string())
+    print(f"\n  Wrote {path}")
+    return path, summary
+
+
+# =============================================================================
+# COMPARISON
+# =============================================================================
+
+def compare(base, head, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare two summaries (or record tables) record by record, on the
+    scales both contain.
+
+    Memory is the whole run's peak RSS for the pipeline row and, for steps
+    and functions, how far RSS rose above its level at the start of the
+    call (rss_peak_delta_mb); a step's peak RSS also holds what the steps
+    before it left in memory.
+
+    Returns:
+        DataFrame with base/head wall time and memory, their ratios, and
+        status: regression / improvement / ok / new / removed
+    """
+    if "run" in base.columns:
+        base = summarize(base)
+    if "run" in head.columns:
+        head = summarize(head)
+    scales = set(base["scale"]) & set(head["scale"])
+    keys = ["scale", "kind", "name"]
+
+    def prepare(df):
+        df = df[df["scale"].isin(scales)].copy()
+        df["mem_mb"] = df["rss_peak_delta_mb"].where(df["kind"] != "pipeline", df["rss_peak_mb"])
+        return df[keys + ["wall_s", "mem_mb"]]
+
+    df = prepare(base).merge(prepare(head), on=keys, how="outer",
+                             suffixes=("_base", "_head"), indicator=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["wall_ratio"] = (df["wall_s_head"] / df["wall_s_base"]).round(3)
+        df["mem_ratio"] = (df["mem_mb_head"] / df["mem_mb_base"]).round(3)
+    wall_diff = df["wall_s_head"] - df["wall_s_base"]
+    mem_diff = df["mem_mb_head"] - df["mem_mb_base"]
+
+    slower = (df["wall_ratio"] > 1 + threshold) & (wall_diff > MIN_SECONDS)
+    larger = (df["mem_ratio"] > 1 + threshold) & (mem_diff > MIN_RSS_MB)
+    faster = (df["wall_ratio"] < 1 - threshold) & (-wall_diff > MIN_SECONDS)
+    df["status"] = np.select(
+        [df["_merge"] == "left_only", df["_merge"] == "right_only", slower | larger, faster],
+        ["removed", "new", "regression", "improvement"],
+        "ok",
+    )
+    return df.drop(columns="_merge").sort_values(keys, kind="stable").reset_index(drop=True)
+
+
+def print_comparison(df, base_label="base", head_label="head"):
+    """Print steps, the whole run and every flagged record; returns the regression count."""
+    print("=" * 60)
+    print(f"Benchmark comparison: {base_label} -> {head_label}")
+    print("=" * 60)
+    flagged = df["status"].isin(["regression", "improvement", "new", "removed"])
+    shown = df[df["kind"].isin(["step", "pipeline"]) | flagged]
+    for scale, grp in shown.groupby("scale", sort=True):
+        print(f"\n  {int(scale):,} stands{'':<28}{'base':>10} {'head':>10}  ratio"
+              f"{'base MB':>11} {'head MB':>8}")
+        for row in grp.itertuples(index=False):
+            print(f"    {row.kind[:4]:<5}{row.name:<32}"
+                  f"{row.wall_s_base:>9.2f}s {row.wall_s_head:>9.2f}s  x{row.wall_ratio:<6.2f}"
+                  f"{row.mem_mb_base:>9.0f} {row.mem_mb_head:>8.0f}  {row.status}")
+    n_reg = int((df["status"] == "regression").sum())
+    print(f"\n  {n_reg} regression(s), {(df['status'] == 'improvement').sum()} improvement(s)")
+    return n_reg
+
+
+@contextlib.contextmanager
+def commit_worktree(ref, repo=PROJECT_ROOT):
+    """
+    Check out ref in a temporary git worktree, removed on exit.
+
+    Yields:
+        (short commit hash, worktree path, project_dir for run_benchmark:
+        the worktree if the commit predates IWC_PROJECT_ROOT, else None)
+    """
+    # The worktree checks out the commit itself, whatever HEAD's working tree holds
+    sha = git_label(ref, repo=repo).removesuffix("-dirty")
+    with tempfile.TemporaryDirectory(prefix=f"bench_{sha}_") as tmp:
+        worktree = Path(tmp) / "tree"
+        subprocess.run(["git", "worktree", "add", "--detach", str(worktree), sha],
+                       cwd=repo, check=True, capture_output=True)
+        try:
+            project_dir = None
+            if "IWC_PROJECT_ROOT" not in (worktree / "src" / "config.py").read_text():
+                print(f"  NOTE: {sha} predates IWC_PROJECT_ROOT; copying each dataset "
+                      f"into its worktree")
+                project_dir = worktree
+            yield sha, worktree, project_dir
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", str(worktree)],
+                           cwd=repo, capture_output=True)
+
+
+def benchmark_commits(refs, scales, repo=PROJECT_ROOT, **kwargs):
+    """
+    Benchmark each commit in a temporary git worktree on the same datasets.
+
+    Returns:
+        list of results paths, in refs order
+    """
+    paths = []
+    for i, ref in enumerate(refs):
+        with commit_worktree(ref, repo=repo) as (sha, worktree, project_dir):
+            label = f"{sha}_{i}" if any(p.stem == sha for p in paths) else sha
+            path, _ = benchmark(scales, label=label, src_dir=worktree / "src", commit=sha,
+                                project_dir=project_dir, **kwargs)
+            paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline scaling benchmarks on synthetic data")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="Stand counts to benchmark")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scale (median reported)")
+    parser.add_argument("--jobs", type=int, default=1, help="--jobs passed to run_pipeline")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic dataset seed")
+    parser.add_argument("--label", default=None, help="Results name (default: commit hash)")
+    parser.add_argument("--data-dir", default=SYNTHETIC_DIR, help="Synthetic dataset directory")
+    parser.add_argument("--out-dir", default=BENCHMARK_DIR, help="Results directory")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), default=None,
+                        help="Compare two results JSON files instead of running")
+    parser.add_argument("--commits", nargs=2, metavar=("BASE", "HEAD"), default=None,
+                        help="Benchmark two commits (git worktrees) and compare them")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Relative slowdown / memory growth reported as a regression")
+    args = parser.parse_args()
+
+    run_kwargs = dict(seed=args.seed, repeat=args.repeat, jobs=args.jobs,
+                      data_dir=Path(args.data_dir), out_dir=Path(args.out_dir))
+    if args.compare:
+        base_path, head_path = args.compare
+    elif args.commits:
+        base_path, head_path = benchmark_commits(args.commits, args.scales, **run_kwargs)
+    else:
+        benchmark(args.scales, label=args.label, **run_kwargs)
+        sys.exit(0)
+
+    (base_meta, base), (head_meta, head) = load_results(base_path), load_results(head_path)
+    result = compare(base, head, threshold=args.threshold)
+    n_regressions = print_comparison(result, base_meta.get("label"), head_meta.get("label"))
+    sys.exit(1 if n_regressions else 0)
@@ -2,35 +2,150 @@
 Project configuration for IWC Boothill GCBM input processing pipeline.
 """
 
+import os
 from pathlib import Path
 
+# =============================================================================
+# PROJECT SELECTION
+# =============================================================================
+
+class ProjectConfig:
+    """
+    Source and output paths of one project (ownership), plus optional
+    overrides of the constants in this module.
+
+    Relative paths resolve against root; unset paths follow this
+    repository's layout, so a project laid out like it only needs a root.
+    """
+
+    PATH_DEFAULTS = {
+        "shapefile": "spatial/IWC_FFF_NA_IWCBH_GA_20260115115551.shp",
+        "yields1": "yields/IWC_Shared_Folder/Yields1_IWC_Formatted.csv",
+        "yields2": "yields/IWC_Shared_Folder/Yields2_Regen_IWC_Formatted.csv",
+        "yields3": "yields/IWC_Shared_Folder/Yields3_THINSIM_IWC_Formatted.csv",
+        "condition": "yields/IWC_Shared_Folder/IWC_Boothill_Condition.xlsx",
+        "schedule": "managment_schedule/IWC_2025_BTHILL_HSM_DRAFT6.xlsx",
+        "output_dir": "output/gcbm_input",
+        "cache_dir": "output/.pipeline_cache",
+    }
+
+    def __init__(self, root, name=None, schedule_sheet="Activity rawdata", aidb_path=None,
+                 constants=None, source=None, **paths):
+        unknown = sorted(set(paths) - set(self.PATH_DEFAULTS))
+        if unknown:
+            raise ValueError(f"Unknown project settings: {unknown}")
+        self.root = Path(root).resolve()
+        self.name = name or self.root.name
+        self.schedule_sheet = schedule_sheet
+        self.aidb_path = aidb_path
+        self.constants = dict(constants or {})
+        self.source = source
+        for field, default in self.PATH_DEFAULTS.items():
+            setattr(self, field, (self.root / paths.get(field, default)).resolve())
+
+    def __repr__(self):
+        return f"ProjectConfig({self.name!r}, root={str(self.root)!r})"
+
+
+def load_project(path):
+    """
+    Read a ProjectConfig from a .toml, .yaml or .yml file (YAML needs PyYAML).
+
+    Top-level keys are the ProjectConfig arguments (root, name, shapefile,
+    yields1-3, condition, schedule, schedule_sheet, output_dir, cache_dir,
+    aidb_path) and a constants table; root defaults to the file's directory
+    and is resolved against it.
+    """
+    path = Path(path).resolve()
+    if path.suffix == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    elif path.suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML is not installed; use a .toml project file") from None
+        data = yaml.safe_load(path.read_text()) or {}
+    else:
+        raise ValueError(f"Project file must be .toml, .yaml or .yml: {path}")
+    data["root"] = path.parent / data.get("root", ".")
+    data.setdefault("name", path.stem)
+    return ProjectConfig(source=path, **data)
+
+
+# IWC_PROJECT_CONFIG selects a project file. Without it, IWC_PROJECT_ROOT
+# points the pipeline at another tree with this repository's layout (e.g. a
+# synthetic dataset from synthetic_data.py); outputs go there too.
+if os.environ.get("IWC_PROJECT_CONFIG"):
+    PROJECT = load_project(os.environ["IWC_PROJECT_CONFIG"])
+else:
+    PROJECT = ProjectConfig(
+        os.environ.get("IWC_PROJECT_ROOT") or Path(__file__).resolve().parent.parent
+    )
+
 # =============================================================================
 # PROJECT PATHS
 # =============================================================================
 
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PROJECT_ROOT = PROJECT.root
 
 # Source data
-SPATIAL_DIR = PROJECT_ROOT / "spatial"
-SHAPEFILE = SPATIAL_DIR / "IWC_FFF_NA_IWCBH_GA_20260115115551.shp"
+SHAPEFILE = PROJECT.shapefile
+SPATIAL_DIR = SHAPEFILE.parent
 
-YIELDS_DIR = PROJECT_ROOT / "yields" / "IWC_Shared_Folder"
-YIELDS1_CSV = YIELDS_DIR / "Yields1_IWC_Formatted.csv"
-YIELDS2_CSV = YIELDS_DIR / "Yields2_Regen_IWC_Formatted.csv"
-YIELDS3_CSV = YIELDS_DIR / "Yields3_THINSIM_IWC_Formatted.csv"
+YIELDS1_CSV = PROJECT.yields1
+YIELDS2_CSV = PROJECT.yields2
+YIELDS3_CSV = PROJECT.yields3
+YIELDS_DIR = YIELDS1_CSV.parent
 
-CONDITION_XLSX = YIELDS_DIR / "IWC_Boothill_Condition.xlsx"
+CONDITION_XLSX = PROJECT.condition
 
-SCHEDULE_DIR = PROJECT_ROOT / "managment_schedule"
-SCHEDULE_XLSX = SCHEDULE_DIR / "IWC_2025_BTHILL_HSM_DRAFT6.xlsx"
-SCHEDULE_SHEET = "Activity rawdata"
+SCHEDULE_XLSX = PROJECT.schedule
+SCHEDULE_DIR = SCHEDULE_XLSX.parent
+SCHEDULE_SHEET = PROJECT.schedule_sheet
 
 # Output
-OUTPUT_DIR = PROJECT_ROOT / "output" / "gcbm_input"
+OUTPUT_DIR = PROJECT.output_dir
 DISTURBANCE_DIR = OUTPUT_DIR / "disturbances"
 
-# AIDB path (user provides at runtime; this is the default placeholder)
-AIDB_PATH = None  # Set via CLI argument or environment variable
+# Step cache for the incremental runner (pipeline_dag.py)
+PIPELINE_CACHE_DIR = PROJECT.cache_dir
+PIPELINE_CACHE_KEEP = 3  # cached results kept per step
+
+# Partitioned execution of steps 02-06 (partition.py)
+PARTITION_DIR = OUTPUT_DIR / "partitions"
+PARTITION_TILE_EXTENT = 0.1  # degrees, for partitioning by tile
+
+# Multi-node shard execution (shard_coordinator.py); the shard directory
+# must be shared by every worker
+SHARD_DIR = OUTPUT_DIR / "shards"
+SHARD_HEARTBEAT_SECONDS = 30  # lock refresh interval while a shard runs
+SHARD_LOCK_STALE_SECONDS = 600  # lock age after which its worker is presumed dead
+
+# Scenario fan-out over management schedules (scenarios.py); one
+# subdirectory per schedule
+SCENARIO_DIR = OUTPUT_DIR / "scenarios"
+
+# Pre-GCBM QA reports (qa_*.py), in this subdirectory of the output
+# directory they check
+QA_DIR_NAME = "qa"
+
+# Synthetic datasets and benchmark results (synthetic_data.py, benchmark.py)
+SYNTHETIC_DIR = PROJECT_ROOT / "output" / "synthetic"
+BENCHMARK_DIR = PROJECT_ROOT / "output" / "benchmarks"
+
+# Aggregate reports of batch runs over several projects (batch.py)
+BATCH_DIR = PROJECT_ROOT / "output" / "batch"
+
+# Stored reference outputs for equivalence checks (golden.py)
+GOLDEN_DIR = PROJECT_ROOT / "output" / "golden"
+
+# AIDB path (user provides at runtime via --aidb-path, or per project)
+AIDB_PATH = PROJECT.aidb_path
 
 # =============================================================================
 # UNIT CONVERSIONS
@@ -51,6 +166,61 @@ PROJECTION_LENGTH = 50  # years
 MAX_AGE_YIELDS1 = 78
 MAX_AGE_YIELDS2 = 50
 
+# =============================================================================
+# TILER PLANNING
+# =============================================================================
+
+# Candidate pixel sizes in degrees, coarsest first. The planner picks the
+# coarsest size whose estimated area error on small stands stays under
+# TILER_MAX_AREA_ERROR, or the finest when none does.
+TILER_PIXEL_SIZES = [0.001, 0.0005, 0.00025, 0.0001, 0.00005, 0.000025]
+
+# Maximum relative area error accepted for a small stand
+TILER_MAX_AREA_ERROR = 0.05
+
+# Stand-area quantile treated as "small" (0.05 = 5th percentile)
+TILER_SMALL_STAND_QUANTILE = 0.05
+
+# Mojadata tile / block extents (degrees)
+TILER_TILE_EXTENT = 1.0
+TILER_BLOCK_EXTENT = 0.1
+
+# Share of physical memory the tiler workers may use together
+TILER_MEMORY_FRACTION = 0.5
+
+# =============================================================================
+# SCHEDULE / CONDITION RECONCILIATION (qa_reconcile.py)
+# =============================================================================
+
+# Schedule ACTION -> Condition column that holds the age the action was
+# applied at, from its period until the rotation ends
+ACTION_TO_CONDITION_COLUMN = {
+    "aHTHIN1": "Thin1",
+    "aHTHIN2": "Thin2",
+    "aFERTM": "Fert1",
+    "aFERTL": "Fert2",
+}
+
+# Schedule actions in whose period the Condition AGE restarts at 1
+AGE_RESTART_ACTIONS = ["aHCC", "aSP", "aPLT"]
+
+# Relative difference allowed between harvested and Condition AREA
+RECONCILE_AREA_TOLERANCE = 0.05
+
+# =============================================================================
+# HARVEST REPORT (harvest_report.py)
+# =============================================================================
+
+# Schedule actions that harvest volume
+HARVEST_ACTIONS = ["aHCC", "aHTHIN1", "aHTHIN2"]
+
+# Yields products summed into merchantable volume (m³/acre), as in 05_disturbances
+HARVEST_VOLUME_PRODUCTS = ["P_TOP4M3PA", "H_TOP4M3PA"]
+
+# Also write the report as Parquet; skipped with a note when pyarrow is not installed
+# (run_pipeline.py --no-harvest-parquet turns it off for a run)
+HARVEST_REPORT_PARQUET = True
+
 # =============================================================================
 # SPECIES CODE MAPPINGS
 # =============================================================================
@@ -108,6 +278,9 @@ ACTION_TO_DISTURBANCE = {
     "aSP": "Site_Prep",
 }
 
+# Volume removed by a clearcut (pct_volume_removed, 05_disturbances)
+CLEARCUT_PCT_VOLUME_REMOVED = 97.0
+
 # Actions that are NOT disturbances (effects embedded in yield curves)
 NON_DISTURBANCE_ACTIONS = {"aPLT", "aFERTL", "aFERTM"}
 
@@ -148,6 +321,13 @@ CLASSIFIER_NAMES = [
     "mgmt_trajectory",
 ]
 
+# Wildcard classifier value in SIT transition rules (matches any source value;
+# in a target column it means "unchanged")
+WILDCARD = "?"
+
+# Fold transition rules into wildcard rules before writing transition_rules.csv
+COMPRESS_TRANSITION_RULES = False
+
 # growth_period values
 GROWTH_PERIOD_CURRENT = "current"
 GROWTH_PERIOD_POST_REGEN = "post_regen"
@@ -175,3 +355,15 @@ SCHEDULE_COLUMNS = {
     "TH12": "treatment_type",
     "TH13": "management_type",
 }
+
+
+# =============================================================================
+# PROJECT OVERRIDES
+# =============================================================================
+
+# The project file's constants table replaces defaults above (paths are
+# project settings, not constants)
+for _name, _value in PROJECT.constants.items():
+    if not _name.isupper() or _name not in globals() or isinstance(globals()[_name], Path):
+        raise ValueError(f"Project {PROJECT.name}: '{_name}' is not an overridable constant")
+    globals()[_name] = _value
@@ -0,0 +1,477 @@
+"""
+golden.py — Golden-Output Equivalence Checks
+=============================================
+Guards performance refactors of steps 02-06: runs the pipeline and checks
+that its outputs are equivalent to stored golden copies.
+
+Comparison is order-insensitive. Each table is normalized (floats rounded to
+DECIMALS, -0.0 -> 0.0, missing values unified, geometries snapped to
+GEOMETRY_TOLERANCE and normalized), every row is hashed, and the two row
+multisets are compared. Rows left unmatched are then paired
+  1. on their non-geometry, non-float columns, accepting pairs whose floats
+     agree within 10**-DECIMALS and whose geometries are equal within
+     GEOMETRY_TOLERANCE (values that rounded / snapped to different sides
+     of a grid step), then
+  2. on the file's key columns, and reported as changed rows with the
+     differing columns; whatever is still unpaired is missing or extra.
+
+Surrogate ids assigned in row order (yield_curve_id) are not compared.
+
+Golden outputs live in GOLDEN_DIR/<dataset>/ ("boothill" for the project
+inputs, "synthetic_<stands>_s<seed>" for synthetic_data.py datasets). The
+goldens of DEFAULT_DATASET (seed 0) are committed, so a plain
+`python golden.py` generates that dataset and checks against them.
+--update --commit REF stores the outputs of another commit (run in a
+temporary git worktree, see benchmark.commit_worktree) and records it in
+golden.json, so goldens can come from a clean reference commit.
+
+Usage:
+    python golden.py --update [--dataset boothill | --dataset synthetic:10000] [--commit REF]
+    python golden.py [--dataset ...]                 # run pipeline, compare, exit 1 on differences
+    python golden.py --actual DIR [--dataset ...]    # compare an existing output directory
+"""
+
+import argparse
+import json
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from config import PROJECT_ROOT, OUTPUT_DIR, GOLDEN_DIR, CLASSIFIER_NAMES
+import benchmark
+
+
+# Small synthetic dataset whose goldens are committed
+DEFAULT_DATASET = "synthetic:50"
+
+DECIMALS = 6
+GEOMETRY_TOLERANCE = 1e-9  # degrees (EPSG:4326)
+
+# Output file -> columns identifying a row (for reporting changes) and
+# columns excluded from the comparison
+GOLDEN_FILES = {
+    "classifiers.csv": {"keys": ["classifier", "value"]},
+    "yield_curves.csv": {
+        "keys": CLASSIFIER_NAMES + ["leading_species"],
+        "ignore": ["yield_curve_id"],
+    },
+    "disturbance_events.csv": {"keys": ["stand_key", "year", "disturbance_type"]},
+    "transition_rules.csv": {"keys": ["disturbance_type"] + [f"src_{c}" for c in CLASSIFIER_NAMES]},
+    "inventory.gpkg": {"keys": ["stand_key"]},
+    "disturbances.gpkg": {"keys": ["stand_key", "year", "disturbance_type"]},
+}
+
+# Diff rows printed per file (the full list goes to the diff CSV)
+MAX_PRINTED_DIFFS = 10
+
+
+# =============================================================================
+# READING
+# =============================================================================
+
+def read_classifiers(path):
+    """classifiers.csv as (classifier, value, description) rows."""
+    rows, current = [], None
+    for line in Path(path).read_text().splitlines():
+        if not line:
+            continue
+        first, _, rest = line.partition(",")
+        if first == "_CLASSIFIER":
+            current = rest
+        else:
+            rows.append((current, first, rest))
+    return pd.DataFrame(rows, columns=["classifier", "value", "description"])
+
+
+def read_output(path):
+    """Read an output table (CSV, classifiers.csv or GeoPackage)."""
+    path = Path(path)
+    if path.name == "classifiers.csv":
+        return read_classifiers(path)
+    if path.suffix == ".gpkg":
+        return gpd.read_file(path, engine="pyogrio")
+    return pd.read_csv(path, low_memory=False)
+
+
+# =============================================================================
+# NORMALIZATION
+# =============================================================================
+
+def _geometry_column(df):
+    return df.geometry.name if isinstance(df, gpd.GeoDataFrame) else None
+
+
+def normalize(df, columns, decimals=DECIMALS, tolerance=GEOMETRY_TOLERANCE):
+    """
+    Canonical form of the given columns for hashing.
+
+    Numbers become floats rounded to decimals, text is stripped, missing
+    values become NaN and geometries become WKB of the snapped, normalized
+    shape.
+    """
+    geom_col = _geometry_column(df)
+    out = {}
+    for col in columns:
+        s = df[col]
+        if col == geom_col:
+            geoms = shapely.normalize(shapely.set_precision(s.values, tolerance))
+            out[col] = pd.Series(shapely.to_wkb(geoms, hex=True), index=df.index).fillna("")
+        elif pd.api.types.is_bool_dtype(s) or pd.api.types.is_numeric_dtype(s):
+            out[col] = s.astype(float).round(decimals) + 0.0
+        else:
+            out[col] = s.astype(object).where(s.notna(), np.nan).map(
+                lambda v: v.strip() if isinstance(v, str) else v
+            )
+    return pd.DataFrame(out, index=df.index)
+
+
+def row_hashes(norm):
+    """One uint64 hash per normalized row."""
+    return pd.util.hash_pandas_object(norm, index=False)
+
+
+def _unmatched(h_exp, h_act):
+    """
+    Positions of rows whose hash has no counterpart on the other side
+    (multiset difference: duplicates match one-to-one).
+    """
+    e = pd.DataFrame({"h": h_exp.values, "n": h_exp.groupby(h_exp.values).cumcount().values})
+    a = pd.DataFrame({"h": h_act.values, "n": h_act.groupby(h_act.values).cumcount().values})
+    m = e.merge(a, on=["h", "n"], how="outer", indicator=True)
+    only_e = m.loc[m["_merge"] == "left_only", ["h", "n"]]
+    only_a = m.loc[m["_merge"] == "right_only", ["h", "n"]]
+    pos_e = e.reset_index().merge(only_e, on=["h", "n"])["index"].to_numpy()
+    pos_a = a.reset_index().merge(only_a, on=["h", "n"])["index"].to_numpy()
+    return np.sort(pos_e), np.sort(pos_a)
+
+
+def _pair(exp, act, key_cols):
+    """
+    Pair rows of exp and act with equal key_cols (n-th with n-th).
+
+    Returns:
+        (positions in exp, positions in act) of the pairs
+    """
+    if not len(exp) or not len(act):
+        return np.array([], dtype=int), np.array([], dtype=int)
+    ke = row_hashes(exp[key_cols]) if key_cols else pd.Series(0, index=exp.index, dtype="uint64")
+    ka = row_hashes(act[key_cols]) if key_cols else pd.Series(0, index=act.index, dtype="uint64")
+    e = pd.DataFrame({"k": ke.values, "n": ke.groupby(ke.values).cumcount().values,
+                      "pe": np.arange(len(exp))})
+    a = pd.DataFrame({"k": ka.values, "n": ka.groupby(ka.values).cumcount().values,
+                      "pa": np.arange(len(act))})
+    m = e.merge(a, on=["k", "n"])
+    return m["pe"].to_numpy(), m["pa"].to_numpy()
+
+
+def _key(frame, i, cols):
+    """Identifying values of row i as plain Python values."""
+    return {c: v.item() if isinstance(v, np.generic) else v for c, v in frame.loc[i, cols].items()}
+
+
+def _close(exp, act, float_cols, geom_col, decimals, tolerance):
+    """Row mask: floats within 10**-decimals and geometries within tolerance."""
+    ok = np.ones(len(exp), dtype=bool)
+    for col in float_cols:
+        ok &= np.isclose(exp[col].to_numpy(float), act[col].to_numpy(float),
+                         rtol=0, atol=10.0 ** -decimals, equal_nan=True)
+    if geom_col is not None:
+        ok &= shapely.equals_exact(
+            shapely.normalize(exp[geom_col].values), shapely.normalize(act[geom_col].values),
+            tolerance=tolerance,
+        ) | (exp[geom_col].isna().to_numpy() & act[geom_col].isna().to_numpy())
+    return ok
+
+
+# =============================================================================
+# COMPARISON
+# =============================================================================
+
+def compare_frames(expected, actual, keys=(), ignore=(), decimals=DECIMALS,
+                   tolerance=GEOMETRY_TOLERANCE):
+    """
+    Order-insensitive comparison of two tables.
+
+    Parameters:
+        expected: Golden DataFrame / GeoDataFrame
+        actual: New DataFrame / GeoDataFrame
+        keys: Columns identifying a row, used to report changed rows
+        ignore: Columns not compared
+        decimals: Float precision compared
+        tolerance: Geometry coordinate tolerance
+
+    Returns:
+        dict with equal, n_expected, n_actual, columns_missing,
+        columns_extra, n_changed, n_missing, n_extra and diffs (DataFrame
+        of status, key, column, expected, actual; one row per changed
+        value, missing row or extra row)
+    """
+    columns_missing = [c for c in expected.columns if c not in actual.columns and c not in ignore]
+    columns_extra = [c for c in actual.columns if c not in expected.columns and c not in ignore]
+    columns = [c for c in expected.columns if c in actual.columns and c not in ignore]
+    keys = [k for k in keys if k in columns]
+
+    expected = expected.reset_index(drop=True)
+    actual = actual.reset_index(drop=True)
+    norm_e = normalize(expected, columns, decimals, tolerance)
+    norm_a = normalize(actual, columns, decimals, tolerance)
+    pos_e, pos_a = _unmatched(row_hashes(norm_e), row_hashes(norm_a))
+
+    # Near-equal pairs: same exact columns, floats / geometry within tolerance
+    geom_col = _geometry_column(expected) if _geometry_column(expected) in columns else None
+    float_cols = [c for c in columns if c != geom_col and pd.api.types.is_float_dtype(norm_e[c])
+                  and pd.api.types.is_float_dtype(norm_a[c])]
+    exact_cols = [c for c in columns if c not in float_cols and c != geom_col]
+    if len(pos_e) and len(pos_a):
+        ue, ua = norm_e.iloc[pos_e], norm_a.iloc[pos_a]
+        pe, pa = _pair(ue, ua, exact_cols)
+        ok = _close(expected.iloc[pos_e[pe]], actual.iloc[pos_a[pa]],
+                    float_cols, geom_col, decimals, tolerance)
+        pos_e = np.setdiff1d(pos_e, pos_e[pe[ok]])
+        pos_a = np.setdiff1d(pos_a, pos_a[pa[ok]])
+
+    # Changed rows: pair the rest on the key columns
+    diffs = []
+    pe, pa = _pair(norm_e.iloc[pos_e], norm_a.iloc[pos_a], keys) if keys else ([], [])
+    changed_e, changed_a = pos_e[pe] if len(pe) else [], pos_a[pa] if len(pa) else []
+    for ie, ia in zip(changed_e, changed_a):
+        key = _key(expected, ie, keys)
+        for col in columns:
+            ve, va = norm_e.at[ie, col], norm_a.at[ia, col]
+            if col in float_cols:
+                same = np.isclose(ve, va, rtol=0, atol=10.0 ** -decimals, equal_nan=True)
+            elif col == geom_col:
+                same = bool(_close(expected.iloc[[ie]], actual.iloc[[ia]], [], geom_col,
+                                   decimals, tolerance)[0])
+            else:
+                same = (ve == va) or (pd.isna(ve) and pd.isna(va))
+            if not same:
+                shown = (expected.at[ie, col], actual.at[ia, col])
+                if col == geom_col:
+                    shown = tuple(g.wkt[:80] if g is not None else None for g in shown)
+                diffs.append({"status": "changed", "key": key, "column": col,
+                              "expected": shown[0], "actual": shown[1]})
+
+    missing = np.setdiff1d(pos_e, changed_e)
+    extra = np.setdiff1d(pos_a, changed_a)
+    shown_cols = keys or [c for c in columns if c != geom_col]
+    for status, frame, positions in (("missing", expected, missing), ("extra", actual, extra)):
+        for i in positions:
+            diffs.append({"status": status, "key": _key(frame, i, shown_cols),
+                          "column": None, "expected": None, "actual": None})
+
+    diffs = pd.DataFrame(diffs, columns=["status", "key", "column", "expected", "actual"])
+    return {
+        "equal": not (columns_missing or columns_extra or len(diffs)),
+        "n_expected": len(expected),
+        "n_actual": len(actual),
+        "columns_missing": columns_missing,
+        "columns_extra": columns_extra,
+        "n_changed": len(changed_e),
+        "n_missing": len(missing),
+        "n_extra": len(extra),
+        "diffs": diffs,
+    }
+
+
+def compare_outputs(golden_dir, actual_dir, files=GOLDEN_FILES):
+    """
+    Compare every golden file with its counterpart in actual_dir.
+
+    Returns:
+        dict of file name -> compare_frames result (or {"equal": False,
+        "error": ...} if a file is missing)
+    """
+    results = {}
+    for name, spec in files.items():
+        golden, actual = Path(golden_dir) / name, Path(actual_dir) / name
+        if not golden.exists():
+            continue
+        if not actual.exists():
+            results[name] = {"equal": False, "error": f"{actual} not found"}
+            continue
+        results[name] = compare_frames(
+            read_output(golden), read_output(actual),
+            keys=spec.get("keys", ()), ignore=spec.get("ignore", ()),
+        )
+    return results
+
+
+def print_results(results):
+    """Print a per-file summary and the first diffs; returns True if all equal."""
+    for name, res in results.items():
+        if "error" in res:
+            print(f"  [FAIL] {name}: {res['error']}")
+            continue
+        if res["equal"]:
+            print(f"  [OK]   {name}: {res['n_actual']} rows equivalent")
+            continue
+        print(f"  [FAIL] {name}: {res['n_expected']} golden rows, {res['n_actual']} new rows — "
+              f"{res['n_changed']} changed, {res['n_missing']} missing, {res['n_extra']} extra")
+        if res["columns_missing"] or res["columns_extra"]:
+            print(f"         columns missing: {res['columns_missing']}, extra: {res['columns_extra']}")
+        for row in res["diffs"].head(MAX_PRINTED_DIFFS).itertuples(index=False):
+            detail = f" {row.column}: {row.expected!r} -> {row.actual!r}" if pd.notna(row.column) else ""
+            print(f"         {row.status:<8}{row.key}{detail}")
+        if len(res["diffs"]) > MAX_PRINTED_DIFFS:
+            print(f"         ... and {len(res['diffs']) - MAX_PRINTED_DIFFS} more")
+    return all(res["equal"] for res in results.values())
+
+
+def write_diffs(results, path):
+    """All diffs of all files as one CSV."""
+    frames = [res["diffs"].assign(file=name) for name, res in results.items()
+              if "diffs" in res and len(res["diffs"])]
+    if not frames:
+        return None
+    pd.concat(frames, ignore_index=True).to_csv(path, index=False)
+    return path
+
+
+def assert_equivalent(golden_dir, actual_dir, files=GOLDEN_FILES):
+    """Raise AssertionError listing the files that differ from the golden outputs."""
+    results = compare_outputs(golden_dir, actual_dir, files)
+    failed = [name for name, res in results.items() if not res["equal"]]
+    if failed:
+        raise AssertionError(f"Outputs differ from golden copies in {golden_dir}: {failed}")
+    return results
+
+
+# =============================================================================
+# DATASETS / PIPELINE RUNS
+# =============================================================================
+
+def resolve_dataset(spec, seed=0, generate=True):
+    """
+    'boothill' or 'synthetic:<stands>' -> (name, project root).
+    Synthetic datasets are generated on first use (benchmark.dataset)
+    unless generate is False.
+    """
+    if spec == "boothill":
+        return "boothill", PROJECT_ROOT
+    kind, _, n = spec.partition(":")
+    if kind != "synthetic" or not n.isdigit():
+        raise ValueError(f"Unknown dataset '{spec}'; use 'boothill' or 'synthetic:<stands>'")
+    name = f"synthetic_{n}_s{seed}"
+    if not generate:
+        return name, None
+    return name, benchmark.dataset(int(n), seed=seed)
+
+
+def output_dir_of(root):
+    """OUTPUT_DIR of a project root."""
+    return Path(root) / OUTPUT_DIR.relative_to(PROJECT_ROOT)
+
+
+def update_golden(actual_dir, golden_dir, files=GOLDEN_FILES, commit=None):
+    """
+    Copy the outputs in actual_dir into golden_dir (replacing what was
+    there), recording commit (default: the current HEAD) in golden.json.
+    """
+    golden_dir = Path(golden_dir)
+    golden_dir.mkdir(parents=True, exist_ok=True)
+    copied = []
+    for name in files:
+        src = Path(actual_dir) / name
+        if src.exists():
+            shutil.copy2(src, golden_dir / name)
+            copied.append(name)
+    (golden_dir / "golden.json").write_text(json.dumps({
+        "commit": commit or benchmark.git_label(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "files": copied,
+    }, indent=2))
+    return copied
+
+
+def update_from_commit(ref, root, golden_dir):
+    """
+    Run the pipeline of commit ref on the dataset at root, in a temporary
+    git worktree, and store its outputs as golden.
+
+    Returns:
+        (short commit hash, list of stored files)
+    """
+    # The log stays with the dataset; a staged worktree is removed afterwards
+    log_path = output_dir_of(root) / "golden_run.log"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with benchmark.commit_worktree(ref) as (sha, worktree, project_dir):
+        if project_dir is not None:
+            root = benchmark.stage_dataset(root, project_dir)
+        actual_dir = output_dir_of(root)
+        actual_dir.mkdir(parents=True, exist_ok=True)
+        wall, _ = benchmark.run_once(root, src_dir=worktree / "src", log_path=log_path)
+        print(f"\n  Pipeline run of {sha}: {wall:.1f}s (log: {log_path})")
+        return sha, update_golden(actual_dir, golden_dir, commit=sha)
+
+
+def main(dataset=DEFAULT_DATASET, update=False, actual_dir=None, seed=0, golden_root=GOLDEN_DIR,
+         commit=None):
+    """
+    Run the pipeline on a dataset (unless actual_dir is given) and compare
+    its outputs with the golden copies, or store them as golden with update
+    (from the pipeline of commit, when given).
+
+    Returns:
+        True if the outputs are equivalent (or were stored)
+    """
+    print("=" * 60)
+    print(f"golden: {'Updating' if update else 'Checking'} golden outputs ({dataset})")
+    print("=" * 60)
+
+    name, root = resolve_dataset(dataset, seed=seed, generate=actual_dir is None)
+    golden_dir = Path(golden_root) / name
+    if update and commit is not None:
+        sha, copied = update_from_commit(commit, root, golden_dir)
+        print(f"\n  Stored {len(copied)} golden files from {sha} in {golden_dir}")
+        return True
+    if actual_dir is None:
+        actual_dir = output_dir_of(root)
+        actual_dir.mkdir(parents=True, exist_ok=True)
+        wall, _ = benchmark.run_once(root, log_path=actual_dir / "golden_run.log")
+        print(f"\n  Pipeline run: {wall:.1f}s (log: {actual_dir / 'golden_run.log'})")
+    actual_dir = Path(actual_dir)
+
+    if update:
+        copied = update_golden(actual_dir, golden_dir)
+        print(f"\n  Stored {len(copied)} golden files in {golden_dir}")
+        return True
+
+    if not golden_dir.exists():
+        raise FileNotFoundError(f"No golden outputs in {golden_dir}; create them with --update")
+    print(f"\n  Golden: {golden_dir}\n  New:    {actual_dir}\n")
+    results = compare_outputs(golden_dir, actual_dir)
+    ok = print_results(results)
+    diff_path = write_diffs(results, actual_dir / "golden_diff.csv")
+    if diff_path is not None:
+        print(f"\n  Wrote row-level diffs: {diff_path}")
+    print(f"\n  {'All outputs equivalent.' if ok else 'Outputs DIFFER from golden copies.'}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check pipeline outputs against golden copies")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET,
+                        help="'boothill' (project inputs) or 'synthetic:<stands>' "
+                             f"(default: {DEFAULT_DATASET})")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic dataset seed")
+    parser.add_argument("--update", action="store_true",
+                        help="Store the outputs as the new golden copies")
+    parser.add_argument("--actual", default=None,
+                        help="Compare this output directory instead of running the pipeline")
+    parser.add_argument("--golden-dir", default=GOLDEN_DIR, help="Root of the golden outputs")
+    parser.add_argument("--commit", default=None,
+                        help="With --update: store the outputs of this commit's pipeline")
+    args = parser.parse_args()
+    if args.commit is not None and (not args.update or args.actual is not None):
+        parser.error("--commit requires --update and runs the pipeline itself (no --actual)")
+
+    ok = main(dataset=args.dataset, update=args.update, actual_dir=args.actual,
+              seed=args.seed, golden_root=Path(args.golden_dir), commit=args.commit)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,253 @@
+"""
+harvest_report.py — Harvested Volume and Area by Year
+======================================================
+Aggregates the harvest events of 05_disturbances (HARVEST_ACTIONS) into
+harvested area and merchantable volume per year, disturbance type, species
+and rotation.
+
+Each event's pre-harvest volume comes from the same yields as its
+pct_volume_removed (05_disturbances.calc_thinning_pct): the stand's
+Yields3 curve, else its Yields1 curve, for the 1st rotation, and the
+Yields2 regen curve of its SI class and species after a clearcut. The
+curve is the event's trajectory before the action
+(T1-<thin1>-T2-<thin2>-F1-<fert1>-F2-<fert2>), and volume is the sum of
+HARVEST_VOLUME_PRODUCTS. Ages past the end of a curve keep its last volume.
+
+  harvested volume = volume/acre at the event age x event area x removed share
+
+where the removed share is pct_volume_removed, except for split-year
+clearcuts: each part clears its own area (CLEARCUT_PCT_VOLUME_REMOVED), so
+they are reported with their rotation's Clearcut. The rotation of an event
+is 1 + the stand's earlier Clearcuts.
+
+The curves are flattened into one volume-by-age array per yields table
+and looked up for all events at once, and the events are aggregated in one
+groupby, so the report costs little per scenario.
+
+Output: OUTPUT_DIR/harvest_report.csv (+ .parquet with HARVEST_REPORT_PARQUET,
+when pyarrow is installed)
+"""
+
+import time
+from importlib import import_module
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    OUTPUT_DIR,
+    ACRES_TO_HA,
+    ACTION_TO_DISTURBANCE,
+    CLEARCUT_PCT_VOLUME_REMOVED,
+    HARVEST_ACTIONS,
+    HARVEST_VOLUME_PRODUCTS,
+    HARVEST_REPORT_PARQUET,
+)
+from instrumentation import instrument
+
+
+GROUP_COLUMNS = ["year", "disturbance_type", "species", "rotation"]
+REPORT_COLUMNS = GROUP_COLUMNS + ["n_events", "area_ha", "volume_m3", "n_no_curve"]
+
+
+def parquet_enabled(parquet=HARVEST_REPORT_PARQUET):
+    """Whether Parquet output is on and pyarrow is importable."""
+    if not parquet:
+        return False
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# =============================================================================
+# VOLUME LOOKUP
+# =============================================================================
+
+class VolumeTable:
+    """
+    Merchantable volume (m³/acre) by age for each curve of a yields table,
+    keyed by the given columns + mgmt_trajectory.
+    """
+
+    def __init__(self, yields, keys):
+        self.keys = list(keys) + ["mgmt_trajectory"]
+        age_cols = sorted((c for c in yields.columns if str(c).isdigit()), key=int)
+        vol = yields[age_cols].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+        summed = vol.groupby([yields[k] for k in self.keys], sort=False).sum()
+
+        self.index = summed.index
+        self.max_age = int(age_cols[-1])
+        self.table = np.zeros((len(summed), self.max_age + 1))
+        self.table[:, [int(a) for a in age_cols]] = summed.to_numpy()
+
+    def lookup(self, frame, age):
+        """
+        Volume at age for each row of frame (the key columns).
+
+        Returns:
+            (volume array, bool array: whether the row has a curve)
+        """
+        pos = self.index.get_indexer(pd.MultiIndex.from_frame(frame[self.keys]))
+        found = pos >= 0
+        age = np.clip(np.asarray(age, dtype=np.int64), 0, self.max_age)
+        return np.where(found, self.table[pos, age], 0.0), found
+
+
+def volume_tables(yields1, yields2, yields3):
+    """VolumeTables of the stand curves (Yields3 over Yields1) and the regen curves (Yields2)."""
+    def products(df):
+        return df[df["Product"].isin(HARVEST_VOLUME_PRODUCTS)]
+
+    # 05 takes each product from Yields3 where the stand has it there
+    stand = pd.concat([products(yields3), products(yields1)], ignore_index=True)
+    stand = stand.drop_duplicates(["stand_key", "mgmt_trajectory", "Product"], keep="first")
+    return VolumeTable(stand, ["stand_key"]), VolumeTable(products(yields2), ["si_value", "species_code"])
+
+
+@instrument
+def harvest_volumes(events, yields1, yields2, yields3):
+    """
+    Harvest events with their rotation, area and harvested volume.
+
+    Returns:
+        DataFrame of the HARVEST_ACTIONS events with GROUP_COLUMNS,
+        area_ha, volume_m3 and no_curve
+    """
+    disturbances = import_module("05_disturbances")
+    harvest = events[events["ACTION"].isin(HARVEST_ACTIONS)]
+    harvest = harvest.sort_values(["stand_key", "year"], kind="stable")
+    clearcut = harvest["disturbance_type"].eq("Clearcut")
+    harvest = harvest.assign(rotation=clearcut.groupby(harvest["stand_key"]).cumsum() - clearcut + 1)
+
+    keys = pd.DataFrame({
+        "stand_key": harvest["stand_key"].to_numpy(),
+        "mgmt_trajectory": (
+            "T1-" + harvest["thin1"].astype(int).astype(str)
+            + "-T2-" + harvest["thin2"].astype(int).astype(str)
+            + "-F1-" + harvest["fert1"].astype(int).astype(str)
+            + "-F2-" + harvest["fert2"].astype(int).astype(str)
+        ).to_numpy(),
+    })
+    # SI class and regen species once per distinct value, as 05 maps them
+    si = harvest["si"].drop_duplicates()
+    keys["si_value"] = harvest["si"].map(dict(zip(si, si.map(disturbances._round_si)))).to_numpy()
+    species = harvest["species"].drop_duplicates()
+    keys["species_code"] = harvest["species"].map(
+        dict(zip(species, species.map(disturbances._species_to_regen_code)))
+    ).to_numpy()
+
+    stand_table, regen_table = volume_tables(yields1, yields2, yields3)
+    age = harvest["age"].to_numpy()
+    first = harvest["rotation"].to_numpy() == 1
+    stand_vol, stand_found = stand_table.lookup(keys, age)
+    regen_vol, regen_found = regen_table.lookup(keys, age)
+    volume = np.where(first, stand_vol, regen_vol)
+    found = np.where(first, stand_found, regen_found)
+
+    is_cc = harvest["ACTION"].eq("aHCC").to_numpy()
+    removed = np.where(is_cc, CLEARCUT_PCT_VOLUME_REMOVED,
+                       harvest["pct_volume_removed"].fillna(0.0).to_numpy()) / 100
+    area = harvest["area"].to_numpy(float)
+    return pd.DataFrame({
+        "year": harvest["year"].to_numpy(),
+        "disturbance_type": harvest["ACTION"].map(ACTION_TO_DISTURBANCE).to_numpy(),
+        "species": harvest["species"].to_numpy(),
+        "rotation": harvest["rotation"].to_numpy(),
+        "area_ha": area * ACRES_TO_HA,
+        "volume_m3": volume * area * removed,
+        "no_curve": ~found,
+    })
+
+
+@instrument
+def aggregate(harvest):
+    """Harvest totals per GROUP_COLUMNS (REPORT_COLUMNS)."""
+    report = harvest.groupby(GROUP_COLUMNS, sort=True).agg(
+        n_events=("area_ha", "size"),
+        area_ha=("area_ha", "sum"),
+        volume_m3=("volume_m3", "sum"),
+        n_no_curve=("no_curve", "sum"),
+    )
+    return report.reset_index()[REPORT_COLUMNS]
+
+
+def write_report(report, output_dir=OUTPUT_DIR, parquet=HARVEST_REPORT_PARQUET,
+                 name="harvest_report"):
+    """Write report to output_dir/<name>.csv (and .parquet); returns the paths."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = [output_dir / f"{name}.csv"]
+    report.to_csv(paths[0], index=False)
+    if parquet_enabled(parquet):
+        paths.append(output_dir / f"{name}.parquet")
+        report.to_parquet(paths[1], index=False)
+    return paths
+
+
+def combine(reports, output_dir, parquet=HARVEST_REPORT_PARQUET):
+    """
+    Stack the harvest reports of several scenarios.
+
+    Parameters:
+        reports: dict of scenario name -> directory holding its harvest_report.csv
+        output_dir: Directory for the combined harvest_report.csv (.parquet)
+
+    Returns:
+        DataFrame with a scenario column + REPORT_COLUMNS
+    """
+    frames = [
+        pd.read_csv(Path(d) / "harvest_report.csv").assign(scenario=name)
+        for name, d in reports.items()
+    ]
+    combined = (pd.concat(frames, ignore_index=True) if frames
+                else pd.DataFrame(columns=["scenario"] + REPORT_COLUMNS))
+    combined = combined[["scenario"] + REPORT_COLUMNS]
+    write_report(combined, output_dir, parquet=parquet)
+    return combined
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def run(events, yields1, yields2, yields3, output_dir=OUTPUT_DIR, parquet=HARVEST_REPORT_PARQUET):
+    """
+    Main entry point.
+
+    Parameters:
+        events: Disturbance events (05_disturbances.run)
+        yields1, yields2, yields3: Yields tables (01_ingest)
+        output_dir: Directory for the report
+        parquet: Also write harvest_report.parquet (if pyarrow is installed)
+
+    Returns:
+        DataFrame with REPORT_COLUMNS
+    """
+    print("=" * 60)
+    print("harvest_report: Harvested volume and area by year")
+    print("=" * 60)
+
+    if parquet and not parquet_enabled(parquet):
+        print("  NOTE: pyarrow is not installed (pip install pyarrow); writing CSV only")
+    start = time.perf_counter()
+    harvest = harvest_volumes(events, yields1, yields2, yields3)
+    report = aggregate(harvest)
+    elapsed = time.perf_counter() - start
+
+    by_type = report.groupby("disturbance_type")[["n_events", "area_ha", "volume_m3"]].sum()
+    print(f"\n  Harvest events: {len(harvest)}, "
+          f"{report['year'].nunique()} years, {len(report)} report rows")
+    for dist_type, row in by_type.iterrows():
+        print(f"    {dist_type:<10} {int(row['n_events']):>8} events "
+              f"{row['area_ha']:>12,.1f} ha {row['volume_m3']:>14,.0f} m³")
+    n_no_curve = int(report["n_no_curve"].sum())
+    if n_no_curve:
+        print(f"  WARNING: {n_no_curve} events without a yield curve (volume 0)")
+    print(f"  Aggregated in {elapsed:.2f}s")
+
+    for path in write_report(report, output_dir, parquet=parquet):
+        print(f"  Wrote {path}")
+    return report
@@ -0,0 +1,250 @@
+"""
+instrumentation.py — Step & Function Instrumentation
+=====================================================
+Records, for every pipeline step and the main sub-functions decorated with
+@instrument:
+  - wall time and CPU time (seconds)
+  - peak RSS (MB) during the call and how far it rose above the RSS at
+    the start of the call
+  - input / output row counts (DataFrames, Series, arrays among the
+    arguments and the return value)
+
+RSS is the current resident set size, sampled every RSS_SAMPLE_SECONDS
+by a background thread while any measured call runs (/proc/self/statm,
+else psutil if installed, else not recorded). The process-lifetime
+high-water mark (ru_maxrss) would credit a step with the peak of any
+step before it.
+
+Records accumulate in RECORDS and are written by run_pipeline to the run
+manifest (OUTPUT_DIR/run_manifest.json).
+
+Optionally each step is profiled (configure(profiler="cprofile" or
+"pyinstrument")); profiles are written to PROFILE_DIR/<step>.prof
+(cProfile, open with pstats/snakeviz) or <step>.html (pyinstrument).
+pyinstrument is optional and only imported when selected.
+"""
+
+import functools
+import json
+import platform
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import OUTPUT_DIR
+
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+# Measurements of this process (list of dicts, in completion order)
+RECORDS = []
+
+# Step profiling (None = off)
+PROFILER = None
+PROFILE_DIR = OUTPUT_DIR / "profiles"
+
+MANIFEST_NAME = "run_manifest.json"
+
+# Interval of the RSS sampler thread
+RSS_SAMPLE_SECONDS = 0.02
+
+_stack = []
+_sampler = None
+_rss_lock = threading.Lock()
+
+
+def configure(profiler=None, profile_dir=None):
+    """Select the per-step profiler (None, 'cprofile' or 'pyinstrument')."""
+    global PROFILER, PROFILE_DIR
+    if profiler is not None and profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{profiler}'; expected one of {PROFILERS}")
+    if profiler == "pyinstrument":
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError:
+            raise ImportError("pyinstrument is not installed; use --profile cprofile") from None
+    PROFILER = profiler
+    if profile_dir is not None:
+        PROFILE_DIR = Path(profile_dir)
+
+
+def settings():
+    """Current configuration, to hand to worker processes."""
+    return {"profiler": PROFILER, "profile_dir": PROFILE_DIR}
+
+
+def reset():
+    """Clear the recorded measurements."""
+    RECORDS.clear()
+
+
+def _current_rss_mb():
+    """Current resident set size of this process in MB, or None if unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / 2**20
+
+
+def _sample_rss():
+    """Raise the running peak of every call on the stack to the current RSS."""
+    rss = _current_rss_mb()
+    if rss is not None:
+        with _rss_lock:
+            for record in _stack:
+                record["_rss_peak"] = max(record.get("_rss_peak", rss), rss)
+    return rss
+
+
+class _RssSampler(threading.Thread):
+    """Samples RSS while measured calls run (started by the outermost one)."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.pid = os.getpid()  # a forked worker starts its own
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(RSS_SAMPLE_SECONDS):
+            _sample_rss()
+
+
+def count_rows(obj):
+    """Rows in a DataFrame/Series/array, or summed over a tuple/list/dict of them."""
+    if isinstance(obj, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(obj)
+    if isinstance(obj, dict):
+        obj = list(obj.values())
+    if isinstance(obj, (tuple, list)):
+        counts = [count_rows(o) for o in obj]
+        counts = [c for c in counts if c is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+def _profile_call(name, fn, args, kwargs):
+    """Run fn under the configured profiler and write its dump."""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    if PROFILER == "pyinstrument":
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.stop()
+            path = PROFILE_DIR / f"{name}.html"
+            path.write_text(profiler.output_html())
+            _stack[-1]["profile"] = str(path)
+
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        path = PROFILE_DIR / f"{name}.prof"
+        profiler.dump_stats(path)
+        _stack[-1]["profile"] = str(path)
+
+
+def measure(name, fn, args=(), kwargs=None, kind="function"):
+    """
+    Call fn(*args, **kwargs) and record its cost.
+
+    kind="step" marks a pipeline step; steps are profiled when a profiler
+    is configured.
+    """
+    kwargs = kwargs or {}
+    record = {
+        "name": name,
+        "kind": kind,
+        "parent": _stack[-1]["name"] if _stack else None,
+        "depth": len(_stack),
+        "rows_in": count_rows(list(args) + list(kwargs.values())),
+    }
+    global _sampler
+    with _rss_lock:
+        _stack.append(record)
+    rss_before = _sample_rss()
+    if rss_before is not None and (_sampler is None or _sampler.pid != os.getpid()):
+        _sampler = _RssSampler()
+        _sampler.start()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        if kind == "step" and PROFILER is not None:
+            result = _profile_call(name, fn, args, kwargs)
+        else:
+            result = fn(*args, **kwargs)
+    finally:
+        _sample_rss()
+        with _rss_lock:
+            _stack.pop()
+            rss_peak = record.pop("_rss_peak", None)
+        if not _stack and _sampler is not None:
+            _sampler.stopped.set()
+            _sampler = None
+        record["wall_s"] = round(time.perf_counter() - wall, 4)
+        record["cpu_s"] = round(time.process_time() - cpu, 4)
+        record["rss_peak_mb"] = None if rss_peak is None else round(rss_peak, 1)
+        record["rss_peak_delta_mb"] = (
+            None if rss_peak is None else round(rss_peak - rss_before, 1)
+        )
+        RECORDS.append(record)
+    record["rows_out"] = count_rows(result)
+    return result
+
+
+def instrument(fn):
+    """Decorator: record every call of fn (see measure)."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return measure(name, fn, args, kwargs)
+
+    return wrapper
+
+
+def write_manifest(report, started, options=None, output_dir=OUTPUT_DIR):
+    """
+    Write the run manifest: step statuses from the runner plus every record.
+
+    Parameters:
+        report: list of step dicts from pipeline_dag.run_dag
+        started: datetime the run started
+        options: run options to store (CLI arguments)
+        output_dir: Directory to write MANIFEST_NAME to
+
+    Returns:
+        Path of the manifest
+    """
+    finished = datetime.now()
+    manifest = {
+        "started": started.isoformat(timespec="seconds"),
+        "finished": finished.isoformat(timespec="seconds"),
+        "wall_s": round((finished - started).total_seconds(), 3),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "options": {k: str(v) if isinstance(v, Path) else v for k, v in (options or {}).items()},
+        "profiler": PROFILER,
+        "steps": report,
+        "records": RECORDS,
+    }
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / MANIFEST_NAME
+    path.write_text(json.dumps(manifest, indent=2, default=str))
+    return path
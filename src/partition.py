@@ -0,0 +1,326 @@
+"""
+partition.py — Partitioned Execution of Steps 02-06
+====================================================
+For ownerships too large to process as one frame, stands are split into
+shards and steps 02-06 run per shard in a process pool. Each worker only
+holds its shard's slice of the inputs, and independent shards use separate
+cores.
+
+Shards are assigned per stand_key (all polygons, condition rows, schedule
+rows and stand-specific yield rows of a stand land in the same shard):
+  - "hash": CRC-32 of the stand_key modulo the shard count
+  - "tile": stands are binned into PARTITION_TILE_EXTENT-degree tiles by a
+    representative point, and whole tiles are dealt to shards in row-major
+    order so every shard covers a compact area with about the same number
+    of stands
+Yields2 (regen curves keyed by SI + species) is shared by every shard.
+
+Workers run the computations of each step (classifier assignment, current
+and regen curves, inventory join, event extraction / partial clearcuts /
+thinning %, transition rules) and return their frames. The merge then
+reconciles everything that is global in a single run and writes the
+outputs with the steps' own writers:
+  - stands, inventory and events are put back in single-run order
+  - classifier value lists are rebuilt from the merged stands
+  - yield curves are re-deduplicated and yield_curve_ids renumbered in
+    single-run order
+  - transition rules are deduplicated across shards (and compressed, if
+    requested, over all events)
+so the merged outputs are identical to an unpartitioned run.
+
+Worker output goes to PARTITION_DIR/shard_<i>.log.
+"""
+
+import contextlib
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+from config import CLASSIFIER_NAMES, PARTITION_DIR, PARTITION_TILE_EXTENT
+
+
+PARTITION_MODES = ("hash", "tile")
+
+# Input tables split by stand_key (Yields2 is shared)
+STAND_TABLES = ("condition_initial", "yields1", "yields3", "schedule")
+
+
+# =============================================================================
+# SHARD ASSIGNMENT
+# =============================================================================
+
+def hash_shards(keys, n_shards):
+    """Shard of each stand_key: CRC-32 modulo n_shards (stable across runs and hosts)."""
+    keys = pd.Series(keys)
+    return keys.map(lambda k: zlib.crc32(str(k).encode()) % n_shards).astype(int)
+
+
+def tile_shards(spatial, n_shards, tile_extent=PARTITION_TILE_EXTENT):
+    """
+    Shard of each stand_key by spatial tile.
+
+    Each stand is placed in the tile holding a representative point of its
+    first polygon; tiles are ordered row-major (south to north, west to east)
+    and cut into n_shards runs of about equal stand counts.
+
+    Returns:
+        Series of shard indexed by stand_key
+    """
+    first = spatial.drop_duplicates(subset=["STAND_KEY"])
+    points = first.geometry.representative_point()
+    tiles = pd.DataFrame({
+        "stand_key": first["STAND_KEY"].values,
+        "row": np.floor(points.y.values / tile_extent).astype(int),
+        "col": np.floor(points.x.values / tile_extent).astype(int),
+    })
+    counts = tiles.groupby(["row", "col"]).size()
+    # Shard of a tile: share of stands in the tiles before it
+    before = counts.cumsum() - counts
+    tile_shard = (before * n_shards // len(tiles)).rename("shard")
+    tiles = tiles.merge(tile_shard, left_on=["row", "col"], right_index=True)
+    return tiles.set_index("stand_key")["shard"].astype(int)
+
+
+def assign_shards(spatial, n_shards, by="hash", tile_extent=PARTITION_TILE_EXTENT):
+    """
+    Shard of every stand_key in the spatial layer.
+
+    Parameters:
+        spatial: GeoDataFrame from load_spatial()
+        n_shards: Number of shards
+        by: "hash" or "tile"
+        tile_extent: Tile size in degrees for by="tile"
+
+    Returns:
+        Series of shard indexed by stand_key
+    """
+    if by not in PARTITION_MODES:
+        raise ValueError(f"Unknown partition mode '{by}'; expected one of {PARTITION_MODES}")
+    if by == "tile":
+        return tile_shards(spatial, n_shards, tile_extent)
+    keys = spatial["STAND_KEY"].drop_duplicates()
+    return pd.Series(hash_shards(keys, n_shards).values, index=keys.values)
+
+
+def shards_of(keys, assignment, n_shards):
+    """Shard of each key; keys absent from the spatial layer fall back to the hash."""
+    keys = pd.Series(keys)
+    shard = keys.map(assignment)
+    missing = shard.isna()
+    if missing.any():
+        shard[missing] = hash_shards(keys[missing], n_shards)
+    return shard.astype(int).values
+
+
+def split_inputs(assignment, n_shards, spatial, condition_initial, yields1, yields2, yields3, schedule):
+    """
+    Split the step inputs into per-shard inputs.
+
+    Rows keep their index labels (and relative order), which the merge uses
+    to restore single-run order.
+
+    Returns:
+        dict of shard -> dict of input name -> frame, for non-empty shards
+    """
+    tables = {
+        "spatial": (spatial, "STAND_KEY"),
+        "condition_initial": (condition_initial, "stand_key"),
+        "yields1": (yields1, "stand_key"),
+        "yields3": (yields3, "stand_key"),
+        "schedule": (schedule, "stand_key"),
+    }
+    parts = {}
+    for name, (df, key_col) in tables.items():
+        shard = shards_of(df[key_col].values, assignment, n_shards)
+        parts[name] = dict(tuple(df.groupby(shard, sort=True)))
+
+    shards = {}
+    for i in sorted(parts["spatial"]):
+        shards[i] = {name: parts[name].get(i, tables[name][0].iloc[:0]) for name in tables}
+        shards[i]["yields2"] = yields2
+    return shards
+
+
+# =============================================================================
+# SHARD WORKER
+# =============================================================================
+
+def compute_shard(spatial, condition_initial, yields1, yields2, yields3, schedule):
+    """
+    Run the computations of steps 02-06 for one shard (nothing is written).
+
+    Returns:
+        dict with stands, curves, inventory, events and rules. stands and
+        inventory are indexed like spatial, curves carry a "_part" column
+        (0 = current, 1 = post_regen)
+    """
+    classifiers = import_module("02_classifiers")
+    yield_curves = import_module("03_yield_curves")
+    inventory = import_module("04_inventory")
+    disturbances = import_module("05_disturbances")
+    transitions = import_module("06_transitions")
+
+    # 02: one stand row per spatial row, in spatial order
+    stands = classifiers.assign_classifiers(spatial, condition_initial, yields1)
+    stands.index = spatial.index
+
+    # 03: deduplicated per shard; ids are assigned in the merge
+    current = yield_curves.build_current_yield_curves(stands, yields1, yields3)
+    regen = yield_curves.build_regen_yield_curves(stands, yields2)
+    curves = pd.concat([current.assign(_part=0), regen.assign(_part=1)], ignore_index=True)
+    if len(curves):
+        curves = yield_curves.deduplicate_curves(curves)
+
+    # 04: inventory rows follow spatial rows
+    inv = inventory.build_inventory(spatial.reset_index(drop=True), stands)
+    inv.index = spatial.index[inv.index]
+
+    # 05: everything but the spatial layers (written after the merge)
+    events = disturbances.extract_disturbance_events(schedule)
+    events = disturbances.classify_partial_clearcuts(events, condition_initial)
+    events = disturbances.calc_thinning_pct(events, yields1, yields3, yields2)
+
+    # 06
+    rules = transitions.build_transition_rules(events, stands)
+
+    return {"stands": stands, "curves": curves, "inventory": inv, "events": events, "rules": rules}
+
+
+def run_shard(shard, inputs, log_dir=PARTITION_DIR, settings=None):
+    """
+    Pool worker: compute one shard with its output in log_dir/shard_<i>.log.
+
+    Returns:
+        (shard, result of compute_shard, instrumentation records)
+    """
+    if settings is not None:
+        instrumentation.configure(**settings)
+    instrumentation.reset()
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    with open(log_dir / f"shard_{shard:03d}.log", "w") as log, contextlib.redirect_stdout(log):
+        result = instrumentation.measure(f"shard_{shard:03d}", compute_shard, kwargs=inputs)
+    records = list(instrumentation.RECORDS)
+    for record in records:
+        record["shard"] = shard
+    return shard, result, records
+
+
+# =============================================================================
+# MERGE
+# =============================================================================
+
+def merge_shards(results, spatial, compress=False):
+    """
+    Combine shard results into single-run outputs and write them.
+
+    Parameters:
+        results: list of compute_shard results (any order)
+        spatial: GeoDataFrame from load_spatial() (geometry for
+                 disturbances.gpkg)
+        compress: Write wildcard-compressed transition rules
+
+    Returns:
+        (stands, classifier_values, curves, inventory, events, events_geo, rules)
+        as returned by steps 02-06
+    """
+    classifiers = import_module("02_classifiers")
+    yield_curves = import_module("03_yield_curves")
+    inventory = import_module("04_inventory")
+    disturbances = import_module("05_disturbances")
+    transitions = import_module("06_transitions")
+
+    print("=" * 60)
+    print(f"partition: Merging {len(results)} shards")
+    print("=" * 60)
+
+    # 02: spatial order; value lists over all stands
+    stands = pd.concat([r["stands"] for r in results]).sort_index().reset_index(drop=True)
+    classifier_values = classifiers.build_classifier_csv(stands)
+
+    # 03: current curves then regen curves, each in stand order, as a
+    # single run emits them; duplicates across shards are dropped and
+    # ids renumbered by deduplicate_curves
+    stand_pos = pd.Series(np.arange(len(stands)), index=stands["stand_key"])
+    stand_pos = stand_pos[~stand_pos.index.duplicated()]
+    curves = pd.concat([r["curves"] for r in results if len(r["curves"])], ignore_index=True)
+    curves["_pos"] = curves["stand_key"].map(stand_pos)
+    curves = curves.sort_values(["_part", "_pos"], kind="stable")
+    curves = curves.drop(columns=["_part", "_pos", "yield_curve_id"]).reset_index(drop=True)
+    curves = yield_curves.deduplicate_curves(curves)
+    yield_curves.write_yield_curves(curves)
+
+    # 04
+    inv = pd.concat([r["inventory"] for r in results]).sort_index()
+    inventory.write_inventory(inv)
+
+    # 05: a stand's events come from one shard, already in schedule order
+    events = pd.concat([r["events"] for r in results])
+    events = events.sort_values(["stand_key", "year"], kind="stable")
+    events_geo = disturbances.build_spatial_disturbance_layers(events, spatial)
+
+    # 06: rules follow event (stand_key) order; same key -> first rule
+    rules = pd.concat([r["rules"] for r in results], ignore_index=True)
+    rules = rules.sort_values("src_stand_key", kind="stable").reset_index(drop=True)
+    dedup_cols = ["disturbance_type"] + [f"src_{c}" for c in CLASSIFIER_NAMES]
+    rules = rules[~pd.util.hash_pandas_object(rules[dedup_cols], index=False).duplicated()]
+    print(f"\n  Transition rules: {len(rules)}")
+    if compress:
+        rules = transitions.compress_transition_rules(rules, events, stands)
+    transitions.write_transition_rules(rules)
+
+    return stands, classifier_values, curves, inv, events, events_geo, rules
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def run(spatial, condition_initial, yields1, yields2, yields3, schedule, n_shards,
+        by="hash", workers=None, compress=False, log_dir=PARTITION_DIR):
+    """
+    Main entry point: steps 02-06 over n_shards shards.
+
+    Parameters:
+        spatial, condition_initial, yields1, yields2, yields3, schedule: ingest outputs
+        n_shards: Number of shards
+        by: "hash" or "tile" (see module docstring)
+        workers: Max worker processes (default: one per shard, capped at the CPU count)
+        compress: Write wildcard-compressed transition rules
+        log_dir: Directory for the per-shard logs
+
+    Returns:
+        (stands, classifier_values, curves, inventory, events, events_geo, rules)
+    """
+    print("=" * 60)
+    print(f"partition: Running steps 02-06 on {n_shards} shards (by {by})")
+    print("=" * 60)
+
+    assignment = assign_shards(spatial, n_shards, by=by)
+    shards = split_inputs(assignment, n_shards, spatial, condition_initial,
+                          yields1, yields2, yields3, schedule)
+    sizes = pd.Series(assignment).value_counts()
+    print(f"\n  Stands per shard: min {sizes.min()}, max {sizes.max()} "
+          f"({len(shards)} non-empty shards)")
+
+    n_workers = min(len(shards), workers or os.cpu_count() or 1)
+    print(f"  Worker processes: {n_workers}")
+    results = {}
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = [
+            pool.submit(run_shard, i, inputs, log_dir, instrumentation.settings())
+            for i, inputs in shards.items()
+        ]
+        for future in futures:
+            shard, result, records = future.result()
+            results[shard] = result
+            instrumentation.RECORDS.extend(records)
+    print(f"  Shard logs: {log_dir}\n")
+
+    return merge_shards([results[i] for i in sorted(results)], spatial, compress=compress)
@@ -0,0 +1,463 @@
+"""
+pipeline_dag.py — Incremental Pipeline Runner
+=============================================
+Declares the pipeline as a dependency graph of steps and reruns only the
+steps whose inputs changed.
+
+Each Step names:
+  - deps: upstream artifacts it consumes (passed to fn in order)
+  - provides: artifacts it returns (one name, or several for a tuple)
+  - files: source files it reads, as config attribute names
+  - modules: step modules whose source and config constants it depends on
+  - params: run options (e.g. compress_rules)
+  - outputs: files/directories it writes under OUTPUT_DIR
+
+A step's cache key is a SHA-256 over its name, module sources, the config
+constants those modules import, its params, the contents of its source
+files and the content hashes of its upstream artifacts. Outputs are cached
+under PIPELINE_CACHE_DIR/<step>/<key>/ (pickled artifacts + copies of the
+output files). On a rerun a step whose key is cached is not executed: its
+output files are restored if they differ and its artifacts are only
+unpickled if a stale downstream step needs them. Because artifacts are
+keyed by content, a step that reruns with an identical result does not
+invalidate its dependents.
+
+Example: editing the schedule workbook changes the ingest_schedule key,
+so 05, 06, 07 and 08 rerun while spatial/yield/condition ingest, 02, 03
+and 04 come from the cache.
+
+With jobs > 1, independent stale steps (e.g. 03, 04 and 05 once 02 is
+done) run concurrently in worker processes. DataFrames are passed with
+pickle protocol 5, their column buffers in shared memory rather than in
+the pickle stream.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from importlib import import_module
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+import config
+import instrumentation
+from config import OUTPUT_DIR, PIPELINE_CACHE_DIR, PIPELINE_CACHE_KEEP
+
+
+# Sidecar files hashed together with a shapefile
+SHAPEFILE_SUFFIXES = [".shp", ".shx", ".dbf", ".prj", ".cpg"]
+
+# POSIX shared memory outlives the handle that created it; Windows named
+# shared memory does not, so workers there return results in the pickle
+PERSISTENT_SHARED_MEMORY = os.name != "nt"
+
+
+class Step:
+    """One node of the pipeline graph (see module docstring)."""
+
+    def __init__(self, name, fn, deps=(), provides=(), files=(), modules=(),
+                 params=None, outputs=(), cache=True):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.provides = [provides] if isinstance(provides, str) else list(provides)
+        self.files = list(files)
+        self.modules = list(modules)
+        self.params = dict(params or {})
+        self.outputs = list(outputs)
+        self.cache = cache
+
+    def __repr__(self):
+        return f"Step({self.name!r})"
+
+
+# =============================================================================
+# HASHING
+# =============================================================================
+
+def _sha256_file(path, digest=None):
+    digest = digest or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest
+
+
+def hash_source_file(path):
+    """Content hash of a source file (a shapefile includes its sidecars)."""
+    path = Path(path)
+    paths = [path]
+    if path.suffix.lower() == ".shp":
+        paths = [path.with_suffix(s) for s in SHAPEFILE_SUFFIXES if path.with_suffix(s).exists()]
+    digest = hashlib.sha256()
+    for p in paths:
+        digest.update(p.name.encode())
+        _sha256_file(p, digest)
+    return digest.hexdigest()
+
+
+def hash_artifact(value):
+    """Content hash of an in-memory artifact (its pickle)."""
+    return hashlib.sha256(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+def _module_fingerprint(module_name):
+    """Source of a step module plus the config constants it imports."""
+    module = import_module(module_name)
+    source = Path(module.__file__).read_bytes()
+    constants = {
+        name: repr(getattr(module, name))
+        for name in dir(config)
+        if name.isupper() and hasattr(module, name)
+    }
+    return hashlib.sha256(source).hexdigest(), constants
+
+
+def step_key(step, artifact_hashes, file_hashes):
+    """Cache key of a step given the hashes of everything it reads."""
+    payload = {
+        "step": step.name,
+        "modules": {m: _module_fingerprint(m) for m in step.modules},
+        "params": {k: repr(v) for k, v in sorted(step.params.items())},
+        "files": {f: file_hashes[f] for f in step.files},
+        "deps": {d: artifact_hashes[d] for d in step.deps},
+    }
+    blob = json.dumps(payload, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()[:20]
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+def _output_files(output_dir, outputs):
+    """Expand declared outputs (files or directories) to existing files."""
+    files = []
+    for name in outputs:
+        path = output_dir / name
+        if path.is_dir():
+            files.extend(p for p in sorted(path.rglob("*")) if p.is_file())
+        elif path.exists():
+            files.append(path)
+    return files
+
+
+def _save_entry(entry, step, value, output_dir, seconds):
+    """Store a step's artifacts and output files; return the artifact hashes."""
+    tmp = entry.with_name(entry.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    (tmp / "files").mkdir(parents=True)
+
+    values = _split_value(step, value)
+    hashes = {}
+    for name, part in values.items():
+        blob = pickle.dumps(part, protocol=pickle.HIGHEST_PROTOCOL)
+        hashes[name] = hashlib.sha256(blob).hexdigest()
+        (tmp / f"{name}.pkl").write_bytes(blob)
+
+    files = {}
+    for path in _output_files(output_dir, step.outputs):
+        rel = path.relative_to(output_dir).as_posix()
+        dest = tmp / "files" / rel
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(path, dest)
+        files[rel] = _sha256_file(path).hexdigest()
+
+    meta = {"step": step.name, "artifacts": hashes, "files": files, "seconds": round(seconds, 3)}
+    (tmp / "meta.json").write_text(json.dumps(meta, indent=2))
+    if entry.exists():
+        shutil.rmtree(entry)
+    tmp.rename(entry)
+    return hashes
+
+
+def _restore_outputs(entry, meta, output_dir):
+    """Copy cached output files back where they differ from OUTPUT_DIR."""
+    restored = 0
+    for rel, digest in meta["files"].items():
+        dest = output_dir / rel
+        if dest.exists() and _sha256_file(dest).hexdigest() == digest:
+            continue
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(entry / "files" / rel, dest)
+        restored += 1
+    return restored
+
+
+def _prune(step_dir, keep):
+    """Keep only the `keep` most recently used entries of a step."""
+    entries = sorted(
+        (p for p in step_dir.iterdir() if p.is_dir() and not p.name.endswith(".tmp")),
+        key=lambda p: p.stat().st_mtime, reverse=True,
+    )
+    for old in entries[keep:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def _split_value(step, value):
+    if len(step.provides) == 0:
+        return {}
+    if len(step.provides) == 1:
+        return {step.provides[0]: value}
+    return dict(zip(step.provides, value))
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+def topological_order(steps):
+    """Order steps so each comes after the producers of its deps."""
+    producer = {a: s.name for s in steps for a in s.provides}
+    by_name = {s.name: s for s in steps}
+    order, state = [], {}
+
+    def visit(step):
+        if state.get(step.name) == "done":
+            return
+        if state.get(step.name) == "visiting":
+            raise ValueError(f"Dependency cycle at step {step.name}")
+        state[step.name] = "visiting"
+        for dep in step.deps:
+            if dep not in producer:
+                raise ValueError(f"Step {step.name} needs '{dep}', which no step provides")
+            visit(by_name[producer[dep]])
+        state[step.name] = "done"
+        order.append(step)
+
+    for step in steps:
+        visit(step)
+    return order
+
+
+def run_dag(steps, use_cache=True, cache_dir=PIPELINE_CACHE_DIR, output_dir=OUTPUT_DIR,
+            keep=PIPELINE_CACHE_KEEP, jobs=1):
+    """
+    Run the steps, reusing cached results for steps whose key is unchanged.
+
+    With jobs > 1, steps whose dependencies are complete run concurrently in
+    a process pool; their arguments and results travel through shared
+    memory (see export_value). Steps only start once their inputs exist, so
+    the outputs are the same as a serial run.
+
+    Parameters:
+        steps: list of Step
+        use_cache: If False, run every step (results are still cached)
+        cache_dir: Root of the step cache
+        output_dir: Directory the declared step outputs live in
+        keep: Cache entries kept per step
+        jobs: Max steps running at once (1 = serial, in this process)
+
+    Returns:
+        (artifacts, report): dict of artifact name -> value (loaded lazily
+        for cached steps, so only what downstream steps used is present),
+        and a list of {step, status, key, seconds} dicts
+    """
+    cache_dir = Path(cache_dir)
+    output_dir = Path(output_dir)
+    order = topological_order(steps)
+    producer = {a: s.name for s in order for a in s.provides}
+
+    # Source files are hashed once per run
+    file_hashes = {}
+    for step in order:
+        for name in step.files:
+            if name not in file_hashes:
+                file_hashes[name] = hash_source_file(getattr(config, name))
+
+    values = {}          # artifact -> value (loaded)
+    locations = {}       # artifact -> cache entry holding its pickle
+    artifact_hashes = {}
+    report = []
+    done = set()
+
+    def load(name):
+        if name not in values:
+            with open(locations[name] / f"{name}.pkl", "rb") as f:
+                values[name] = pickle.load(f)
+        return values[name]
+
+    def finish(step, key, entry, start, status):
+        done.add(step.name)
+        report.append({
+            "step": step.name,
+            "status": status,
+            "key": key,
+            "seconds": round(time.perf_counter() - start, 3),
+        })
+
+    def store(step, key, entry, start, value):
+        seconds = time.perf_counter() - start
+        if step.cache:
+            hashes = _save_entry(entry, step, value, output_dir, seconds)
+            for name in hashes:
+                locations[name] = entry
+            _prune(entry.parent, keep)
+        else:
+            hashes = {name: hash_artifact(part) for name, part in _split_value(step, value).items()}
+        artifact_hashes.update(hashes)
+        values.update(_split_value(step, value))
+        finish(step, key, entry, start, "ran")
+
+    pending = list(order)
+    running = {}         # future -> (step, key, entry, start, input shared memory)
+    pool = None
+    if jobs > 1:
+        # Workers share this tracker, so blocks created on one side and
+        # unlinked on the other are registered exactly once
+        if PERSISTENT_SHARED_MEMORY:
+            resource_tracker.ensure_running()
+        pool = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        while pending or running:
+            ready = [s for s in pending if all(producer[d] in done for d in s.deps)]
+            for step in ready:
+                pending.remove(step)
+                key = step_key(step, artifact_hashes, file_hashes)
+                entry = cache_dir / step.name / key
+                meta_path = entry / "meta.json"
+                start = time.perf_counter()
+
+                if step.cache and use_cache and meta_path.exists():
+                    meta = json.loads(meta_path.read_text())
+                    restored = _restore_outputs(entry, meta, output_dir)
+                    artifact_hashes.update(meta["artifacts"])
+                    for name in meta["artifacts"]:
+                        locations[name] = entry
+                    entry.touch()
+                    finish(step, key, entry, start,
+                           "cached" + (f" (restored {restored} files)" if restored else ""))
+                    continue
+
+                args = [load(dep) for dep in step.deps]
+                if pool is None:
+                    store(step, key, entry, start,
+                          instrumentation.measure(step.name, step.fn, args, kind="step"))
+                else:
+                    payload, shm = export_value(args)
+                    future = pool.submit(
+                        _run_step, step.name, step.fn, payload, instrumentation.settings()
+                    )
+                    running[future] = (step, key, entry, start, shm)
+
+            if running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step, key, entry, start, shm = running.pop(future)
+                    _release(shm)
+                    out, records = future.result()
+                    instrumentation.RECORDS.extend(records)
+                    store(step, key, entry, start, import_value(out, unlink=True))
+    finally:
+        for *_, shm in running.values():
+            _release(shm)
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    return _LazyArtifacts(values, load, locations), report
+
+
+# =============================================================================
+# SHARED-MEMORY TRANSPORT
+# =============================================================================
+
+def export_value(value):
+    """
+    Serialize a value for another process with its array data in shared memory.
+
+    Pickle protocol 5 hands the NumPy buffers behind DataFrame/array columns
+    out of band; they are copied once into a single SharedMemory block and
+    only the small pickle stream (object columns, structure) is sent.
+
+    Returns:
+        (payload, shm): picklable payload for import_value, and the
+        SharedMemory block (None if the value has no out-of-band buffers)
+        that the caller releases once the receiver has read it
+    """
+    buffers = []
+    data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+    raws = [b.raw() for b in buffers]
+    sizes = [r.nbytes for r in raws]
+    shm = None
+    if sum(sizes):
+        shm = shared_memory.SharedMemory(create=True, size=sum(sizes))
+        offset = 0
+        for raw, size in zip(raws, sizes):
+            shm.buf[offset:offset + size] = raw
+            offset += size
+    for raw in raws:
+        raw.release()
+    return {"data": data, "shm": shm.name if shm else None, "sizes": sizes}, shm
+
+
+def import_value(payload, unlink=False):
+    """Rebuild a value from export_value's payload (copying out of shared memory)."""
+    if payload["shm"] is None:
+        return pickle.loads(payload["data"], buffers=[b"" for _ in payload["sizes"]])
+    shm = shared_memory.SharedMemory(name=payload["shm"])
+    try:
+        buffers, offset = [], 0
+        for size in payload["sizes"]:
+            with shm.buf[offset:offset + size] as view:
+                buffers.append(bytearray(view))
+            offset += size
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+    return pickle.loads(payload["data"], buffers=buffers)
+
+
+def _release(shm):
+    if shm is not None:
+        shm.close()
+        shm.unlink()
+
+
+def _run_step(name, fn, payload, settings):
+    """Pool worker: run one step on shared-memory arguments, export its result."""
+    instrumentation.configure(**settings)
+    instrumentation.reset()
+    value = instrumentation.measure(name, fn, import_value(payload), kind="step")
+    records = list(instrumentation.RECORDS)
+    if not PERSISTENT_SHARED_MEMORY:
+        return {"data": pickle.dumps(value, protocol=5), "shm": None, "sizes": []}, records
+    out, shm = export_value(value)
+    if shm is not None:
+        shm.close()  # the parent reads and unlinks it
+    return out, records
+
+
+class _LazyArtifacts(dict):
+    """Artifact dict that unpickles cached artifacts on first access."""
+
+    def __init__(self, values, load, locations):
+        super().__init__(values)
+        self._load = load
+        self._locations = locations
+
+    def __missing__(self, name):
+        if name not in self._locations:
+            raise KeyError(name)
+        value = self._load(name)
+        self[name] = value
+        return value
+
+    def __contains__(self, name):
+        return super().__contains__(name) or name in self._locations
+
+
+def print_report(report):
+    """Print which steps ran and which came from the cache."""
+    print("\n" + "=" * 60)
+    print("Pipeline steps")
+    print("=" * 60)
+    for row in report:
+        print(f"  {row['step']:<20} {row['status']:<28} {row['seconds']:>8.2f}s")
+    n_ran = sum(1 for r in report if r["status"] == "ran")
+    print(f"  {n_ran} ran, {len(report) - n_ran} cached")
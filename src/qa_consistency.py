@@ -0,0 +1,274 @@
+"""
+qa_consistency.py — Transition Rule / Yield Curve Consistency (pre-GCBM QA)
+=============================================================================
+Checks that every classifier set GCBM can be asked to grow has a yield
+curve, before a run fails on it hours in:
+  - the classifier set of every inventory record (inventory.gpkg)
+  - the target classifier set of every transition rule
+    (transition_rules.csv), where a "?" target keeps the source value
+
+A "?" in yield_curves.csv matches any value. A "?" target over a "?"
+source is unknown until the rule fires, so such wildcard rules are
+expanded against the concrete source states they can match: every event
+of disturbance_events.csv at the inventory state of its stand (the
+sources 06_transitions builds rules from), and at the state the replay of
+the record's earlier events leaves it in (qa_volume_sim). Each distinct
+target state a wildcard rule resolves one of them to is checked, so
+--compress-rules reports the failures of the uncompressed table. Wildcard
+rules no event fires cannot be checked and are only counted, and the
+replay is skipped for tables without wildcard targets.
+
+The curve classifier sets are hashed into int64 codes (StateCodec from
+qa_volume_sim.py), with one hash index per wildcard pattern of the curves.
+Each lookup is one probe per pattern rather than a scan of the curves.
+
+Output: OUTPUT_DIR/qa/unresolved_states.csv — one row per unresolved
+inventory classifier set (with its record count) or rule target state
+
+Usage:
+    python qa_consistency.py [--output-dir DIR]
+"""
+
+import argparse
+import time
+from importlib import import_module
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import OUTPUT_DIR, QA_DIR_NAME, CLASSIFIER_NAMES, WILDCARD
+from instrumentation import instrument
+from qa_volume_sim import StateCodec, record_events, resolve_event_states
+
+
+UNRESOLVED_COLUMNS = ["check", "rule", "disturbance_type", "n_records"] + CLASSIFIER_NAMES
+
+
+def _mask_groups(masks):
+    """Distinct rows of a bool (n, len(CLASSIFIER_NAMES)) array and the row positions of each."""
+    bits = masks.astype(np.int64) @ (1 << np.arange(masks.shape[1], dtype=np.int64))
+    _, first, inverse = np.unique(bits, return_index=True, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    groups = np.split(order, np.cumsum(np.bincount(inverse))[:-1])
+    return [(masks[f], rows) for f, rows in zip(first, groups)]
+
+
+# =============================================================================
+# CURVE INDEX
+# =============================================================================
+
+class CurveIndex:
+    """
+    Hashed index over the classifier sets of the yield curves, one hash
+    index of int64 codes per wildcard pattern ("?" positions) of the curves.
+    """
+
+    def __init__(self, curves, codec):
+        self.codec = codec
+        self.value_codes = codec.value_codes(curves)
+        # codec holds every curve value, so only "?" has no code
+        self.patterns = _mask_groups(self.value_codes < 0)
+        self._indexes = {}
+
+    def _index(self, pattern, rows, free):
+        """Index of the curve codes with pattern and free classifiers left out."""
+        mask = pattern | free
+        key = (tuple(mask), id(rows))
+        if key not in self._indexes:
+            codes = self.codec.combine(self.value_codes[rows], mask)
+            self._indexes[key] = pd.Index(pd.unique(codes))
+        return self._indexes[key]
+
+    def lookup(self, value_codes, free=None):
+        """
+        Whether each classifier set has a curve.
+
+        Parameters:
+            value_codes: (n, len(CLASSIFIER_NAMES)) array from StateCodec.value_codes
+            free: Optional (n, len(CLASSIFIER_NAMES)) bool array of
+                  classifiers any curve value satisfies
+
+        Returns:
+            bool array of length n
+        """
+        if free is None:
+            free = np.zeros(value_codes.shape, dtype=bool)
+        found = np.zeros(len(value_codes), dtype=bool)
+        for f, sel in _mask_groups(free):
+            for pattern, rows in self.patterns:
+                codes = self.codec.combine(value_codes[sel], pattern | f)
+                hit = self._index(pattern, rows, f).get_indexer(codes) >= 0
+                found[sel] |= hit & (codes >= 0)
+        return found
+
+
+# =============================================================================
+# CHECKS
+# =============================================================================
+
+def rule_targets(rules):
+    """
+    Target classifier set of every rule: "?" targets take the source
+    value, and stay "?" (free) where the source is "?" too.
+    """
+    return pd.DataFrame({
+        c: rules[f"tgt_{c}"].where(rules[f"tgt_{c}"] != WILDCARD, rules[f"src_{c}"]).astype(str)
+        for c in CLASSIFIER_NAMES
+    })
+
+
+@instrument
+def check_inventory(inventory, index):
+    """Inventory classifier sets without a curve, with their record counts."""
+    found = index.lookup(index.codec.value_codes(inventory))
+    missing = inventory.loc[~found, CLASSIFIER_NAMES].astype(str)
+    counts = missing.groupby(CLASSIFIER_NAMES, sort=False).size().rename("n_records")
+    out = counts.reset_index()
+    out["check"] = "inventory"
+    out["rule"] = None
+    out["disturbance_type"] = None
+    return out[UNRESOLVED_COLUMNS]
+
+
+def rule_firings(events, inventory, rules, codec):
+    """
+    Distinct (rule, target state code) pairs the events fire: each record
+    event at the state the replay of its earlier events leaves it in
+    (qa_volume_sim.resolve_event_states), and each event at the inventory
+    state of its stand (the sources 06_transitions builds rules from).
+
+    Parameters:
+        rules: 06_transitions.RuleIndex of the transition rules
+    """
+    replay = resolve_event_states(record_events(events, inventory), codec.encode(inventory), rules, codec)
+
+    stands = inventory.drop_duplicates("stand_key")
+    stand_state = pd.Series(codec.encode(stands), index=stands["stand_key"].astype(str).values)
+    at_stand = events[["disturbance_type", "stand_key"]].astype(str)
+    at_stand = at_stand[at_stand["stand_key"].isin(stand_state.index)]
+    pairs = pd.DataFrame({
+        "disturbance_type": at_stand["disturbance_type"].values,
+        "state": stand_state.loc[at_stand["stand_key"]].values,
+    }).drop_duplicates(ignore_index=True)
+    initial = resolve_event_states(
+        pairs.assign(row=np.arange(len(pairs)), rank=0), pairs["state"].to_numpy(), rules, codec
+    )
+
+    fired = pd.concat([replay[["rule", "tgt"]], initial[["rule", "tgt"]]], ignore_index=True)
+    return fired[fired["rule"] >= 0].drop_duplicates(ignore_index=True)
+
+
+@instrument
+def check_rules(rules, events, inventory, index):
+    """
+    Transition rules whose target classifier set has no curve.
+
+    Rules with a "?" target over a "?" source are expanded: each target
+    state an event fires them to (rule_firings) is checked. The events are
+    only replayed when the table has such rules.
+
+    Returns:
+        (DataFrame with UNRESOLVED_COLUMNS, number of wildcard rules no
+        event fires)
+    """
+    targets = rule_targets(rules)
+    wild = targets.eq(WILDCARD).to_numpy().any(axis=1)
+
+    fixed = np.flatnonzero(~wild)
+    found = index.lookup(index.codec.value_codes(targets.iloc[fixed]))
+    out = targets.iloc[fixed[~found]].copy()
+    out["rule"] = fixed[~found]
+
+    n_unresolved = 0
+    if wild.any():
+        rule_index = import_module("06_transitions").RuleIndex(rules)
+        fired = rule_firings(events, inventory, rule_index, index.codec)
+        fired = fired[wild[fired["rule"].to_numpy(np.int64)]]
+        tgt = fired["tgt"].to_numpy(np.int64)
+        found = index.lookup(index.codec.split(tgt))
+        expanded = index.codec.decode(tgt[~found])
+        expanded["rule"] = fired["rule"].to_numpy(np.int64)[~found]
+        out = pd.concat([out, expanded], ignore_index=True)
+        n_unresolved = int(wild.sum()) - fired["rule"].nunique()
+
+    out["rule"] = out["rule"].astype(np.int64)
+    out["check"] = "transition_rule"
+    out["disturbance_type"] = rules["disturbance_type"].values[out["rule"].values]
+    out["n_records"] = None
+    out = out.sort_values("rule", kind="stable")[UNRESOLVED_COLUMNS].reset_index(drop=True)
+    return out, n_unresolved
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def run(curves, inventory, events, rules, qa_dir=OUTPUT_DIR / QA_DIR_NAME):
+    """
+    Main entry point.
+
+    Parameters:
+        curves: DataFrame in yield_curves.csv layout (03_yield_curves)
+        inventory: (Geo)DataFrame in inventory.gpkg layout (04_inventory)
+        events: DataFrame in disturbance_events.csv layout (05_disturbances)
+        rules: DataFrame in transition_rules.csv layout (06_transitions)
+        qa_dir: Directory for the report
+
+    Returns:
+        DataFrame with UNRESOLVED_COLUMNS (also written to
+        qa_dir/unresolved_states.csv)
+    """
+    print("=" * 60)
+    print("qa_consistency: Checking inventory and transition targets against yield curves")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    codec = StateCodec([curves, inventory, rules])
+    index = CurveIndex(curves, codec)
+    unresolved_rules, n_unfired = check_rules(rules, events, inventory, index)
+    unresolved = pd.concat([check_inventory(inventory, index), unresolved_rules], ignore_index=True)
+    elapsed = time.perf_counter() - start
+
+    n_inv = unresolved.loc[unresolved["check"] == "inventory", "n_records"].sum()
+    rule_rows = unresolved[unresolved["check"] == "transition_rule"]
+    n_rules = rule_rows["rule"].nunique()
+    print(f"\n  Curves: {len(curves)} rows, {len(index.patterns)} wildcard patterns")
+    print(f"  Inventory records without a curve: {int(n_inv)} of {len(inventory)}")
+    print(f"  Transition rules whose target has no curve: {n_rules} of {len(rules)} "
+          f"({len(rule_rows)} target states)")
+    if n_unfired:
+        print(f"  Wildcard rules no event fires (not checked): {n_unfired}")
+    print(f"  Checked in {elapsed:.2f}s")
+
+    qa_dir = Path(qa_dir)
+    qa_dir.mkdir(parents=True, exist_ok=True)
+    out_path = qa_dir / "unresolved_states.csv"
+    unresolved.to_csv(out_path, index=False)
+    print(f"  Wrote {out_path}")
+    return unresolved
+
+
+def load_outputs(output_dir=OUTPUT_DIR):
+    """Read the pipeline outputs run() needs from output_dir."""
+    import geopandas as gpd
+
+    output_dir = Path(output_dir)
+    return {
+        "curves": pd.read_csv(output_dir / "yield_curves.csv", dtype={c: str for c in CLASSIFIER_NAMES}),
+        "inventory": gpd.read_file(output_dir / "inventory.gpkg", ignore_geometry=True),
+        "events": pd.read_csv(output_dir / "disturbance_events.csv"),
+        "rules": pd.read_csv(output_dir / "transition_rules.csv", dtype=str).astype(
+            {"reset_age": int}
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check inventory and transition rule targets against the yield curves"
+    )
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR,
+                        help="Pipeline output directory to check (e.g. a scenario directory)")
+    args = parser.parse_args()
+    run(**load_outputs(args.output_dir), qa_dir=args.output_dir / QA_DIR_NAME)
@@ -0,0 +1,359 @@
+"""
+qa_reconcile.py — Schedule vs. Condition Reconciliation (pre-GCBM QA)
+=======================================================================
+The Condition workbook holds every stand's projected state for PERIOD
+0-PROJECTION_LENGTH, but the pipeline only uses PERIOD 0. This module
+replays the management schedule from each stand's period-0 condition and
+checks that the Condition file's projected periods match it, catching
+scheduling-model export errors before GCBM runs.
+
+Conventions of the Condition workbook (IWC_Boothill_Condition.xlsx with
+the DRAFT6 schedule):
+  - PERIOD p is YEAR SIM_START_YEAR + p - 1 (PERIOD 0 has YEAR 0)
+  - AGE at PERIOD p is the age at the end of the period: a schedule
+    action's AGE (the age it is applied at) is the Condition AGE of PERIOD
+    p - 1, and the Condition AGE of PERIOD p is one more
+  - an AGE_RESTART_ACTIONS action (clearcut, site prep, planting) sets
+    AGE to 1 in its own period, so a clearcut followed by aSP and aPLT
+    reads 1, 1, 1, 2, ...; a cutover stand planted in PERIOD 2 reads
+    1, 1, 1, 2, ... from PERIOD 0
+  - a thinning or fertilization action sets its Condition column
+    (ACTION_TO_CONDITION_COLUMN) to the action's AGE from its period on;
+    the columns return to 0 at a clearcut
+  - AREA stays the period-0 AREA, unless a clearcut takes only part of
+    the stand: the stand then has one Condition row per parcel (several
+    rows per PERIOD), the cut parcel restarting at AGE 1 with the cut AREA;
+    parcels clearcut in the same period become one parcel
+
+Checks of stands with one Condition row per period: AGE, the
+ACTION_TO_CONDITION_COLUMN columns, YEAR and AREA of every period against
+the replay. Stands split into parcels are not replayed; the parcel AREAs
+of every period must add up to the period-0 AREA. For every stand, each
+schedule action must have a Condition row of the previous period at its
+AGE, and a harvest (aHCC, aHTHIN1/2) a row of its period with its AREA
+(the clearcuts of a period summed), within RECONCILE_AREA_TOLERANCE.
+
+The Condition table is indexed by (stand_key, PERIOD) as int64 keys
+(stand code x periods + PERIOD). The replay is a forward fill over the
+stand-sorted rows, so every check covers all stands and periods at once.
+
+Output: OUTPUT_DIR/qa/reconciliation_mismatches.csv, one row per mismatch
+
+Usage:
+    python qa_reconcile.py [--schedule SCHEDULE.xlsx] [--output-dir DIR]
+"""
+
+import argparse
+import time
+from importlib import import_module
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    OUTPUT_DIR,
+    QA_DIR_NAME,
+    SCHEDULE_XLSX,
+    SIM_START_YEAR,
+    ACTION_TO_CONDITION_COLUMN,
+    AGE_RESTART_ACTIONS,
+    HARVEST_ACTIONS,
+    RECONCILE_AREA_TOLERANCE,
+)
+from instrumentation import instrument
+
+
+MISMATCH_COLUMNS = ["stand_key", "PERIOD", "YEAR", "check", "ACTION", "expected", "actual"]
+
+
+def _year(period):
+    """YEAR of PERIOD (0 for PERIOD 0)."""
+    period = np.asarray(period)
+    return np.where(period == 0, 0, SIM_START_YEAR + period - 1)
+
+
+# =============================================================================
+# CONDITION INDEX
+# =============================================================================
+
+class ConditionIndex:
+    """
+    The Condition table keyed by (stand_key, PERIOD) as int64 keys.
+
+    Stands with one row per period are held sorted in rows (one key each);
+    stands with several rows in some period (split into parcels by a
+    partial clearcut) in parcels.
+    """
+
+    def __init__(self, condition):
+        stand_code, self.stands = pd.factorize(condition["stand_key"])
+        self.n_periods = int(condition["PERIOD"].max()) + 1
+        keys = stand_code.astype(np.int64) * self.n_periods + condition["PERIOD"].to_numpy(np.int64)
+        order = np.argsort(keys, kind="stable")
+        keys, stand_code = keys[order], stand_code[order]
+        condition = condition.iloc[order].reset_index(drop=True)
+
+        repeated = np.r_[False, keys[1:] == keys[:-1]]
+        self.parcel_stand = np.zeros(len(self.stands), dtype=bool)
+        self.parcel_stand[stand_code[repeated]] = True
+        single = ~self.parcel_stand[stand_code]
+
+        self.all_keys = keys
+        self.all_rows = condition
+        self.parcels = condition[~single]
+        self.rows = condition[single].reset_index(drop=True)
+        self.keys = pd.Index(keys[single])
+        self.stand = stand_code[single].astype(np.int64)
+        self.period = self.rows["PERIOD"].to_numpy(np.int64)
+        # Position of each stand's first row
+        self.stand_start = np.r_[True, self.stand[1:] != self.stand[:-1]]
+
+        # (stand_key, PERIOD, AGE) of every row, for the action ages
+        self.max_age = int(condition["AGE"].max()) + 1
+        self._age_keys = pd.Index(np.unique(keys * self.max_age + condition["AGE"].to_numpy(np.int64)))
+
+    def key(self, stand_key, period):
+        """int64 keys for stand_key/PERIOD arrays (-1 for stands or periods not in the Condition file)."""
+        code = self.stands.get_indexer(stand_key).astype(np.int64)
+        period = np.asarray(period, dtype=np.int64)
+        keys = code * self.n_periods + period
+        keys[(code < 0) | (period < 0) | (period >= self.n_periods)] = -1
+        return keys
+
+    def lookup(self, stand_key, period):
+        """Position in rows of each (stand_key, PERIOD) (-1 if absent or a parcel stand)."""
+        keys = self.key(stand_key, period)
+        pos = self.keys.get_indexer(keys)
+        pos[keys < 0] = -1
+        return pos
+
+    def has_age(self, stand_key, period, age):
+        """Whether (stand_key, PERIOD) has a Condition row (a parcel) at each AGE."""
+        keys = self.key(stand_key, period)
+        age = np.asarray(age, dtype=np.int64)
+        hit = self._age_keys.get_indexer(keys * self.max_age + age) >= 0
+        return hit & (keys >= 0) & (age >= 0) & (age < self.max_age)
+
+    def fill_forward(self, values):
+        """Carry non-NaN values forward within each stand of rows (first rows must be set)."""
+        filled = np.where(np.isnan(values), -1, np.arange(len(values)))
+        return values[np.maximum.accumulate(filled)]
+
+
+# =============================================================================
+# REPLAY
+# =============================================================================
+
+@instrument
+def replay(index, schedule):
+    """
+    Condition columns implied by the schedule for every row of the
+    stands with one Condition row per period.
+
+    Parameters:
+        index: ConditionIndex
+        schedule: Schedule DataFrame (01_ingest.load_schedule)
+
+    Returns:
+        dict of Condition column -> expected values aligned to index.rows
+    """
+    rows = index.rows
+    n = len(rows)
+    start = index.stand_start
+
+    # Age restarts at 1 in the period of a clearcut, site prep or planting
+    restarts = schedule[schedule["ACTION"].isin(AGE_RESTART_ACTIONS)]
+    restart = index.lookup(restarts["stand_key"], restarts["PERIOD"].to_numpy())
+    clearcut = restart[(restart >= 0) & (restarts["ACTION"] == "aHCC").to_numpy()]
+    restart = restart[restart >= 0]
+
+    # Period the stand's age counts from (AGE = PERIOD - born + 1)
+    born = np.full(n, np.nan)
+    born[start] = index.period[start] - rows["AGE"].to_numpy(float)[start] + 1
+    born[restart] = index.period[restart]
+    expected = {
+        "YEAR": _year(index.period),
+        "AGE": index.period - index.fill_forward(born) + 1,
+        "AREA": index.fill_forward(np.where(start, rows["AREA"].to_numpy(float), np.nan)),
+    }
+
+    for action, column in ACTION_TO_CONDITION_COLUMN.items():
+        acts = schedule[schedule["ACTION"] == action]
+        at = index.lookup(acts["stand_key"], acts["PERIOD"].to_numpy())
+        values = np.full(n, np.nan)
+        values[start] = rows[column].to_numpy(float)[start]
+        values[clearcut] = 0.0
+        # The action applies after the clearcut in the same period
+        values[at[at >= 0]] = acts["AGE"].to_numpy(float)[at >= 0]
+        expected[column] = index.fill_forward(values)
+    return expected
+
+
+# =============================================================================
+# CHECKS
+# =============================================================================
+
+def _mismatches(check, stand_key, period, year, expected, actual, action=None):
+    """Mismatch rows in MISMATCH_COLUMNS layout."""
+    return pd.DataFrame({
+        "stand_key": np.asarray(stand_key, dtype=object),
+        "PERIOD": period,
+        "YEAR": year,
+        "check": check,
+        "ACTION": action,
+        "expected": expected,
+        "actual": actual,
+    })[MISMATCH_COLUMNS]
+
+
+@instrument
+def check_condition(index, expected):
+    """Condition rows whose columns differ from the replayed values."""
+    rows = index.rows
+    out = []
+    for column, values in expected.items():
+        actual = rows[column].to_numpy(float)
+        if column == "AREA":
+            bad = np.abs(actual - values) > RECONCILE_AREA_TOLERANCE * np.abs(values)
+        else:
+            bad = actual != values
+        bad &= ~np.isnan(values)
+        out.append(_mismatches(column, rows["stand_key"].values[bad], index.period[bad],
+                               rows["YEAR"].values[bad], values[bad], actual[bad]))
+
+    # Parcel stands: the parcels of every period cover the period-0 AREA
+    parcels = index.parcels
+    if len(parcels):
+        area = parcels.groupby(["stand_key", "PERIOD"], sort=False)["AREA"].sum().reset_index()
+        initial = area.loc[area["PERIOD"] == 0].set_index("stand_key")["AREA"]
+        total = area["stand_key"].map(initial).to_numpy(float)
+        actual = area["AREA"].to_numpy(float)
+        bad = ~(np.abs(actual - total) <= RECONCILE_AREA_TOLERANCE * total)
+        out.append(_mismatches("parcel_area", area["stand_key"].values[bad],
+                               area["PERIOD"].values[bad], _year(area["PERIOD"].values[bad]),
+                               total[bad], actual[bad]))
+
+    # Periods absent from a stand's Condition rows
+    present = np.zeros((len(index.stands), index.n_periods), dtype=bool)
+    present[index.all_keys // index.n_periods, index.all_keys % index.n_periods] = True
+    stand, period = np.nonzero(~present)
+    out.append(_mismatches("missing_period", index.stands.values[stand], period,
+                           _year(period), None, None))
+    return out
+
+
+@instrument
+def check_schedule(index, schedule):
+    """Schedule actions whose YEAR, AGE or harvested AREA disagree with the Condition file."""
+    out = []
+    missing = ~schedule["stand_key"].isin(index.stands)
+    stands = schedule.loc[missing].drop_duplicates("stand_key")
+    out.append(_mismatches("missing_stand", stands["stand_key"].values, stands["PERIOD"].values,
+                           stands["YEAR"].values, None, None, stands["ACTION"].values))
+
+    sched = schedule[~missing]
+    period = sched["PERIOD"].to_numpy(np.int64)
+    year = sched["YEAR"].to_numpy()
+    implied = SIM_START_YEAR + period - 1
+    bad = year != implied
+    out.append(_mismatches("schedule_year", sched["stand_key"].values[bad], period[bad], year[bad],
+                           implied[bad], year[bad], sched["ACTION"].values[bad]))
+
+    # An action applies at the age the stand (or a parcel) ended the previous period with
+    age = sched["AGE"].to_numpy(np.int64)
+    bad = ~index.has_age(sched["stand_key"], period - 1, age)
+    prev = index.lookup(sched["stand_key"], period - 1)
+    cond_age = np.where(prev >= 0, index.rows["AGE"].to_numpy(float)[prev], np.nan)
+    out.append(_mismatches("action_age", sched["stand_key"].values[bad], period[bad], year[bad],
+                           cond_age[bad], age[bad], sched["ACTION"].values[bad]))
+
+    # Harvested area: a Condition row (the stand or a parcel) of the period
+    # has it; parcels clearcut in the same period become one parcel
+    clearcuts = sched[sched["ACTION"] == "aHCC"].groupby(
+        ["stand_key", "PERIOD"], as_index=False, sort=False
+    ).agg(YEAR=("YEAR", "first"), ACTION=("ACTION", "first"), AREA=("AREA", "sum"))
+    thins = sched[sched["ACTION"].isin(HARVEST_ACTIONS) & (sched["ACTION"] != "aHCC")]
+    harvests = pd.concat([thins, clearcuts], ignore_index=True).assign(
+        key=lambda df: index.key(df["stand_key"], df["PERIOD"].to_numpy()),
+        harvest=lambda df: np.arange(len(df)),
+    )
+    areas = pd.DataFrame({"key": index.all_keys, "cond_area": index.all_rows["AREA"].to_numpy(float)})
+    pairs = harvests[["harvest", "key", "AREA"]].merge(areas, on="key", how="left")
+    pairs["match"] = (np.abs(pairs["AREA"] - pairs["cond_area"])
+                      <= RECONCILE_AREA_TOLERANCE * pairs["cond_area"])
+    match = pairs.groupby("harvest")["match"].any().reindex(harvests["harvest"]).to_numpy()
+    pos = index.lookup(harvests["stand_key"], harvests["PERIOD"].to_numpy())
+    cond_area = np.where(pos >= 0, index.rows["AREA"].to_numpy(float)[pos], np.nan)
+    bad = ~match
+    out.append(_mismatches("harvest_area", harvests["stand_key"].values[bad],
+                           harvests["PERIOD"].values[bad], harvests["YEAR"].values[bad],
+                           cond_area[bad], harvests["AREA"].values[bad], harvests["ACTION"].values[bad]))
+    return out
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def run(condition, schedule, qa_dir=OUTPUT_DIR / QA_DIR_NAME):
+    """
+    Main entry point.
+
+    Parameters:
+        condition: Full Condition table, every PERIOD (01_ingest.load_condition)
+        schedule: Schedule DataFrame (01_ingest.load_schedule)
+        qa_dir: Directory for the report
+
+    Returns:
+        DataFrame with MISMATCH_COLUMNS (also written to
+        qa_dir/reconciliation_mismatches.csv)
+    """
+    print("=" * 60)
+    print("qa_reconcile: Reconciling the schedule with the Condition periods")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    index = ConditionIndex(condition)
+    expected = replay(index, schedule)
+    frames = check_condition(index, expected) + check_schedule(index, schedule)
+    frames = [f for f in frames if len(f)]
+    mismatches = (pd.concat(frames, ignore_index=True) if frames
+                  else pd.DataFrame(columns=MISMATCH_COLUMNS))
+    elapsed = time.perf_counter() - start
+
+    print(f"\n  Condition: {len(index.stands)} stands x {index.n_periods} periods "
+          f"({len(condition)} rows); schedule: {len(schedule)} actions")
+    print(f"  Stands split into parcels (area checked, not replayed): "
+          f"{int(index.parcel_stand.sum())}")
+    print(f"  Reconciled in {elapsed:.2f}s")
+    if len(mismatches):
+        counts = mismatches.groupby("check")["stand_key"].agg(["size", "nunique"])
+        print(f"  WARNING: {len(mismatches)} mismatches in "
+              f"{mismatches['stand_key'].nunique()} stands:")
+        for check, row in counts.iterrows():
+            print(f"    {check:<18} {row['size']:>8} rows, {row['nunique']:>6} stands")
+    else:
+        print("  Schedule and Condition periods agree")
+
+    qa_dir = Path(qa_dir)
+    qa_dir.mkdir(parents=True, exist_ok=True)
+    out_path = qa_dir / "reconciliation_mismatches.csv"
+    mismatches.to_csv(out_path, index=False)
+    print(f"  Wrote {out_path}")
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Reconcile the management schedule with the Condition file's periods"
+    )
+    parser.add_argument("--schedule", type=Path, default=SCHEDULE_XLSX,
+                        help="Management schedule .xlsx (e.g. a scenario's)")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR,
+                        help="Output directory the report goes under (qa/)")
+    args = parser.parse_args()
+
+    ingest = import_module("01_ingest")
+    condition, _ = ingest.load_condition()
+    run(condition, ingest.load_schedule(args.schedule), qa_dir=args.output_dir / QA_DIR_NAME)
@@ -0,0 +1,440 @@
+"""
+qa_volume_sim.py — Stand-Level Volume Projection (pre-GCBM QA)
+================================================================
+Projects every inventory record year by year from SIM_START_YEAR to
+SIM_END_YEAR using only the pipeline outputs (yield_curves.csv,
+inventory.gpkg, disturbance_events.csv, transition_rules.csv), to check
+that classifiers, curves and transition rules give sensible harvest
+volumes before GCBM runs.
+
+Each record's age advances by one per year (age = initial_age + timestep
+before the year's events, as in disturbance_events.csv). A scheduled
+event harvests pct_volume_removed of the record's merchantable volume (sum
+of the softwood and hardwood curves of its classifier set) and moves the
+record to the target classifiers of its transition rule, resetting the
+age where the rule says so.
+
+Classifier sets are encoded as one int64 per record. A record's sequence
+of states depends only on its ordered events, so the transitions are
+resolved up front: the rules are indexed once (06's RuleIndex, one hash
+index per wildcard pattern) and each event rank is one NumPy probe of it
+on the state codes. The year loop is then plain NumPy indexing, which
+keeps 1M records x 50 years to seconds.
+
+Flags records whose state has no yield curve (initially or after an
+event) and events no transition rule matches.
+
+Outputs (OUTPUT_DIR/qa/):
+  - volume_sim_by_year.csv: standing and harvested volume per year
+  - volume_sim_flags.csv: one row per flagged record state
+
+Usage:
+    python qa_volume_sim.py [--output-dir DIR]
+"""
+
+import argparse
+import time
+from importlib import import_module
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    OUTPUT_DIR,
+    QA_DIR_NAME,
+    CLASSIFIER_NAMES,
+    WILDCARD,
+    SIM_START_YEAR,
+    SIM_END_YEAR,
+)
+from instrumentation import instrument
+
+
+FLAG_COLUMNS = ["stand_key", "year", "reason", "disturbance_type"] + [
+    f"state_{c}" for c in CLASSIFIER_NAMES
+]
+
+
+# =============================================================================
+# STATE ENCODING
+# =============================================================================
+
+class StateCodec:
+    """
+    Encodes classifier sets as int64 codes (mixed radix over the codes of
+    each classifier's values) and decodes them back.
+    """
+
+    def __init__(self, frames):
+        """
+        Parameters:
+            frames: DataFrames whose CLASSIFIER_NAMES columns (or src_/tgt_
+                    columns, for transition rules) hold every value to encode
+        """
+        self.values = {}
+        for c in CLASSIFIER_NAMES:
+            cols = [f[col] for f in frames for col in (c, f"src_{c}", f"tgt_{c}") if col in f]
+            values = pd.unique(pd.concat(cols, ignore_index=True).astype(str))
+            self.values[c] = pd.Index(sorted(v for v in values if v != WILDCARD))
+        sizes = [len(self.values[c]) for c in CLASSIFIER_NAMES]
+        if np.prod([float(s) for s in sizes]) >= 2**63:
+            raise ValueError(f"Too many classifier value combinations to encode: {sizes}")
+        self.radix = dict(zip(CLASSIFIER_NAMES, np.cumprod([1] + sizes[:-1]).astype(np.int64)))
+
+    def value_codes(self, df, prefix=""):
+        """(n, len(CLASSIFIER_NAMES)) array of value codes; -1 for unknown values and "?"."""
+        out = np.empty((len(df), len(CLASSIFIER_NAMES)), dtype=np.int64)
+        for j, c in enumerate(CLASSIFIER_NAMES):
+            # Look up each distinct value once rather than every row's string
+            rows, uniques = pd.factorize(df[f"{prefix}{c}"], use_na_sentinel=False)
+            out[:, j] = self.values[c].get_indexer(pd.Index(uniques).astype(str))[rows]
+        return out
+
+    def combine(self, value_codes, mask=None):
+        """
+        int64 state codes from value_codes(); classifiers where mask is True
+        are left out (code 0). -1 where a classifier kept has no code.
+        """
+        keep = np.ones(len(CLASSIFIER_NAMES), dtype=bool) if mask is None else ~np.asarray(mask)
+        radix = np.array([self.radix[c] for c in CLASSIFIER_NAMES])[keep]
+        kept = value_codes[:, keep]
+        codes = kept @ radix
+        codes[(kept < 0).any(axis=1)] = -1
+        return codes
+
+    def encode(self, df, prefix=""):
+        """int64 code per row of df's classifier columns (-1 if a value is unknown)."""
+        return self.combine(self.value_codes(df, prefix))
+
+    def split(self, codes):
+        """(n, len(CLASSIFIER_NAMES)) value codes of state codes (inverse of combine); -1 rows stay -1."""
+        codes = np.asarray(codes, dtype=np.int64)
+        out = np.column_stack([
+            (codes // self.radix[c]) % max(len(self.values[c]), 1) for c in CLASSIFIER_NAMES
+        ]).reshape(len(codes), len(CLASSIFIER_NAMES))
+        out[codes < 0] = -1
+        return out
+
+    def decode(self, codes):
+        """DataFrame with CLASSIFIER_NAMES columns for an array of codes."""
+        codes = np.asarray(codes, dtype=np.int64)
+        return pd.DataFrame({
+            c: self.values[c].values[(codes // self.radix[c]) % len(self.values[c])]
+            for c in CLASSIFIER_NAMES
+        })
+
+
+# =============================================================================
+# INPUTS
+# =============================================================================
+
+@instrument
+def curve_volumes(curves, codec):
+    """
+    Merchantable volume by age for each classifier set.
+
+    Softwood and hardwood rows of a classifier set are summed; ages past
+    the end of a curve keep its last volume.
+
+    Returns:
+        (pd.Index of curve state codes, volume array of shape
+        (n_curves, max_age + 1) in m³/ha with age 0 = 0, row i for code i)
+    """
+    age_cols = sorted((c for c in curves.columns if str(c).isdigit()), key=int)
+    vol = np.array(curves[age_cols], dtype=float, order="F")  # own copy, filled in place
+    # Forward-fill along the ages in place (0 before a curve's first value)
+    vol[np.isnan(vol[:, 0]), 0] = 0.0
+    for j in range(1, vol.shape[1]):
+        gap = np.isnan(vol[:, j])
+        vol[gap, j] = vol[gap, j - 1]
+
+    codes, group = np.unique(codec.encode(curves), return_inverse=True)
+    table = np.zeros((len(codes), int(age_cols[-1]) + 1))
+    for j, a in enumerate(age_cols):
+        table[:, int(a)] = np.bincount(group, weights=vol[:, j], minlength=len(codes))
+    known = codes >= 0  # wildcard curves have no single state
+    return pd.Index(codes[known]), table[known]
+
+
+def record_events(events, inventory):
+    """
+    Disturbance events per inventory record, in the order they apply.
+
+    Events are scheduled per stand_key and apply to every inventory record
+    of the stand; events outside the simulation years are dropped.
+
+    Returns:
+        DataFrame with row (inventory position), stand_key, year,
+        disturbance_type, pct_volume_removed and rank (0 = first event of
+        the record)
+    """
+    events = events[events["year"].between(SIM_START_YEAR, SIM_END_YEAR)]
+    inv_code, stand_keys = pd.factorize(inventory["stand_key"])
+    ev_code = stand_keys.get_indexer(events["stand_key"])
+    events, ev_code = events[ev_code >= 0], ev_code[ev_code >= 0]
+
+    # Expand each event to the records of its stand
+    by_stand = np.argsort(inv_code, kind="stable")
+    counts = np.bincount(inv_code, minlength=len(stand_keys))
+    starts = np.cumsum(counts) - counts
+    n_rep = counts[ev_code]
+    ev_idx = np.repeat(np.arange(len(events)), n_rep)
+    offset = np.arange(len(ev_idx)) - np.repeat(np.cumsum(n_rep) - n_rep, n_rep)
+    row = by_stand[starts[ev_code][ev_idx] + offset]
+
+    year = events["year"].to_numpy()[ev_idx]
+    order = np.lexsort((ev_idx, year, row))
+    row, year, ev_idx = row[order], year[order], ev_idx[order]
+    first = np.r_[True, row[1:] != row[:-1]]
+    group_start = np.maximum.accumulate(np.where(first, np.arange(len(row)), 0))
+
+    return pd.DataFrame({
+        "row": row,
+        "stand_key": events["stand_key"].to_numpy()[ev_idx],
+        "year": year,
+        "disturbance_type": events["disturbance_type"].to_numpy()[ev_idx],
+        "pct_volume_removed": events["pct_volume_removed"].fillna(0.0).to_numpy(float)[ev_idx],
+        "rank": np.arange(len(row)) - group_start,
+    })
+
+
+@instrument
+def resolve_event_states(ev, state0, rules, codec):
+    """
+    Source and target state of every record event.
+
+    Parameters:
+        ev: DataFrame from record_events()
+        state0: Initial state code per inventory record
+        rules: DataFrame in transition_rules.csv layout, or a
+               06_transitions.RuleIndex of it
+        codec: StateCodec
+
+    Returns:
+        ev with src, tgt (codes), reset_age (-1: no reset), rule (position
+        of the matched rule, -1: none) and matched columns; unmatched
+        events leave the state unchanged.
+    """
+    transitions = import_module("06_transitions")
+    index = rules if isinstance(rules, transitions.RuleIndex) else transitions.RuleIndex(rules)
+
+    # Codec value codes -> rule index value codes, and rule targets as
+    # codec value codes (-2: "?", keep the source value)
+    to_rule = [np.append(index.values[c].get_indexer(codec.values[c]), -1) for c in CLASSIFIER_NAMES]
+    tgt_codes = np.column_stack([
+        np.where(index.rules[f"tgt_{c}"].astype(str).eq(WILDCARD), -2,
+                 codec.values[c].get_indexer(index.rules[f"tgt_{c}"].astype(str)))
+        for c in CLASSIFIER_NAMES
+    ]).reshape(len(index.rules), len(CLASSIFIER_NAMES))
+
+    dist = index.dist_types.get_indexer(ev["disturbance_type"].astype(str))
+    ev_row = ev["row"].to_numpy()
+    ev_rank = ev["rank"].to_numpy()
+
+    state = state0.copy()
+    src = np.full(len(ev), -1, dtype=np.int64)
+    tgt = np.full(len(ev), -1, dtype=np.int64)
+    reset_age = np.full(len(ev), -1, dtype=np.int64)
+    rule = np.full(len(ev), -1, dtype=np.int64)
+
+    for rank in range(int(ev_rank.max()) + 1 if len(ev) else 0):
+        sel = np.flatnonzero(ev_rank == rank)
+        rows = ev_row[sel]
+        s = state[rows]
+        values = codec.split(s)
+        # -1 (unknown) indexes the appended -1 of to_rule
+        r = index.match(dist[sel], np.column_stack([to_rule[j][values[:, j]] for j in range(len(CLASSIFIER_NAMES))]))
+
+        r[s < 0] = -1
+        hit = r >= 0
+        t = s.copy()
+        if hit.any():
+            new = tgt_codes[r[hit]]
+            t[hit] = codec.combine(np.where(new == -2, values[hit], new))
+            reset_age[sel[hit]] = index.reset_age[r[hit]].astype(np.int64)
+        src[sel], tgt[sel], rule[sel] = s, t, r
+        state[rows] = t
+
+    return ev.assign(src=src, tgt=tgt, reset_age=reset_age, rule=rule, matched=rule >= 0)
+
+
+# =============================================================================
+# SIMULATION
+# =============================================================================
+
+@instrument
+def simulate(inventory, ev, state0, curve_index, volumes):
+    """
+    Advance every record year by year, harvesting at its events.
+
+    Parameters:
+        inventory: DataFrame with initial_age and area_ha per record
+        ev: DataFrame from resolve_event_states()
+        state0: Initial state code per record
+        curve_index: pd.Index of curve state codes (position = row of volumes)
+        volumes: Volume array from curve_volumes()
+
+    Returns:
+        DataFrame with one row per year
+    """
+    # Sentinel zero curve for states without one
+    table = np.vstack([volumes, np.zeros((1, volumes.shape[1]))])
+    no_curve = len(volumes)
+    max_age = volumes.shape[1] - 1
+
+    def curve_of(codes):
+        idx = curve_index.get_indexer(codes)
+        return np.where(idx < 0, no_curve, idx)
+
+    curve = curve_of(state0)
+    ev_src_curve = curve_of(ev["src"].values)
+    ev_tgt_curve = curve_of(ev["tgt"].values)
+
+    area = inventory["area_ha"].to_numpy(dtype=float)
+    age = inventory["initial_age"].to_numpy(dtype=np.int64).copy()
+    ev_year = ev["year"].to_numpy()
+    ev_row = ev["row"].to_numpy()
+    ev_pct = ev["pct_volume_removed"].to_numpy(dtype=float) / 100.0
+    ev_reset = ev["reset_age"].to_numpy(dtype=np.int64)
+    ev_rank = ev["rank"].to_numpy()
+
+    # Events grouped by year, in rank order within a year
+    order = np.lexsort((ev_rank, ev_year))
+    bounds = np.searchsorted(ev_year[order], np.arange(SIM_START_YEAR, SIM_END_YEAR + 2))
+
+    rows = []
+    for i, year in enumerate(range(SIM_START_YEAR, SIM_END_YEAR + 1)):
+        age += 1
+        year_ev = order[bounds[i]:bounds[i + 1]]
+        harvested = 0.0
+        harvested_area = 0.0
+        # A record may have several events in one year; apply them in turn
+        while len(year_ev):
+            first = np.unique(ev_row[year_ev], return_index=True)[1]
+            now, year_ev = year_ev[first], np.delete(year_ev, first)
+            r = ev_row[now]
+            vol_ha = table[ev_src_curve[now], np.minimum(age[r], max_age)]
+            removed = vol_ha * ev_pct[now] * area[r]
+            harvested += removed.sum()
+            harvested_area += area[r][ev_pct[now] > 0].sum()
+            curve[r] = ev_tgt_curve[now]
+            reset = ev_reset[now] >= 0
+            age[r[reset]] = ev_reset[now][reset]
+
+        standing = table[curve, np.minimum(age, max_age)] * area
+        rows.append({
+            "year": year,
+            "timestep": year - SIM_START_YEAR + 1,
+            "standing_volume_m3": standing.sum(),
+            "harvested_volume_m3": harvested,
+            "harvested_area_ha": harvested_area,
+            "n_events": bounds[i + 1] - bounds[i],
+            "n_records_no_curve": int((curve == no_curve).sum()),
+        })
+    return pd.DataFrame(rows)
+
+
+def flag_states(inventory, ev, state0, curve_index, codec):
+    """
+    Records whose initial or post-event state has no curve, and events no
+    transition rule matched.
+
+    Returns:
+        DataFrame with FLAG_COLUMNS
+    """
+    initial = pd.DataFrame({"stand_key": inventory["stand_key"].values, "year": SIM_START_YEAR,
+                            "reason": "no_curve", "disturbance_type": None, "state": state0})
+    initial = initial[curve_index.get_indexer(state0) < 0]
+
+    after = ev[curve_index.get_indexer(ev["tgt"].values) < 0].assign(reason="no_curve")
+    no_rule = ev[~ev["matched"].astype(bool)].assign(reason="no_rule")
+    events = pd.concat([no_rule.assign(state=no_rule["src"]), after.assign(state=after["tgt"])])
+    events = events[["stand_key", "year", "reason", "disturbance_type", "state"]]
+
+    flags = pd.concat([initial, events], ignore_index=True)
+    # One row per record state, not per polygon of the stand
+    flags = flags.drop_duplicates().sort_values(["stand_key", "year"], kind="stable")
+    states = codec.decode(flags["state"].clip(lower=0).values)
+    states[flags["state"].values < 0] = None
+    states.columns = [f"state_{c}" for c in CLASSIFIER_NAMES]
+    return pd.concat([flags.drop(columns="state").reset_index(drop=True), states], axis=1)[FLAG_COLUMNS]
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def run(curves, inventory, events, rules, qa_dir=OUTPUT_DIR / QA_DIR_NAME):
+    """
+    Main entry point.
+
+    Parameters:
+        curves: DataFrame in yield_curves.csv layout (03_yield_curves)
+        inventory: (Geo)DataFrame in inventory.gpkg layout (04_inventory)
+        events: DataFrame with stand_key, year, disturbance_type and
+                pct_volume_removed (05_disturbances)
+        rules: DataFrame in transition_rules.csv layout (06_transitions)
+        qa_dir: Directory for the reports
+
+    Returns:
+        (by_year, flags) DataFrames
+    """
+    print("=" * 60)
+    print("qa_volume_sim: Projecting stand volumes from pipeline outputs")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    codec = StateCodec([curves, inventory, rules])
+    curve_index, volumes = curve_volumes(curves, codec)
+    state0 = codec.encode(inventory)
+    ev = resolve_event_states(record_events(events, inventory), state0, rules, codec)
+    prepared = time.perf_counter()
+
+    by_year = simulate(inventory, ev, state0, curve_index, volumes)
+    simulated = time.perf_counter()
+    flags = flag_states(inventory, ev, state0, curve_index, codec)
+
+    print(f"\n  Records: {len(inventory)}, events: {len(ev)}, curves: {len(curve_index)}, "
+          f"years: {SIM_START_YEAR}-{SIM_END_YEAR}")
+    print(f"  Prepared in {prepared - start:.2f}s, simulated in {simulated - prepared:.2f}s")
+    print(f"  Harvested: {by_year['harvested_volume_m3'].sum():,.0f} m³ on "
+          f"{by_year['harvested_area_ha'].sum():,.0f} ha")
+    print(f"  Standing volume: {by_year['standing_volume_m3'].iloc[0]:,.0f} m³ ({SIM_START_YEAR}) -> "
+          f"{by_year['standing_volume_m3'].iloc[-1]:,.0f} m³ ({SIM_END_YEAR})")
+    if len(flags):
+        print(f"  WARNING: {len(flags)} flagged states "
+              f"({flags['reason'].value_counts().to_dict()})")
+    else:
+        print("  Every record state has a yield curve and every event a transition rule")
+
+    qa_dir = Path(qa_dir)
+    qa_dir.mkdir(parents=True, exist_ok=True)
+    by_year.to_csv(qa_dir / "volume_sim_by_year.csv", index=False)
+    flags.to_csv(qa_dir / "volume_sim_flags.csv", index=False)
+    print(f"  Wrote {qa_dir / 'volume_sim_by_year.csv'}")
+    print(f"  Wrote {qa_dir / 'volume_sim_flags.csv'}")
+    return by_year, flags
+
+
+def load_outputs(output_dir=OUTPUT_DIR):
+    """Read the pipeline outputs run() needs from output_dir."""
+    import geopandas as gpd
+
+    output_dir = Path(output_dir)
+    return {
+        "curves": pd.read_csv(output_dir / "yield_curves.csv"),
+        "inventory": gpd.read_file(output_dir / "inventory.gpkg", ignore_geometry=True),
+        "events": pd.read_csv(output_dir / "disturbance_events.csv"),
+        "rules": pd.read_csv(output_dir / "transition_rules.csv", dtype=str).astype(
+            {"reset_age": int}
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Project stand volumes from pipeline outputs")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR,
+                        help="Pipeline output directory to check (e.g. a scenario directory)")
+    args = parser.parse_args()
+    run(**load_outputs(args.output_dir), qa_dir=args.output_dir / QA_DIR_NAME)
@@ -1,95 +1,563 @@
 """
 run_pipeline.py — Full GCBM Input Processing Pipeline
 ======================================================
-Runs steps 01-08 in sequence, passing data between modules.
+Runs steps 01-08, passing data between modules, and optionally step 09
+(pre-built rasters for the tiler).
+
+The steps are declared as a dependency graph (build_steps) and executed by
+pipeline_dag.run_dag: each step is cached under a hash of its inputs, so a
+rerun only recomputes steps whose source files, config constants, code or
+upstream results changed. --no-cache forces every step to run, and
+--jobs N runs up to N independent steps at once in worker processes.
+
+Every run writes OUTPUT_DIR/run_manifest.json with per-step and
+per-function wall/CPU time, peak RSS and row counts (instrumentation.py);
+--profile cprofile|pyinstrument also dumps a profile per step.
+
+--partitions N runs steps 02-06 on N shards of the stands in worker
+processes and merges their outputs (partition.py); the outputs are the same
+as an unpartitioned run.
+
+The shards can also run on several nodes sharing a directory
+(shard_coordinator.py): --shard i/N computes shard i of N (next/N claims
+shards until none are left) into --shard-dir, planning the shards first if
+no worker has yet, and --merge combines the shard results into the final
+outputs and runs the remaining steps.
+
+--qa adds pre-GCBM checks of the outputs (qa_*.py), written to
+OUTPUT_DIR/qa: a year-by-year volume projection through the transition
+rules and yield curves, a check that every inventory record and
+transition rule target has a yield curve, and a reconciliation of the
+schedule with the Condition file's projected periods.
+
+--harvest-report adds harvested volume and area per year, disturbance
+type, species and rotation (harvest_report.py), written to
+OUTPUT_DIR/harvest_report.csv (+ .parquet, see HARVEST_REPORT_PARQUET;
+--no-harvest-parquet writes CSV only); with --scenarios, per scenario and stacked in SCENARIO_DIR/harvest_report.csv.
+
+--scenarios A.xlsx B.xlsx ... runs ingest and steps 02-04 once, then steps
+05-08 for each management schedule in parallel, each into its own
+directory under SCENARIO_DIR (scenarios.py).
+
+The project (source files, output and cache directories) comes from
+config.py; IWC_PROJECT_CONFIG=<project.toml> runs another ownership, and
+batch.py runs many projects in parallel.
 
 Usage:
-    python run_pipeline.py [--aidb-path /path/to/aidb.accdb] [--dry-run] [--skip-aidb]
+    python run_pipeline.py [--aidb-path /path/to/aidb.accdb [...]] [--dry-run] [--skip-aidb]
+                           [--rasterize] [--compress-rules] [--no-cache] [--jobs N]
+                           [--profile cprofile|pyinstrument] [--qa] [--harvest-report [--no-harvest-parquet]]
+                           [--partitions N [--partition-by hash|tile] [--partition-workers N]]
+    python run_pipeline.py --shard i/N|next/N [--shard-dir DIR] [--partition-by hash|tile]
+    python run_pipeline.py --merge [--shard-dir DIR] [--merge-wait SECONDS] [...]
+    python run_pipeline.py --scenarios SCHEDULE.xlsx [...] [--scenario-workers N] [...]
 """
 
 import argparse
 import sys
+from datetime import datetime
+from importlib import import_module
 from pathlib import Path
 
 # Ensure src/ is on the path
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-from config import OUTPUT_DIR
+from config import (
+    OUTPUT_DIR, COMPRESS_TRANSITION_RULES, SHARD_DIR, SCENARIO_DIR, AIDB_PATH, QA_DIR_NAME,
+    HARVEST_REPORT_PARQUET,
+)
+import instrumentation
+import scenarios
+import shard_coordinator
+from pipeline_dag import Step, print_report, run_dag
 
 
-def main(aidb_path=None, dry_run=False, skip_aidb=False):
-    print("=" * 60)
-    print("IWC Boothill — GCBM Input Processing Pipeline")
-    print("=" * 60)
+# =============================================================================
+# STEP FUNCTIONS
+# =============================================================================
+
+def _ingest_spatial():
+    print("\nLoading spatial data...")
+    return import_module("01_ingest").load_spatial()
+
+
+def _ingest_yields1():
+    return import_module("01_ingest").load_yields1()
+
+
+def _ingest_yields2():
+    return import_module("01_ingest").load_yields2()
+
+
+def _ingest_yields3():
+    return import_module("01_ingest").load_yields3()
+
+
+def _ingest_condition():
+    print("\nLoading condition file...")
+    return import_module("01_ingest").load_condition()
+
+
+def _ingest_schedule():
+    print("\nLoading management schedule...")
+    return import_module("01_ingest").load_schedule()
+
+
+def _validate(spatial, yields1, condition_initial, schedule):
+    import_module("01_ingest").validate(spatial, yields1, condition_initial, schedule)
+
 
-    # Step 1: Ingest all source data
-    from importlib import import_module
-    ingest = import_module("01_ingest")
-    data = ingest.ingest_all()
+def _classifiers(spatial, condition_initial, yields1):
+    return import_module("02_classifiers").run(spatial, condition_initial, yields1)
 
-    # Step 2: Assign classifiers
-    classifiers = import_module("02_classifiers")
-    stands, classifier_values = classifiers.run(
-        data["spatial"], data["condition_initial"], data["yields1"]
+
+def _yield_curves(stands, yields1, yields2, yields3):
+    return import_module("03_yield_curves").run(stands, yields1, yields2, yields3)
+
+
+def _inventory(spatial, stands):
+    return import_module("04_inventory").run(spatial, stands)
+
+
+def _disturbances(schedule, spatial, yields1, yields3, yields2, condition_initial):
+    return import_module("05_disturbances").run(
+        schedule, spatial, yields1, yields3, yields2, condition_initial=condition_initial,
     )
 
-    # Step 3: Build yield curves
-    yield_curves = import_module("03_yield_curves")
-    curves = yield_curves.run(
-        stands, data["yields1"], data["yields2"], data["yields3"]
+
+def _transitions(events, stands, compress=COMPRESS_TRANSITION_RULES):
+    return import_module("06_transitions").run(events, stands, compress=compress)
+
+
+def _partitioned(spatial, condition_initial, yields1, yields2, yields3, schedule,
+                 n_shards, by="hash", workers=None, compress=COMPRESS_TRANSITION_RULES):
+    return import_module("partition").run(
+        spatial, condition_initial, yields1, yields2, yields3, schedule,
+        n_shards, by=by, workers=workers, compress=compress,
     )
 
-    # Step 4: Build starting inventory
-    inventory = import_module("04_inventory")
-    inv = inventory.run(data["spatial"], stands)
 
-    # Step 5: Build disturbance layers
-    disturbances = import_module("05_disturbances")
-    events, events_geo = disturbances.run(
-        data["schedule"], data["spatial"], data["yields1"], data["yields3"], data["yields2"],
-        condition_initial=data["condition_initial"],
+def _merge_shards(shard_dir, wait=0, compress=COMPRESS_TRANSITION_RULES):
+    return shard_coordinator.merge(shard_dir, compress=compress, wait=wait)
+
+
+def _aidb_thinning(events, aidb_path=None, dry_run=False):
+    result, _ = import_module("07_aidb_thinning").run(
+        aidb_path=aidb_path, events_or_csv=events, dry_run=dry_run,
     )
+    return result
+
+
+def _tiler_config(events, inventory):
+    # 08 reads inventory.gpkg written by 04; `inventory` orders it after 04
+    return import_module("08_tiler_config").run(events=events)
+
+
+def _rasterize(inventory, events, tiler_script):
+    # 09 reads tiler_plan.json and rewrites tiler.py, so it runs after 08
+    return import_module("09_rasterize").run(inventory=inventory, events=events)
+
+
+def _harvest_report(events, yields1, yields2, yields3, parquet=HARVEST_REPORT_PARQUET):
+    return import_module("harvest_report").run(events, yields1, yields2, yields3, parquet=parquet)
+
+
+def _qa_volume_sim(curves, inventory, events, rules):
+    return import_module("qa_volume_sim").run(curves, inventory, events, rules)
+
+
+def _qa_consistency(curves, inventory, events, rules):
+    return import_module("qa_consistency").run(curves, inventory, events, rules)
+
+
+def _qa_reconcile(condition, schedule):
+    return import_module("qa_reconcile").run(condition, schedule)
+
+
+class _Bound:
+    """Step function with fixed keyword options (picklable, unlike a lambda)."""
+
+    def __init__(self, fn, **kwargs):
+        self.fn = fn
+        self.kwargs = kwargs
 
-    # Step 6: Build transition rules
-    transitions = import_module("06_transitions")
-    rules = transitions.run(events, stands)
-
-    # Step 7: Add thinning disturbances to AIDB (optional)
-    if not skip_aidb:
-        if aidb_path is None:
-            print("\n" + "=" * 60)
-            print("07_aidb_thinning: SKIPPED (no --aidb-path provided)")
-            print("  Run separately: python 07_aidb_thinning.py --aidb-path <path>")
-            print("=" * 60)
-        else:
-            aidb_mod = import_module("07_aidb_thinning")
-            aidb_mod.run(
-                aidb_path=aidb_path,
-                events_or_csv=events,
-                dry_run=dry_run,
-            )
+    def __call__(self, *args):
+        return self.fn(*args, **self.kwargs)
+
+
+# =============================================================================
+# PIPELINE GRAPH
+# =============================================================================
+
+def build_ingest_steps(schedule=True):
+    """
+    Steps loading and validating the source data (01_ingest); without
+    schedule, the management schedule is neither loaded nor validated.
+    """
+    steps = [
+        Step("ingest_spatial", _ingest_spatial, provides="spatial",
+             files=["SHAPEFILE"], modules=["01_ingest"]),
+        Step("ingest_yields1", _ingest_yields1, provides="yields1",
+             files=["YIELDS1_CSV"], modules=["01_ingest"]),
+        Step("ingest_yields2", _ingest_yields2, provides="yields2",
+             files=["YIELDS2_CSV"], modules=["01_ingest"]),
+        Step("ingest_yields3", _ingest_yields3, provides="yields3",
+             files=["YIELDS3_CSV"], modules=["01_ingest"]),
+        Step("ingest_condition", _ingest_condition, provides=["condition", "condition_initial"],
+             files=["CONDITION_XLSX"], modules=["01_ingest"]),
+    ]
+    if not schedule:
+        return steps
+    return steps + [
+        Step("ingest_schedule", _ingest_schedule, provides="schedule",
+             files=["SCHEDULE_XLSX"], modules=["01_ingest"]),
+        Step("validate", _validate,
+             deps=["spatial", "yields1", "condition_initial", "schedule"], modules=["01_ingest"]),
+    ]
+
+
+def build_stand_steps():
+    """Steps 02-04, which do not depend on the management schedule."""
+    return [
+        Step("02_classifiers", _classifiers, provides=["stands", "classifier_values"],
+             deps=["spatial", "condition_initial", "yields1"], modules=["02_classifiers"],
+             outputs=["classifiers.csv"]),
+        Step("03_yield_curves", _yield_curves, provides="curves",
+             deps=["stands", "yields1", "yields2", "yields3"], modules=["03_yield_curves"],
+             outputs=["yield_curves.csv"]),
+        Step("04_inventory", _inventory, provides="inventory",
+             deps=["spatial", "stands"], modules=["04_inventory"],
+             outputs=["inventory.gpkg"]),
+    ]
+
+
+def build_steps(aidb_path=None, dry_run=False, skip_aidb=False, rasterize=False,
+                compress_rules=COMPRESS_TRANSITION_RULES, partitions=1, partition_by="hash",
+                partition_workers=None, merge_from=None, merge_wait=0, qa=False,
+                harvest_report=False, harvest_parquet=HARVEST_REPORT_PARQUET):
+    """
+    Declare the pipeline steps, their inputs and outputs.
+
+    With partitions > 1, steps 02-06 are replaced by one step running them
+    per shard (partition.run); it provides the same artifacts and outputs.
+    With merge_from (a shard directory), ingest and 02-06 are replaced by
+    merging the results of shard workers (shard_coordinator.merge).
+    With qa, the QA checks of the outputs are added, and with
+    harvest_report the harvest volume/area report (also as Parquet with
+    harvest_parquet, when pyarrow is installed).
+
+    Returns:
+        list of pipeline_dag.Step
+    """
+    if merge_from is not None:
+        # Ingest and 02-06 ran on the shard workers (shard_coordinator.py)
+        steps = [Step(
+            "merge_shards",
+            _Bound(_merge_shards, shard_dir=merge_from, wait=merge_wait, compress=compress_rules),
+            provides=["stands", "classifier_values", "curves", "inventory",
+                      "events", "events_geo", "rules"],
+            modules=["02_classifiers", "03_yield_curves", "04_inventory", "05_disturbances",
+                     "06_transitions", "partition", "shard_coordinator"],
+            outputs=["classifiers.csv", "yield_curves.csv", "inventory.gpkg",
+                     "disturbances.gpkg", "disturbance_events.csv", "transition_rules.csv"],
+            cache=False,
+        )]
+    elif partitions > 1:
+        steps = build_ingest_steps()
+        steps.append(Step(
+            "02-06_partitioned",
+            _Bound(_partitioned, n_shards=partitions, by=partition_by,
+                   workers=partition_workers, compress=compress_rules),
+            provides=["stands", "classifier_values", "curves", "inventory",
+                      "events", "events_geo", "rules"],
+            deps=["spatial", "condition_initial", "yields1", "yields2", "yields3", "schedule"],
+            modules=["02_classifiers", "03_yield_curves", "04_inventory", "05_disturbances",
+                     "06_transitions", "partition"],
+            params={"partitions": partitions, "partition_by": partition_by,
+                    "compress": compress_rules},
+            outputs=["classifiers.csv", "yield_curves.csv", "inventory.gpkg",
+                     "disturbances.gpkg", "disturbance_events.csv", "transition_rules.csv"],
+        ))
     else:
+        steps = build_ingest_steps() + build_stand_steps() + [
+            Step("05_disturbances", _disturbances, provides=["events", "events_geo"],
+                 deps=["schedule", "spatial", "yields1", "yields3", "yields2", "condition_initial"],
+                 modules=["05_disturbances"],
+                 outputs=["disturbances.gpkg", "disturbance_events.csv"]),
+            Step("06_transitions", _Bound(_transitions, compress=compress_rules), provides="rules",
+                 deps=["events", "stands"], modules=["06_transitions"],
+                 params={"compress": compress_rules}, outputs=["transition_rules.csv"]),
+        ]
+
+    # 07 changes the AIDB itself, so it is never served from the cache
+    if not skip_aidb and aidb_path is not None:
+        steps.append(Step(
+            "07_aidb_thinning", _Bound(_aidb_thinning, aidb_path=aidb_path, dry_run=dry_run),
+            provides="aidb_result", deps=["events"], modules=["07_aidb_thinning"],
+            params={"aidb_path": aidb_path, "dry_run": dry_run}, cache=False,
+        ))
+
+    steps.append(Step(
+        "08_tiler_config", _tiler_config, provides="tiler_script",
+        deps=["events", "inventory"], modules=["08_tiler_config"],
+        outputs=["tiler.py", "tiler_plan.json"],
+    ))
+
+    if rasterize:
+        # 09 regenerates tiler.py to read its rasters
+        steps.append(Step(
+            "09_rasterize", _rasterize, provides="raster_manifest",
+            deps=["inventory", "events", "tiler_script"], modules=["09_rasterize", "08_tiler_config"],
+            outputs=["rasters", "tiler.py"],
+        ))
+
+    if qa:
+        steps.append(Step(
+            "qa_consistency", _qa_consistency, provides="unresolved_states",
+            deps=["curves", "inventory", "events", "rules"],
+            modules=["qa_consistency", "qa_volume_sim", "06_transitions"],
+            outputs=[f"{QA_DIR_NAME}/unresolved_states.csv"],
+        ))
+        steps.append(Step(
+            "qa_volume_sim", _qa_volume_sim, provides="volume_sim",
+            deps=["curves", "inventory", "events", "rules"],
+            modules=["qa_volume_sim", "06_transitions"],
+            outputs=[f"{QA_DIR_NAME}/volume_sim_by_year.csv", f"{QA_DIR_NAME}/volume_sim_flags.csv"],
+        ))
+        steps.append(Step(
+            "qa_reconcile", _qa_reconcile, provides="reconciliation",
+            deps=["condition", "schedule"], modules=["qa_reconcile"],
+            outputs=[f"{QA_DIR_NAME}/reconciliation_mismatches.csv"],
+        ))
+
+    if harvest_report:
+        steps.append(Step(
+            "harvest_report", _Bound(_harvest_report, parquet=harvest_parquet),
+            provides="harvest_report",
+            deps=["events", "yields1", "yields2", "yields3"],
+            modules=["harvest_report", "05_disturbances"],
+            params={"parquet": harvest_parquet},
+            outputs=["harvest_report.csv"] + (
+                ["harvest_report.parquet"]
+                if import_module("harvest_report").parquet_enabled(harvest_parquet) else []
+            ),
+        ))
+
+    if merge_from is not None:
+        # The merge provides no source data; load what the later steps read
+        provided = {a for s in steps for a in s.provides}
+        needed = {d for s in steps for d in s.deps} - provided
+        steps = [s for s in build_ingest_steps() if needed & set(s.provides)] + steps
+
+    return steps
+
+
+def main(aidb_path=None, dry_run=False, skip_aidb=False, rasterize=False,
+         compress_rules=COMPRESS_TRANSITION_RULES, use_cache=True, jobs=1, profile=None,
+         partitions=1, partition_by="hash", partition_workers=None, merge_from=None, merge_wait=0,
+         qa=False, harvest_report=False, harvest_parquet=HARVEST_REPORT_PARQUET):
+    started = datetime.now()
+    instrumentation.configure(profiler=profile)
+    instrumentation.reset()
+
+    print("=" * 60)
+    print("IWC Boothill — GCBM Input Processing Pipeline")
+    print("=" * 60)
+
+    if skip_aidb:
         print("\n07_aidb_thinning: SKIPPED (--skip-aidb)")
+    elif aidb_path is None:
+        print("\n" + "=" * 60)
+        print("07_aidb_thinning: SKIPPED (no --aidb-path provided)")
+        print("  Run separately: python 07_aidb_thinning.py --aidb-path <path>")
+        print("=" * 60)
+
+    steps = build_steps(
+        aidb_path=aidb_path, dry_run=dry_run, skip_aidb=skip_aidb,
+        rasterize=rasterize, compress_rules=compress_rules,
+        partitions=partitions, partition_by=partition_by, partition_workers=partition_workers,
+        merge_from=merge_from, merge_wait=merge_wait, qa=qa, harvest_report=harvest_report,
+        harvest_parquet=harvest_parquet,
+    )
+    artifacts, report = run_dag(steps, use_cache=use_cache, jobs=jobs)
+    print_report(report)
 
-    # Step 8: Generate tiler config
-    tiler = import_module("08_tiler_config")
-    tiler.run()
+    manifest_path = instrumentation.write_manifest(report, started, options={
+        "aidb_path": aidb_path, "dry_run": dry_run, "skip_aidb": skip_aidb,
+        "rasterize": rasterize, "compress_rules": compress_rules,
+        "use_cache": use_cache, "jobs": jobs, "profile": profile,
+        "partitions": partitions, "partition_by": partition_by, "merge_from": merge_from,
+        "qa": qa, "harvest_report": harvest_report, "harvest_parquet": harvest_parquet,
+    })
+    print(f"\nRun manifest: {manifest_path}")
 
     print("\n" + "=" * 60)
     print("Pipeline complete!")
     print(f"Outputs in: {OUTPUT_DIR}")
     print("=" * 60)
+    return artifacts, report
+
+
+def shard_worker(shard, shard_dir=SHARD_DIR, partition_by="hash", use_cache=True, jobs=1,
+                 profile=None):
+    """
+    Multi-node worker: compute shard i of N (or claim shards with next/N)
+    into shard_dir, planning the shards first if no worker has yet.
+
+    Returns:
+        list of shard indexes this process computed
+    """
+    instrumentation.configure(profiler=profile)
+    instrumentation.reset()
+    index, n_shards = shard_coordinator.parse_shard_spec(shard)
+
+    print("=" * 60)
+    print(f"IWC Boothill — Shard worker {shard} ({shard_dir})")
+    print("=" * 60)
+
+    def load_inputs():
+        artifacts, report = run_dag(build_ingest_steps(), use_cache=use_cache, jobs=jobs)
+        print_report(report)
+        return {name: artifacts[name] for name in shard_coordinator.PLAN_INPUTS}
+
+    shard_coordinator.ensure_plan(shard_dir, n_shards, partition_by, load_inputs)
+    computed = shard_coordinator.run_shards(shard_dir, index)
+
+    print("\n" + "=" * 60)
+    print(f"Shards computed by this worker: {computed or 'none'}")
+    print(shard_coordinator.status(shard_dir).to_string(index=False))
+    print("=" * 60)
+    return computed
+
+
+def scenario_fanout(schedules, aidb_path=None, dry_run=False,
+                    compress_rules=COMPRESS_TRANSITION_RULES, use_cache=True, jobs=1,
+                    profile=None, workers=None, scenario_dir=SCENARIO_DIR, harvest_report=False,
+                    harvest_parquet=HARVEST_REPORT_PARQUET):
+    """
+    Scenario mode: ingest and steps 02-04 once (outputs in OUTPUT_DIR),
+    then steps 05-08 (and the harvest report) for every schedule in
+    scenario_dir/<name>/.
+
+    Returns:
+        DataFrame with one row per scenario (see scenarios.run)
+    """
+    started = datetime.now()
+    instrumentation.configure(profiler=profile)
+    instrumentation.reset()
+
+    print("=" * 60)
+    print(f"IWC Boothill — Scenario fan-out over {len(schedules)} schedules")
+    print("=" * 60)
+
+    artifacts, report = run_dag(build_ingest_steps(schedule=False) + build_stand_steps(),
+                                use_cache=use_cache, jobs=jobs)
+    print_report(report)
+    result = scenarios.run(artifacts, schedules, workers=workers, aidb_path=aidb_path,
+                           dry_run=dry_run, compress=compress_rules, scenario_dir=scenario_dir,
+                           harvest_report=harvest_report, harvest_parquet=harvest_parquet)
+
+    manifest_path = instrumentation.write_manifest(report, started, options={
+        "scenarios": [str(s) for s in schedules], "aidb_path": aidb_path, "dry_run": dry_run,
+        "compress_rules": compress_rules, "use_cache": use_cache, "jobs": jobs,
+        "profile": profile, "scenario_workers": workers, "harvest_report": harvest_report,
+        "harvest_parquet": harvest_parquet,
+    })
+    print(f"\nRun manifest: {manifest_path}")
+
+    print("\n" + "=" * 60)
+    print("Scenarios complete!")
+    print(f"Common outputs in: {OUTPUT_DIR}")
+    print(f"Scenario outputs in: {scenario_dir}")
+    print("=" * 60)
+    return result
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="IWC Boothill GCBM Input Pipeline")
-    parser.add_argument("--aidb-path", default=None, help="Path to AIDB .mdb or .accdb file")
+    parser.add_argument("--aidb-path", default=None, nargs="+",
+                        help="Path(s) to AIDB .mdb/.accdb files or SQLite copies; several are updated in parallel")
     parser.add_argument("--dry-run", action="store_true", help="AIDB: report without modifying")
     parser.add_argument("--skip-aidb", action="store_true", help="Skip AIDB step entirely")
+    parser.add_argument("--rasterize", action="store_true",
+                        help="Pre-build tiler rasters (09_rasterize) and point tiler.py at them")
+    parser.add_argument("--compress-rules", action="store_true",
+                        help="Write wildcard-compressed transition rules")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Rerun every step instead of reusing cached step results")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Run up to N independent steps concurrently (default: 1, serial)")
+    parser.add_argument("--profile", choices=instrumentation.PROFILERS, default=None,
+                        help="Dump a cProfile/pyinstrument profile per step to OUTPUT_DIR/profiles")
+    parser.add_argument("--qa", action="store_true",
+                        help="Check the outputs before GCBM (qa_*.py; reports in OUTPUT_DIR/qa)")
+    parser.add_argument("--harvest-report", action="store_true",
+                        help="Report harvested volume and area by year (harvest_report.py)")
+    parser.add_argument("--harvest-parquet", action=argparse.BooleanOptionalAction,
+                        default=HARVEST_REPORT_PARQUET,
+                        help="Also write the harvest report as Parquet when pyarrow is installed "
+                             f"(default: {HARVEST_REPORT_PARQUET})")
+    parser.add_argument("--partitions", type=int, default=1,
+                        help="Run steps 02-06 on N shards of the stands in parallel (default: 1)")
+    parser.add_argument("--partition-by", choices=["hash", "tile"], default="hash",
+                        help="Shard stands by stand_key hash or by spatial tile")
+    parser.add_argument("--partition-workers", type=int, default=None,
+                        help="Max worker processes for the shards (default: CPU count)")
+    parser.add_argument("--shard", default=None, metavar="i/N",
+                        help="Worker mode: compute shard i of N (next/N: claim shards until none "
+                             "are left) into --shard-dir")
+    parser.add_argument("--merge", action="store_true",
+                        help="Merge the shard results in --shard-dir and run the remaining steps")
+    parser.add_argument("--shard-dir", type=Path, default=SHARD_DIR,
+                        help="Shard directory shared by the workers and the merge")
+    parser.add_argument("--merge-wait", type=float, default=0,
+                        help="Seconds --merge waits for unfinished shards (default: 0)")
+    parser.add_argument("--scenarios", nargs="+", type=Path, default=None, metavar="SCHEDULE",
+                        help="Run steps 05-08 once per management schedule, sharing ingest and "
+                             "02-04 (outputs in SCENARIO_DIR/<schedule stem>)")
+    parser.add_argument("--scenario-workers", type=int, default=None,
+                        help="Max worker processes for the scenarios (default: CPU count)")
     args = parser.parse_args()
 
+    if args.shard is not None:
+        shard_worker(args.shard, shard_dir=args.shard_dir, partition_by=args.partition_by,
+                     use_cache=not args.no_cache, jobs=args.jobs, profile=args.profile)
+        sys.exit(0)
+
+    # A project file may name its AIDB (config.AIDB_PATH)
+    aidb_paths = args.aidb_path or ([AIDB_PATH] if AIDB_PATH else None)
+
+    if args.scenarios is not None:
+        if aidb_paths is not None and len(aidb_paths) > 1:
+            parser.error("--scenarios takes a single --aidb-path (each scenario updates a copy)")
+        result = scenario_fanout(
+            args.scenarios,
+            aidb_path=None if args.skip_aidb or aidb_paths is None else aidb_paths[0],
+            dry_run=args.dry_run,
+            compress_rules=args.compress_rules or COMPRESS_TRANSITION_RULES,
+            use_cache=not args.no_cache,
+            jobs=args.jobs,
+            profile=args.profile,
+            workers=args.scenario_workers,
+            harvest_report=args.harvest_report,
+            harvest_parquet=args.harvest_parquet,
+        )
+        sys.exit(0 if (result["status"] == "ok").all() else 1)
     main(
-        aidb_path=args.aidb_path,
+        aidb_path=aidb_paths[0] if aidb_paths and len(aidb_paths) == 1 else aidb_paths,
         dry_run=args.dry_run,
         skip_aidb=args.skip_aidb,
+        rasterize=args.rasterize,
+        compress_rules=args.compress_rules or COMPRESS_TRANSITION_RULES,
+        use_cache=not args.no_cache,
+        jobs=args.jobs,
+        profile=args.profile,
+        partitions=args.partitions,
+        partition_by=args.partition_by,
+        partition_workers=args.partition_workers,
+        merge_from=args.shard_dir if args.merge else None,
+        merge_wait=args.merge_wait,
+        qa=args.qa,
+        harvest_report=args.harvest_report,
+        harvest_parquet=args.harvest_parquet,
     )
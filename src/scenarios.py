@@ -0,0 +1,244 @@
+"""
+scenarios.py — Scenario Fan-out over Management Schedules
+==========================================================
+Runs alternative management schedules (e.g. DRAFT6 vs DRAFT7, other
+thinning regimes) against the same spatial, yields and condition inputs.
+Ingest and steps 02-04 run once (run_pipeline.py, through the step cache);
+each schedule then runs load_schedule, validate and steps 05-08 in its own
+worker process, writing to SCENARIO_DIR/<name>/ (name: the schedule's file
+stem).
+
+The outputs common to every scenario (classifiers.csv, yield_curves.csv,
+inventory.gpkg) are hard-linked into each scenario directory, not copied.
+Where a link is impossible (another filesystem), the scenario's
+scenario.json points at the shared file instead. A link is the same file,
+so rerunning 02-04 with changed inputs updates it in every scenario; rerun
+the scenarios too. Each scenario directory also holds its log
+(scenario.log) and run manifest.
+
+Step 07 adds the scenario's thinning disturbance types to the AIDB, so
+every scenario updates its own copy of it (SCENARIO_DIR/<name>/<aidb file>).
+
+With harvest_report, each scenario also reports its harvested volume and
+area (harvest_report.py), and the reports of the scenarios that ran are
+stacked with a scenario column into SCENARIO_DIR/harvest_report.csv.
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from importlib import import_module
+from pathlib import Path
+
+import pandas as pd
+
+from config import (
+    OUTPUT_DIR, SCENARIO_DIR, SCHEDULE_SHEET, COMPRESS_TRANSITION_RULES, HARVEST_REPORT_PARQUET,
+)
+import instrumentation
+
+
+# Written once to OUTPUT_DIR by steps 02-04 and shared by every scenario
+COMMON_OUTPUTS = ["classifiers.csv", "yield_curves.csv", "inventory.gpkg"]
+
+# Artifacts of ingest and 02-04 a scenario worker needs
+COMMON_INPUTS = ["spatial", "yields1", "yields2", "yields3", "condition_initial", "stands"]
+
+SCENARIO_MANIFEST = "scenario.json"
+
+
+# =============================================================================
+# SCENARIOS
+# =============================================================================
+
+def scenario_names(schedules):
+    """
+    Name each schedule file after its stem.
+
+    Returns:
+        dict of name -> schedule Path, in input order
+    """
+    paths = [Path(p).resolve() for p in schedules]
+    names = pd.Series([p.stem for p in paths])
+    dupes = sorted(names[names.duplicated()].unique())
+    if dupes:
+        raise ValueError(f"Schedules must have distinct file names; shared: {dupes}")
+    return dict(zip(names, paths))
+
+
+def link_common(scenario_dir, common_dir=OUTPUT_DIR, names=COMMON_OUTPUTS):
+    """
+    Hard-link the shared outputs of common_dir into scenario_dir.
+
+    Returns:
+        dict of file name -> {"path": file the scenario should read,
+        "linked": whether it is a link inside scenario_dir}
+    """
+    scenario_dir = Path(scenario_dir)
+    common = {}
+    for name in names:
+        source, target = Path(common_dir) / name, scenario_dir / name
+        target.unlink(missing_ok=True)
+        try:
+            os.link(source, target)
+            common[name] = {"path": str(target), "linked": True}
+        except OSError:
+            common[name] = {"path": str(source), "linked": False}
+    return common
+
+
+def run_scenario(name, schedule_path, inputs, scenario_dir, aidb_path=None, dry_run=False,
+                 compress=COMPRESS_TRANSITION_RULES, settings=None, harvest_report=False,
+                 harvest_parquet=HARVEST_REPORT_PARQUET):
+    """
+    Pool worker: run load_schedule, validate and steps 05-08 (and the
+    harvest report) for one schedule, with outputs and log in scenario_dir.
+
+    Parameters:
+        name: Scenario name
+        schedule_path: Management schedule .xlsx
+        inputs: dict of COMMON_INPUTS artifacts
+        scenario_dir: Output directory of this scenario
+        aidb_path: Optional AIDB; the scenario's copy of it is updated
+        dry_run: AIDB: report without modifying
+        compress: Write wildcard-compressed transition rules
+        settings: instrumentation settings of the parent process
+        harvest_report: Also report harvested volume and area
+        harvest_parquet: Also write the report as Parquet (if pyarrow is installed)
+
+    Returns:
+        (summary dict, instrumentation records)
+    """
+    scenario_dir = Path(scenario_dir)
+    scenario_dir.mkdir(parents=True, exist_ok=True)
+    if settings is not None:
+        instrumentation.configure(**{**settings, "profile_dir": scenario_dir / "profiles"})
+    instrumentation.reset()
+    started = datetime.now()
+    summary = {"scenario": name, "schedule": str(schedule_path), "status": "ok",
+               "n_events": None, "n_rules": None, "error": None}
+    common = None
+
+    def step(step_name, fn, *args, **kwargs):
+        return instrumentation.measure(step_name, fn, args, kwargs, kind="step")
+
+    with open(scenario_dir / "scenario.log", "w") as log, contextlib.redirect_stdout(log):
+        try:
+            ingest = import_module("01_ingest")
+            common = link_common(scenario_dir)
+            schedule = step("ingest_schedule", ingest.load_schedule, schedule_path, SCHEDULE_SHEET)
+            step("validate", ingest.validate,
+                 inputs["spatial"], inputs["yields1"], inputs["condition_initial"], schedule)
+            events, _ = step(
+                "05_disturbances", import_module("05_disturbances").run,
+                schedule, inputs["spatial"], inputs["yields1"], inputs["yields3"], inputs["yields2"],
+                condition_initial=inputs["condition_initial"], output_dir=scenario_dir,
+            )
+            if harvest_report:
+                step("harvest_report", import_module("harvest_report").run,
+                     events, inputs["yields1"], inputs["yields2"], inputs["yields3"],
+                     output_dir=scenario_dir, parquet=harvest_parquet)
+            rules = step("06_transitions", import_module("06_transitions").run,
+                         events, inputs["stands"], compress=compress, output_dir=scenario_dir)
+            if aidb_path is not None:
+                aidb_copy = scenario_dir / Path(aidb_path).name
+                shutil.copy2(aidb_path, aidb_copy)
+                step("07_aidb_thinning", import_module("07_aidb_thinning").run,
+                     aidb_copy, events_or_csv=events, dry_run=dry_run, output_dir=scenario_dir)
+            step("08_tiler_config", import_module("08_tiler_config").run,
+                 inventory_path=common["inventory.gpkg"]["path"], events=events,
+                 output_dir=scenario_dir)
+            summary.update(n_events=len(events), n_rules=len(rules))
+        except Exception as e:
+            traceback.print_exc()
+            summary.update(status="failed", error=f"{type(e).__name__}: {e}")
+
+    records = list(instrumentation.RECORDS)
+    report = [{"step": r["name"], "status": "ran", "seconds": r["wall_s"]}
+              for r in records if r["kind"] == "step"]
+    instrumentation.write_manifest(report, started, options={
+        "scenario": name, "schedule": schedule_path, "aidb_path": aidb_path,
+        "dry_run": dry_run, "compress_rules": compress, "harvest_report": harvest_report,
+        "harvest_parquet": harvest_parquet,
+    }, output_dir=scenario_dir)
+    with open(scenario_dir / SCENARIO_MANIFEST, "w") as f:
+        json.dump({**summary, "common_dir": str(OUTPUT_DIR), "common": common}, f, indent=2)
+
+    for record in records:
+        record["scenario"] = name
+    return summary, records
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def run(inputs, schedules, workers=None, aidb_path=None, dry_run=False,
+        compress=COMPRESS_TRANSITION_RULES, scenario_dir=SCENARIO_DIR, harvest_report=False,
+        harvest_parquet=HARVEST_REPORT_PARQUET):
+    """
+    Main entry point: the schedule-dependent steps for every schedule.
+
+    Parameters:
+        inputs: dict of COMMON_INPUTS artifacts (ingest and steps 02-04)
+        schedules: Management schedule files, one per scenario
+        workers: Max worker processes (default: one per scenario, capped
+                 at the CPU count)
+        aidb_path: Optional AIDB each scenario updates a copy of
+        dry_run: AIDB: report without modifying
+        compress: Write wildcard-compressed transition rules
+        scenario_dir: Parent directory of the scenario directories
+        harvest_report: Also report harvested volume and area per scenario
+        harvest_parquet: Also write the reports as Parquet (if pyarrow is installed)
+
+    Returns:
+        DataFrame with one row per scenario (also written to
+        scenario_dir/scenarios.csv)
+    """
+    print("=" * 60)
+    print("scenarios: Running steps 05-08 per management schedule")
+    print("=" * 60)
+
+    scenarios = scenario_names(schedules)
+    scenario_dir = Path(scenario_dir)
+    inputs = {name: inputs[name] for name in COMMON_INPUTS}
+    n_workers = min(len(scenarios), workers or os.cpu_count() or 1)
+    print(f"\n  Scenarios: {len(scenarios)}, worker processes: {n_workers}")
+
+    start = time.perf_counter()
+    summaries = {}
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = [
+            pool.submit(run_scenario, name, path, inputs, scenario_dir / name, aidb_path,
+                        dry_run, compress, instrumentation.settings(), harvest_report,
+                        harvest_parquet)
+            for name, path in scenarios.items()
+        ]
+        for future in futures:
+            summary, records = future.result()
+            summaries[summary["scenario"]] = summary
+            instrumentation.RECORDS.extend(records)
+            print(f"  {summary['scenario']:<32} {summary['status']:<7} "
+                  f"events {summary['n_events']}, rules {summary['n_rules']}")
+            if summary["error"]:
+                print(f"    {summary['error']} (log: {scenario_dir / summary['scenario']}/scenario.log)")
+
+    result = pd.DataFrame([summaries[name] for name in scenarios])
+    scenario_dir.mkdir(parents=True, exist_ok=True)
+    result.to_csv(scenario_dir / "scenarios.csv", index=False)
+    print(f"\n  {int((result['status'] == 'ok').sum())}/{len(result)} scenarios ok "
+          f"in {time.perf_counter() - start:.1f}s")
+    print(f"  Wrote {scenario_dir / 'scenarios.csv'}")
+
+    if harvest_report:
+        ok = result.loc[result["status"] == "ok", "scenario"]
+        reports = {name: scenario_dir / name for name in ok}
+        harvest = import_module("harvest_report").combine(reports, scenario_dir, parquet=harvest_parquet)
+        print(f"  Wrote {scenario_dir / 'harvest_report.csv'} "
+              f"({len(reports)} scenarios, {len(harvest)} rows)")
+    return result
@@ -0,0 +1,451 @@
+"""
+shard_coordinator.py — Multi-Node Shard Execution
+==================================================
+Runs the partitioned steps 02-06 (partition.py) across several processes
+or batch nodes that share nothing but a directory. There is no scheduler
+service: all coordination goes through files in the shard directory.
+
+  shard_manifest.json     plan: shard count, partition mode, source file
+                          hashes, rows per shard
+  inputs/shard_<i>.pkl    the shard's slice of the ingest outputs
+  inputs/spatial.pkl      stand geometry, for the merge
+  locks/shard_<i>.lock    held while a worker computes shard i
+  results/shard_<i>.pkl   the shard's step 02-06 frames
+  done/shard_<i>.json     completion record (host, pid, timings, records)
+  logs/shard_<i>.log      the worker's output
+
+Lifecycle:
+  1. plan — the first worker to find no manifest takes locks/plan.lock,
+     ingests the inputs, splits them and writes the manifest last; other
+     workers wait for the manifest.
+  2. shards — a worker takes a shard's lock (exclusive create), computes
+     the shard, writes its results and then its done record, and releases
+     the lock. "next" workers keep claiming shards that are neither done
+     nor locked until none are left.
+  3. merge — once every shard has a done record, the results are merged
+     into the final outputs (partition.merge_shards).
+
+Workers joining an existing plan and the merge recompute the source file
+hashes and refuse a plan split from other inputs.
+
+Files are written under a temporary name and renamed, so readers never see
+a partial file. A lock's mtime is refreshed every SHARD_HEARTBEAT_SECONDS
+while its holder works; a lock older than SHARD_LOCK_STALE_SECONDS is left
+by a dead worker and is broken by the next claimant, so a crashed shard is
+retried. Should two workers ever compute the same shard they write
+identical results.
+
+Exclusive file creation is atomic on local filesystems and on NFSv3+; the
+shard directory must live on such storage.
+
+Local test with several processes:
+    python run_pipeline.py --shard next/4 --shard-dir /tmp/shards &
+    python run_pipeline.py --shard next/4 --shard-dir /tmp/shards &
+    python run_pipeline.py --merge --shard-dir /tmp/shards --merge-wait 3600
+"""
+
+import json
+import os
+import pickle
+import socket
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+import config
+import instrumentation
+import partition
+from config import SHARD_HEARTBEAT_SECONDS, SHARD_LOCK_STALE_SECONDS
+from pipeline_dag import hash_source_file
+
+
+MANIFEST_NAME = "shard_manifest.json"
+
+# Ingest outputs a plan splits (see partition.split_inputs)
+PLAN_INPUTS = ("spatial", "condition_initial", "yields1", "yields2", "yields3", "schedule")
+
+# Source files whose hashes are recorded in the manifest
+PLAN_SOURCES = ("SHAPEFILE", "YIELDS1_CSV", "YIELDS2_CSV", "YIELDS3_CSV",
+                "CONDITION_XLSX", "SCHEDULE_XLSX")
+
+POLL_SECONDS = 2.0
+
+
+def parse_shard_spec(spec):
+    """'i/N' -> (i, N); 'next/N' -> (None, N)."""
+    index, sep, total = str(spec).partition("/")
+    if not sep or not total.isdigit() or int(total) < 1 or not (index == "next" or index.isdigit()):
+        raise ValueError(f"Invalid shard '{spec}'; expected i/N (0 <= i < N) or next/N")
+    n_shards = int(total)
+    if index == "next":
+        return None, n_shards
+    if int(index) >= n_shards:
+        raise ValueError(f"Shard {index} out of range for {n_shards} shards")
+    return int(index), n_shards
+
+
+def _name(shard):
+    return f"shard_{shard:03d}"
+
+
+def _owner():
+    return {"host": socket.gethostname(), "pid": os.getpid()}
+
+
+def _write_atomic(path, data):
+    """Write bytes under a temporary name and rename into place."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _write_json(path, obj):
+    _write_atomic(path, json.dumps(obj, indent=2, default=str).encode())
+
+
+# =============================================================================
+# LOCKS
+# =============================================================================
+
+class FileLock:
+    """Lock file taken by exclusive create, kept alive by a heartbeat."""
+
+    def __init__(self, path, stale_after=SHARD_LOCK_STALE_SECONDS,
+                 heartbeat=SHARD_HEARTBEAT_SECONDS):
+        self.path = Path(path)
+        self.stale_after = stale_after
+        self.heartbeat = heartbeat
+        self._stop = None
+        self._thread = None
+
+    def age(self):
+        """Seconds since the holder's last heartbeat (None if unlocked)."""
+        try:
+            return time.time() - self.path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def is_stale(self):
+        age = self.age()
+        return age is not None and age > self.stale_after
+
+    def owner(self):
+        try:
+            return json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def acquire(self):
+        """Take the lock if it is free or stale. Returns True if taken."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self.is_stale():
+                    return False
+                print(f"  Breaking stale lock {self.path.name} (held by {self.owner()})")
+                self.path.unlink(missing_ok=True)
+                continue
+            with os.fdopen(fd, "w") as f:
+                json.dump({**_owner(), "acquired": datetime.now().isoformat(timespec="seconds")}, f)
+            self._start_heartbeat()
+            return True
+        return False
+
+    def _start_heartbeat(self):
+        self._stop = threading.Event()
+
+        def beat():
+            while not self._stop.wait(self.heartbeat):
+                try:
+                    os.utime(self.path)
+                except FileNotFoundError:
+                    return
+
+        self._thread = threading.Thread(target=beat, daemon=True)
+        self._thread.start()
+
+    def release(self):
+        if self._stop is not None:
+            self._stop.set()
+            self._thread.join()
+            self._stop = self._thread = None
+        self.path.unlink(missing_ok=True)
+
+
+# =============================================================================
+# PLAN
+# =============================================================================
+
+def read_manifest(shard_dir):
+    """The shard manifest, or None if no plan has been written yet."""
+    path = Path(shard_dir) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def write_plan(shard_dir, n_shards, by, spatial, condition_initial, yields1, yields2,
+               yields3, schedule):
+    """
+    Split the ingest outputs into shard inputs and write the manifest.
+
+    Returns:
+        The manifest dict
+    """
+    shard_dir = Path(shard_dir)
+    assignment = partition.assign_shards(spatial, n_shards, by=by)
+    shards = partition.split_inputs(assignment, n_shards, spatial, condition_initial,
+                                    yields1, yields2, yields3, schedule)
+    entries = []
+    for i, inputs in shards.items():
+        path = shard_dir / "inputs" / f"{_name(i)}.pkl"
+        _write_atomic(path, pickle.dumps(inputs, protocol=pickle.HIGHEST_PROTOCOL))
+        entries.append({
+            "shard": i,
+            "inputs": path.relative_to(shard_dir).as_posix(),
+            "n_stands": int(inputs["spatial"]["STAND_KEY"].nunique()),
+            "n_schedule_rows": len(inputs["schedule"]),
+        })
+    _write_atomic(shard_dir / "inputs" / "spatial.pkl",
+                  pickle.dumps(spatial[["STAND_KEY", "geometry"]], protocol=pickle.HIGHEST_PROTOCOL))
+
+    manifest = {
+        "n_shards": n_shards,
+        "by": by,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        **_owner(),
+        "sources": {name: hash_source_file(getattr(config, name)) for name in PLAN_SOURCES},
+        "shards": entries,
+    }
+    _write_json(shard_dir / MANIFEST_NAME, manifest)
+    print(f"  Wrote shard plan: {len(entries)} non-empty shards of {n_shards} "
+          f"({shard_dir / MANIFEST_NAME})")
+    return manifest
+
+
+def check_sources(shard_dir, manifest):
+    """
+    Raise ValueError if a PLAN_SOURCES file changed since the plan was
+    written (the shard inputs were split from the old contents).
+    """
+    planned = manifest.get("sources", {})
+    changed = [name for name in PLAN_SOURCES
+               if planned.get(name) != hash_source_file(getattr(config, name))]
+    if changed:
+        raise ValueError(
+            f"{shard_dir} holds a plan for other source files ({', '.join(changed)} "
+            f"changed since {manifest['created']}); use a new --shard-dir"
+        )
+
+
+def ensure_plan(shard_dir, n_shards, by, load_inputs):
+    """
+    Return the shard manifest, planning it first if nobody has.
+
+    Parameters:
+        shard_dir: Shared shard directory
+        n_shards: Shard count the caller expects
+        by: Partition mode ("hash" or "tile")
+        load_inputs: Callable returning a dict with PLAN_INPUTS (only
+                     called by the worker that writes the plan)
+
+    Raises:
+        ValueError if an existing plan has another shard count or mode, or
+        was split from other source files
+    """
+    shard_dir = Path(shard_dir)
+    lock = FileLock(shard_dir / "locks" / "plan.lock")
+    waiting = False
+    planned_here = False
+    while True:
+        manifest = read_manifest(shard_dir)
+        if manifest is not None:
+            break
+        if lock.acquire():
+            try:
+                manifest = read_manifest(shard_dir)
+                if manifest is None:
+                    print(f"\n  Planning {n_shards} shards in {shard_dir}")
+                    manifest = write_plan(shard_dir, n_shards, by, **load_inputs())
+                    planned_here = True
+            finally:
+                lock.release()
+            break
+        if not waiting:
+            print(f"\n  Waiting for the shard plan (being written by {lock.owner()})")
+            waiting = True
+        time.sleep(POLL_SECONDS)
+
+    if manifest["n_shards"] != n_shards or manifest["by"] != by:
+        raise ValueError(
+            f"{shard_dir} holds a plan for {manifest['n_shards']} shards by "
+            f"{manifest['by']}, not {n_shards} by {by}; use a new --shard-dir"
+        )
+    if not planned_here:
+        check_sources(shard_dir, manifest)
+    return manifest
+
+
+# =============================================================================
+# SHARD WORKERS
+# =============================================================================
+
+def is_done(shard_dir, shard):
+    return (Path(shard_dir) / "done" / f"{_name(shard)}.json").exists()
+
+
+def compute_claimed_shard(shard_dir, entry):
+    """Compute a shard whose lock this process holds and publish its results."""
+    shard_dir = Path(shard_dir)
+    shard = entry["shard"]
+    started = datetime.now()
+    with open(shard_dir / entry["inputs"], "rb") as f:
+        inputs = pickle.load(f)
+    _, result, records = partition.run_shard(
+        shard, inputs, log_dir=shard_dir / "logs", settings=instrumentation.settings(),
+    )
+    _write_atomic(shard_dir / "results" / f"{_name(shard)}.pkl",
+                  pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+    finished = datetime.now()
+    _write_json(shard_dir / "done" / f"{_name(shard)}.json", {
+        "shard": shard,
+        **_owner(),
+        "started": started.isoformat(timespec="seconds"),
+        "finished": finished.isoformat(timespec="seconds"),
+        "seconds": round((finished - started).total_seconds(), 3),
+        "records": records,
+    })
+
+
+def run_shards(shard_dir, shard=None):
+    """
+    Compute shard `shard`, or with shard=None claim and compute shards
+    until every shard is done or locked by another worker.
+
+    Returns:
+        list of shard indexes this process computed
+    """
+    shard_dir = Path(shard_dir)
+    manifest = read_manifest(shard_dir)
+    entries = manifest["shards"]
+    if shard is not None:
+        entries = [e for e in entries if e["shard"] == shard]
+        if not entries:
+            print(f"  Shard {shard} has no stands; nothing to do")
+            return []
+
+    computed = []
+    for entry in entries:
+        i = entry["shard"]
+        if is_done(shard_dir, i):
+            if shard is not None:
+                print(f"  Shard {i} is already done")
+            continue
+        lock = FileLock(shard_dir / "locks" / f"{_name(i)}.lock")
+        if not lock.acquire():
+            if shard is not None:
+                print(f"  Shard {i} is being computed by {lock.owner()}")
+            continue
+        try:
+            # Another worker may have finished it between the check and the claim
+            if is_done(shard_dir, i):
+                continue
+            print(f"  Shard {i}: {entry['n_stands']} stands ...", flush=True)
+            start = time.perf_counter()
+            compute_claimed_shard(shard_dir, entry)
+            print(f"  Shard {i}: done in {time.perf_counter() - start:.1f}s "
+                  f"(log: {shard_dir / 'logs' / (_name(i) + '.log')})")
+            computed.append(i)
+        finally:
+            lock.release()
+    return computed
+
+
+def status(shard_dir):
+    """
+    State of every planned shard: done, running, stale (lock of a dead
+    worker) or pending.
+
+    Returns:
+        DataFrame with shard, n_stands, state, host, pid, seconds
+    """
+    shard_dir = Path(shard_dir)
+    manifest = read_manifest(shard_dir)
+    rows = []
+    for entry in (manifest or {}).get("shards", []):
+        i = entry["shard"]
+        row = {"shard": i, "n_stands": entry["n_stands"], "state": "pending",
+               "host": None, "pid": None, "seconds": None}
+        done = shard_dir / "done" / f"{_name(i)}.json"
+        lock = FileLock(shard_dir / "locks" / f"{_name(i)}.lock")
+        if done.exists():
+            record = json.loads(done.read_text())
+            row.update(state="done", host=record["host"], pid=record["pid"],
+                       seconds=record["seconds"])
+        elif lock.age() is not None:
+            owner = lock.owner() or {}
+            row.update(state="stale" if lock.is_stale() else "running",
+                       host=owner.get("host"), pid=owner.get("pid"))
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["shard", "n_stands", "state", "host", "pid", "seconds"])
+
+
+# =============================================================================
+# MERGE
+# =============================================================================
+
+def merge(shard_dir, compress=False, wait=0):
+    """
+    Merge the shard results into the final step 02-06 outputs.
+
+    Parameters:
+        shard_dir: Shared shard directory
+        compress: Write wildcard-compressed transition rules
+        wait: Seconds to wait for unfinished shards (0 = fail at once)
+
+    Returns:
+        (stands, classifier_values, curves, inventory, events, events_geo, rules)
+
+    Raises:
+        FileNotFoundError if there is no plan, ValueError if the source
+        files changed since the plan was written, RuntimeError if shards
+        are still unfinished after `wait` seconds
+    """
+    shard_dir = Path(shard_dir)
+    manifest = read_manifest(shard_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No shard plan in {shard_dir}; run workers with --shard first")
+    check_sources(shard_dir, manifest)
+
+    deadline = time.monotonic() + wait
+    while True:
+        table = status(shard_dir)
+        missing = table[table["state"] != "done"]
+        if len(missing) == 0:
+            break
+        if time.monotonic() >= deadline:
+            raise RuntimeError(
+                f"{len(missing)} of {len(table)} shards are not done: "
+                + ", ".join(f"{r.shard} ({r.state})" for r in missing.itertuples())
+            )
+        time.sleep(POLL_SECONDS)
+
+    results = []
+    for entry in manifest["shards"]:
+        name = _name(entry["shard"])
+        with open(shard_dir / "results" / f"{name}.pkl", "rb") as f:
+            results.append(pickle.load(f))
+        done = json.loads((shard_dir / "done" / f"{name}.json").read_text())
+        instrumentation.RECORDS.extend(done["records"])
+    with open(shard_dir / "inputs" / "spatial.pkl", "rb") as f:
+        spatial = pickle.load(f)
+
+    print(f"  Shards: {len(results)} ({', '.join(sorted(set(table['host'].astype(str))))})")
+    return partition.merge_shards(results, spatial, compress=compress)
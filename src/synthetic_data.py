@@ -0,0 +1,750 @@
+"""
+synthetic_data.py — Synthetic Input Generator
+==============================================
+Writes a complete, internally consistent set of pipeline inputs for an
+arbitrary number of stands, in the exact layouts 01_ingest reads:
+
+  - spatial/<SHAPEFILE>           stand polygons (EPSG:4326) with STAND_KEY,
+                                  GIS_AREA (acres), ORIGIN, DOMSPECLAB, DOM_SPEC,
+                                  STAND_AGE, SITE_INDEX
+  - yields/.../Yields1 CSV        unthinned stand-specific curves, every forest stand
+  - yields/.../Yields2 CSV        SI x species regen curves (ages 1-50)
+  - yields/.../Yields3 CSV        thinning variants for every thinned stand,
+                                  with pipe-delimited pre|post values at thin ages
+  - yields/.../Condition xlsx     "Condition" sheet, period 0 (+ later periods)
+  - managment_schedule/... xlsx   "Activity rawdata" sheet (TH1-TH13 + AGE, AREA,
+                                  ACTION, PERIOD, YEAR, harvest volumes)
+
+Stands follow simple rotations (planting, 1st/2nd thin, clearcut, site prep,
+replanting on Yields2 curves, occasional split-year clearcuts) so every
+thinning event finds its curves and steps 02-08 exercise their normal paths.
+The output is a project root: point the pipeline at it with IWC_PROJECT_ROOT.
+
+Sheets longer than Excel's 1,048,576 rows (the schedule from ~200k stands)
+are still written; openpyxl/pandas read them, Excel itself will not open them.
+
+Usage:
+    python synthetic_data.py --stands 100000 [--out DIR] [--seed 0] [--condition-periods N]
+    IWC_PROJECT_ROOT=DIR python run_pipeline.py --skip-aidb
+"""
+
+import argparse
+import json
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from config import (
+    PROJECT_ROOT,
+    SHAPEFILE,
+    YIELDS1_CSV,
+    YIELDS2_CSV,
+    YIELDS3_CSV,
+    CONDITION_XLSX,
+    SCHEDULE_XLSX,
+    SCHEDULE_SHEET,
+    SCHEDULE_COLUMNS,
+    SYNTHETIC_DIR,
+    ACRES_TO_HA,
+    DOM_SPEC_TO_CODE,
+    SIM_START_YEAR,
+    PROJECTION_LENGTH,
+    MAX_AGE_YIELDS1,
+    MAX_AGE_YIELDS2,
+)
+
+
+EXCEL_MAX_ROWS = 1_048_576
+MANIFEST_NAME = "synthetic_manifest.json"
+
+# Stands per chunk when writing the stand-specific yield tables
+CHUNK_STANDS = 20_000
+
+# Forest species mix (condition codes); non-forest share is OPEN_SHARE
+SPECIES_MIX = {
+    "LB": 0.50, "LL": 0.08, "SL": 0.08, "PH": 0.08, "HH": 0.10, "SH": 0.06,
+    "COLB": 0.04, "COLL": 0.03, "COSL": 0.03,
+}
+OPEN_SHARE = 0.03
+
+YIELD_PRODUCTS = [
+    "P_GREENTONSPA", "P_TOP4M3PA", "qP_GREENTONSPA", "qP_TOP4M3PA",
+    "H_GREENTONSPA", "H_TOP4M3PA",
+]
+GREEN_TONS_PER_M3 = {"P": 0.855, "H": 1.04}
+
+# Yields2 grid: every SI class x regen species x thinning variant
+REGEN_SI = list(range(50, 101, 5))
+REGEN_SPECIES = ["LB", "LL", "SL"]
+REGEN_THIN1_AGES = list(range(12, 17))
+REGEN_THIN2_AGES = [19, 20, 21]
+REGEN_HW_FRAC = 0.03
+REGEN_THIN2_REMOVAL = 0.25
+
+ACTION_NUMBERS = {"aSP": 2, "aPLT": 3, "aFERTM": 5, "aFERTL": 6,
+                  "aHTHIN1": 7, "aHTHIN2": 8, "aHCC": 9}
+
+# Boothill-like location for the stand grid
+ORIGIN_LON, ORIGIN_LAT = -88.6, 31.75
+METERS_PER_DEGREE = 111_320.0
+
+
+# =============================================================================
+# GROWTH MODEL
+# =============================================================================
+
+def _thin_multiplier(ages, thin_age, removal):
+    """Share of the unthinned volume left after a thin, recovering with age."""
+    after = (thin_age > 0) & (ages >= thin_age)
+    return np.where(after, 1.0 - removal * np.exp(-0.04 * (ages - thin_age)), 1.0)
+
+
+def volume_curves(si, hw_frac, ages, t1=0, r1=0.0, t2=0, r2=0.0):
+    """
+    Pine, hardwood and removed-pine volume (m³/acre) by age for a trajectory.
+
+    All arguments broadcast (e.g. stand columns against a row of ages).
+    Values at a thin age are post-thin; removed = pre - post at that age.
+
+    Returns:
+        (pine, hardwood, removed) arrays
+    """
+    base = 4.0 * si * (1.0 - np.exp(-0.08 * ages)) ** 3
+    m1 = _thin_multiplier(ages, t1, r1)
+    m2 = _thin_multiplier(ages, t2, r2)
+    pine = base * (1.0 - hw_frac)
+    removed = (np.where((t1 > 0) & (ages == t1), pine * r1, 0.0)
+               + np.where((t2 > 0) & (ages == t2), pine * m1 * r2, 0.0))
+    return pine * m1 * m2, base * hw_frac * m1 * m2, removed
+
+
+def regen_removal(thin1_age):
+    """1st-thin removal share on Yields2 curves (varies with thin age)."""
+    return 0.30 + 0.01 * (np.asarray(thin1_age) - 12)
+
+
+# =============================================================================
+# STANDS
+# =============================================================================
+
+def make_stands(n_stands, rng):
+    """
+    Draw stand attributes and rotation plans.
+
+    Returns:
+        DataFrame with one row per stand (stand_key, spatial attributes,
+        condition attributes, planned thin/clearcut ages and removals)
+    """
+    idx = np.arange(n_stands)
+    tract = 1000 + idx // 400
+    stands = pd.DataFrame({
+        "stand_key": [f"SY{t}-1-{i}" for t, i in zip(tract, idx % 400 + 1)],
+        "area": np.round(np.clip(rng.lognormal(np.log(30.0), 0.8, n_stands), 1.0, 400.0), 2),
+        "zone": rng.integers(1, 3, n_stands),
+        "grow_type": rng.choice(["STP1", "STP2", "STP3", "STP4"], n_stands),
+    })
+
+    species = rng.choice(list(SPECIES_MIX), n_stands, p=list(SPECIES_MIX.values()))
+    is_open = rng.random(n_stands) < OPEN_SHARE
+    species = np.where(is_open, "UD", species)
+    pine = np.isin(species, ["LB", "LL", "SL"])
+    cutover = np.char.startswith(species.astype(str), "CO")
+    hardwood = np.isin(species, ["HH", "SH"])
+    planted = pine & (rng.random(n_stands) < 0.8)
+
+    mgmt = np.select(
+        [is_open, cutover, planted, hardwood & (rng.random(n_stands) < 0.5)],
+        ["none", "cutover", "plantation", "none"],
+        "natural",
+    )
+    stands["species"] = species
+    stands["mgmt"] = mgmt
+    stands["origin"] = np.select(
+        [is_open, cutover, planted], ["ONO", "OY", "PY"], "NN",
+    )
+    code_to_long = {v: k for k, v in DOM_SPEC_TO_CODE.items()}
+    stands["DOMSPECLAB"] = np.where(cutover, "CO", species)
+    stands["DOM_SPEC"] = stands["DOMSPECLAB"].map(code_to_long)
+    stands["ORIGIN"] = np.select([is_open, cutover | planted], ["Open", "Planted"], "Natural")
+    stands.loc[is_open, "grow_type"] = "NOGROW"
+
+    stands["age"] = np.select(
+        [is_open, cutover, planted, hardwood],
+        [0, 0, rng.integers(1, 36, n_stands), rng.integers(20, 81, n_stands)],
+        rng.integers(15, 71, n_stands),
+    )
+    stands["si"] = np.select(
+        [is_open, pine | cutover, species == "PH"],
+        [0, rng.integers(60, 96, n_stands), rng.integers(55, 81, n_stands)],
+        rng.integers(45, 76, n_stands),
+    )
+    stands["hw_frac"] = np.select(
+        [planted | cutover, pine, species == "PH", species == "HH", species == "SH"],
+        [0.03, 0.15, 0.40, 0.85, 0.75],
+        0.0,
+    )
+
+    # Rotation 1 plan: thins for plantations and cutovers only
+    thinned = np.isin(mgmt, ["plantation", "cutover"]) & (rng.random(n_stands) < 0.8)
+    t1 = np.where(thinned, rng.integers(12, 18, n_stands), 0)
+    t2 = np.where(thinned & (rng.random(n_stands) < 0.5), t1 + rng.integers(4, 8, n_stands), 0)
+    fert = thinned & (rng.random(n_stands) < 0.25)
+    stands["t1"], stands["t2"] = t1, t2
+    stands["r1"] = np.round(rng.uniform(0.25, 0.45, n_stands), 4)
+    stands["r2"] = np.round(rng.uniform(0.20, 0.35, n_stands), 4)
+    stands["fert1"] = np.where(fert, rng.integers(15, 19, n_stands), 0)
+    stands["fert2"] = np.where(fert & (t2 > 0), rng.integers(20, 23, n_stands), 0)
+    stands["rotation_age"] = np.select(
+        [np.isin(mgmt, ["plantation", "cutover"]), hardwood],
+        [np.maximum(rng.integers(25, 33, n_stands), t2 + 2), rng.integers(50, 81, n_stands)],
+        rng.integers(40, 61, n_stands),
+    )
+    # Stands already past rotation age are cut over the first decade
+    stands["cc_delay"] = rng.integers(1, 11, n_stands)
+    stands["split_cc"] = rng.random(n_stands) < 0.08
+    stands["split_share"] = np.round(rng.uniform(0.3, 0.7, n_stands), 3)
+
+    # Regen (rotation 2+) plan on Yields2 curves
+    regen_thinned = rng.random(n_stands) < 0.8
+    stands["regen_t1"] = np.where(regen_thinned, rng.choice(REGEN_THIN1_AGES, n_stands), 0)
+    stands["regen_t2"] = np.where(
+        regen_thinned & (rng.random(n_stands) < 0.5), rng.choice(REGEN_THIN2_AGES, n_stands), 0,
+    )
+    stands["regen_rotation_age"] = rng.integers(25, 33, n_stands)
+
+    # Thins already done at period 0 (condition Thin1/Thin2)
+    stands["thin1_done"] = np.where((t1 > 0) & (stands["age"] >= t1), t1, 0)
+    stands["thin2_done"] = np.where((t2 > 0) & (stands["age"] >= t2), t2, 0)
+    stands["treatment_type"] = np.select([t1 == 0, t2 == 0], ["NO", "T1"], "MT2")
+    stands["management_type"] = np.select(
+        [is_open, np.isin(mgmt, ["plantation", "cutover"])], ["UA", "FE"], "FU",
+    )
+    return stands
+
+
+# =============================================================================
+# SCHEDULE + CONDITION SIMULATION
+# =============================================================================
+
+def simulate(stands, condition_periods):
+    """
+    Step every stand through the projection and record schedule actions and
+    condition states.
+
+    Follows the conventions of the real workbooks (see qa_reconcile.py):
+    an action's AGE is the Condition AGE of the previous period; a
+    clearcut, site prep or planting restarts AGE at 1 in its own period,
+    with aSP and aPLT in the two periods after the clearcut; a split
+    clearcut leaves the stand as two parcels (two Condition rows per
+    period) until site prep. Schedule thin1/thin2 columns hold the state
+    BEFORE the action (as in the real Activity rawdata sheet).
+
+    Returns:
+        (schedule DataFrame, condition DataFrame)
+    """
+    sched = {k: [] for k in ("i", "p", "age", "area", "action", "th1", "th2",
+                             "f1", "f2", "rot", "origin")}
+    cond = {k: [] for k in ("i", "p", "age", "area", "th1", "th2", "f1", "f2", "rot", "origin")}
+
+    def emit(i, p, age, area, action, th1, th2, f1, f2, rot, origin):
+        for k, v in zip(sched, (i, p, age, area, action, th1, th2, f1, f2, rot, origin)):
+            sched[k].append(v)
+
+    def record(i, p, age, area, th1, th2, f1, f2, rot, origin):
+        for k, v in zip(cond, (i, p, age, area, th1, th2, f1, f2, rot, origin)):
+            cond[k].append(v)
+
+    cols = ["mgmt", "age", "area", "t1", "t2", "fert1", "fert2", "rotation_age", "cc_delay",
+            "split_cc", "split_share", "regen_t1", "regen_t2", "regen_rotation_age",
+            "thin1_done", "thin2_done", "origin"]
+    for i, row in enumerate(stands[cols].itertuples(index=False)):
+        (mgmt, age, area, t1, t2, f1, f2, rot_age, cc_delay, split_cc, split_share,
+         rt1, rt2, rrot, th1, th2, origin) = row
+        rotation = 1
+        # Site prep and planting by period; cutovers are planted first
+        regen = {1: "aSP", 2: "aPLT"} if mgmt == "cutover" else {}
+        split_at = share_area = share_age = None
+        record(i, 0, age, area, th1, th2, f1, f2, rotation, origin)
+
+        for p in range(1, PROJECTION_LENGTH + 1):
+            # age: the stand's age entering period p (its Condition AGE of p - 1)
+            restart = cut = False
+            if p in regen:
+                emit(i, p, age, 0.0, regen[p], th1, th2, f1, f2, rotation, origin)
+                restart, share_age = True, None
+            elif p == split_at:
+                emit(i, p, age, round(area - share_area, 2), "aHCC",
+                     th1, th2, f1, f2, rotation, origin)
+                restart = cut = True
+            elif mgmt != "none" and p > max(regen, default=0) and split_at is None:
+                if rotation == 1 and f1 and age == f1:
+                    emit(i, p, age, 0.0, "aFERTM", th1, th2, f1, f2, rotation, origin)
+                if rotation == 1 and f2 and age == f2:
+                    emit(i, p, age, 0.0, "aFERTL", th1, th2, f1, f2, rotation, origin)
+
+                if t1 and not th1 and age == t1:
+                    emit(i, p, age, area, "aHTHIN1", th1, th2, f1, f2, rotation, origin)
+                    th1 = t1
+                elif t2 and th1 and not th2 and age == t2:
+                    emit(i, p, age, area, "aHTHIN2", th1, th2, f1, f2, rotation, origin)
+                    th2 = t2
+                elif age >= rot_age and p >= cc_delay:
+                    if split_cc and p < PROJECTION_LENGTH - 1:
+                        # Part of the stand now, the rest next period
+                        share_area = round(area * split_share, 2)
+                        emit(i, p, age, share_area, "aHCC", th1, th2, f1, f2, rotation, origin)
+                        split_at, share_age = p + 1, 0
+                    else:
+                        emit(i, p, age, area, "aHCC", th1, th2, f1, f2, rotation, origin)
+                        restart = cut = True
+
+            if cut:
+                rotation, origin = rotation + 1, "PY"
+                th1 = th2 = f1 = f2 = 0
+                t1, t2, rot_age, cc_delay = rt1, rt2, rrot, 1
+                regen, split_at = {p + 1: "aSP", p + 2: "aPLT"}, None
+            age = 1 if restart else age + 1
+            if share_age is not None:
+                share_age += 1
+
+            if p <= condition_periods:
+                if share_age is None:
+                    record(i, p, age, area, th1, th2, f1, f2, rotation, origin)
+                else:
+                    record(i, p, share_age, share_area, th1, th2, f1, f2, rotation, origin)
+                    record(i, p, age, round(area - share_area, 2), th1, th2, f1, f2, rotation, origin)
+
+    return _schedule_frame(stands, pd.DataFrame(sched)), _condition_frame(stands, pd.DataFrame(cond))
+
+
+def _rotation_params(stands, i, rotation):
+    """Volume model inputs (si, hw_frac, r1, r2) per record for its rotation."""
+    regen = rotation > 1
+    si = stands["si"].to_numpy()[i]
+    hw = np.where(regen, REGEN_HW_FRAC, stands["hw_frac"].to_numpy()[i])
+    r1 = np.where(regen, regen_removal(stands["regen_t1"].to_numpy()[i]), stands["r1"].to_numpy()[i])
+    r2 = np.where(regen, REGEN_THIN2_REMOVAL, stands["r2"].to_numpy()[i])
+    return si, hw, r1, r2
+
+
+def _schedule_frame(stands, ev):
+    """Activity rawdata sheet from simulated actions."""
+    i = ev["i"].to_numpy()
+    st = stands.iloc[i].reset_index(drop=True)
+    rotation = ev["rot"].to_numpy()
+    si, hw, r1, r2 = _rotation_params(stands, i, rotation)
+    age = ev["age"].to_numpy().astype(float)
+    th1 = ev["th1"].to_numpy()
+    action = ev["action"].to_numpy()
+
+    pine, hard, _ = volume_curves(si, hw, age, th1, r1)
+    share = np.select([action == "aHTHIN1", action == "aHTHIN2", action == "aHCC"], [r1, r2, 1.0], 0.0)
+    pine_tons = np.round(pine * share * GREEN_TONS_PER_M3["P"], 2)
+    hw_tons = np.round(np.where(action == "aHCC", hard, 0.0) * GREEN_TONS_PER_M3["H"], 2)
+    harvest = share > 0
+    tpa = np.where(harvest, np.round(550.0 * np.exp(-0.03 * age), 2), np.nan)
+    ba = np.where(harvest, np.round(0.6 * pine, 2), np.nan)
+    qmd = np.where(harvest, np.sqrt(ba / (0.005454 * tpa)), np.nan)
+
+    sched = pd.DataFrame({
+        "stand_key": st["stand_key"],
+        "species": st["species"],
+        "origin": ev["origin"],
+        "grow_type": st["grow_type"],
+        "si": st["si"],
+        "fert0": 0,
+        "fert1": ev["f1"],
+        "fert2": ev["f2"],
+        "thin1": ev["th1"],
+        "thin2": ev["th2"],
+        "zone": st["zone"],
+        "treatment_type": st["treatment_type"],
+        "management_type": np.where(rotation > 1, "FE", st["management_type"]),
+        "AGE": ev["age"],
+        "AREA": np.where(ev["area"] > 0, ev["area"], st["area"]),
+        "ACTION": action,
+        "PERIOD": ev["p"],
+        "YEAR": SIM_START_YEAR + ev["p"] - 1,
+        "ACTNO": pd.Series(action).map(ACTION_NUMBERS),
+        "OPPROD0_HA": 0,
+        "OPPROD1_HA": np.round(pine_tons * 0.45, 2),
+        "OPPROD2_HA": np.round(pine_tons * 0.35, 2),
+        "OPPROD3_HA": np.round(pine_tons * 0.02, 2),
+        "OPPROD4_HA": np.round(pine_tons * 0.18, 2),
+        "OPINE_HARV": pine_tons,
+        "OHPW_HARVE": hw_tons,
+        "OHST_HARVE": 0.0,
+        "OTOTAL_HAR": np.round(pine_tons + hw_tons, 2),
+        "BA": ba,
+        "TPA": tpa,
+        "QMD": pd.Series(qmd).astype(object).where(harvest, "-"),
+    })
+    sched = sched.sort_values(["PERIOD", "ACTNO"], kind="stable").reset_index(drop=True)
+    # Back to the raw theme column names (TH1-TH13)
+    return sched.rename(columns={v: k for k, v in SCHEDULE_COLUMNS.items()})
+
+
+def _condition_frame(stands, cs):
+    """Condition sheet from simulated per-period states."""
+    i = cs["i"].to_numpy()
+    st = stands.iloc[i].reset_index(drop=True)
+    rotation = cs["rot"].to_numpy()
+    si, hw, r1, r2 = _rotation_params(stands, i, rotation)
+    pine, hard, _ = volume_curves(
+        si, hw, cs["age"].to_numpy().astype(float), cs["th1"].to_numpy(), r1, cs["th2"].to_numpy(), r2,
+    )
+    cond = pd.DataFrame({
+        "StandID": st["stand_key"],
+        "Species": st["species"],
+        "Origin": cs["origin"],
+        "GrowType": st["grow_type"],
+        "SI": st["si"],
+        "Fert0": 0,
+        "Fert1": cs["f1"],
+        "Fert2": cs["f2"],
+        "Thin1": cs["th1"],
+        "Thin2": cs["th2"],
+        "Zone": st["zone"],
+        "TreatmentType": st["treatment_type"],
+        "ManagementType": np.where(rotation > 1, "FE", st["management_type"]),
+        "AGE": cs["age"],
+        "AREA": cs["area"],
+        "PERIOD": cs["p"],
+        "YEAR": np.where(cs["p"] == 0, 0, SIM_START_YEAR + cs["p"] - 1),
+        "OP_TOP4M3P": np.round(pine, 2),
+        "OH_TOP4M3P": np.round(hard, 2),
+    })
+    return cond.sort_values(["PERIOD", "StandID"], kind="stable").reset_index(drop=True)
+
+
+# =============================================================================
+# YIELD TABLES
+# =============================================================================
+
+def _iwc_id(prefix, t1, t2, f1, f2):
+    return f"{prefix}-TPA-XX-BA-XX-T1-{t1}-T2-{t2}-F1-{f1}-F2-{f2}"
+
+
+def _product_rows(ids, pine, hard, removed, pre=None):
+    """
+    Six product rows per trajectory, in YIELD_PRODUCTS order.
+
+    If pre is given, pine cells at thin ages (removed > 0) are written as
+    "pre|post", the way the THINSIM export reports them.
+    """
+    n_traj, n_ages = pine.shape
+    blocks = np.stack([
+        pine * GREEN_TONS_PER_M3["P"], pine,
+        removed * GREEN_TONS_PER_M3["P"], removed,
+        hard * GREEN_TONS_PER_M3["H"], hard,
+    ], axis=1).reshape(-1, n_ages).round(5)
+    age_cols = [str(a) for a in range(1, n_ages + 1)]
+    df = pd.DataFrame(blocks, columns=age_cols)
+    df.insert(0, "iwc_id", np.repeat(ids, len(YIELD_PRODUCTS)))
+    df.insert(1, "Product", np.tile(YIELD_PRODUCTS, n_traj))
+    df.insert(2, "Type", "Yield")
+    df.insert(3, "Unit", "per acre")
+
+    if pre is not None:
+        thin_cells = np.repeat(removed > 0, len(YIELD_PRODUCTS), axis=0)
+        is_pine = np.tile([True, True, False, False, False, False], n_traj)
+        factors = np.tile([GREEN_TONS_PER_M3["P"], 1.0, 0, 0, 0, 0], n_traj)
+        for a in np.flatnonzero(thin_cells.any(axis=0)):
+            mask = thin_cells[:, a] & is_pine
+            col = age_cols[a]
+            pre_vals = np.repeat(pre[:, a], len(YIELD_PRODUCTS))[mask] * factors[mask]
+            df[col] = df[col].astype(object)
+            df.loc[mask, col] = [
+                f"{p:.5f}|{q:.5f}" for p, q in zip(pre_vals, df.loc[mask, col].astype(float))
+            ]
+    return df
+
+
+def stand_yield_tables(stands):
+    """
+    Yields1 and Yields3 rows for a chunk of stands.
+
+    Yields1: the unthinned trajectory of every forest stand.
+    Yields3: unthinned + 1st-thin + 2nd-thin trajectories of thinned stands.
+    Volumes are zero below the stand's current age, as in the stand-specific
+    exports.
+
+    Returns:
+        (yields1 DataFrame, yields3 DataFrame)
+    """
+    forest = stands[stands["species"].ne("UD")]
+    ages = np.arange(1, MAX_AGE_YIELDS1 + 1, dtype=float)
+
+    def table(sub, t1, t2, pipes):
+        si = sub["si"].to_numpy()[:, None]
+        hw = sub["hw_frac"].to_numpy()[:, None]
+        r1 = sub["r1"].to_numpy()[:, None]
+        r2 = sub["r2"].to_numpy()[:, None]
+        pine, hard, removed = volume_curves(si, hw, ages, t1[:, None], r1, t2[:, None], r2)
+        grown = ages >= np.maximum(sub["age"].to_numpy(), 1)[:, None]
+        pine, hard, removed = pine * grown, hard * grown, removed * grown
+        ids = [
+            _iwc_id(sk, a, b, f, g)
+            for sk, a, b, f, g in zip(sub["stand_key"], t1, t2, sub["fert1"], sub["fert2"])
+        ]
+        return _product_rows(ids, pine, hard, removed, pre=pine + removed if pipes else None)
+
+    zeros = np.zeros(len(forest), dtype=int)
+    y1 = table(forest, zeros, zeros, pipes=False)
+
+    thinned = forest[forest["t1"] > 0]
+    variants = [
+        (thinned, np.zeros(len(thinned), dtype=int), np.zeros(len(thinned), dtype=int)),
+        (thinned, thinned["t1"].to_numpy(), np.zeros(len(thinned), dtype=int)),
+    ]
+    two = thinned[thinned["t2"] > 0]
+    variants.append((two, two["t1"].to_numpy(), two["t2"].to_numpy()))
+    y3 = pd.concat([table(sub, a, b, pipes=True) for sub, a, b in variants], ignore_index=True)
+    return y1, y3
+
+
+def regen_yield_table():
+    """Yields2: SI x regen species x thinning variants, ages 1-50."""
+    ages = np.arange(1, MAX_AGE_YIELDS2 + 1, dtype=float)
+    combos = [(0, 0)] + [(a, 0) for a in REGEN_THIN1_AGES] + [
+        (a, b) for a in REGEN_THIN1_AGES for b in REGEN_THIN2_AGES
+    ]
+    keys = [(si, sp, a, b) for si in REGEN_SI for sp in REGEN_SPECIES for a, b in combos]
+    si, _, t1, t2 = (np.array(v) for v in zip(*keys))
+    pine, hard, removed = volume_curves(
+        si[:, None].astype(float), REGEN_HW_FRAC, ages,
+        t1[:, None], regen_removal(t1)[:, None], t2[:, None], REGEN_THIN2_REMOVAL,
+    )
+    ids = [_iwc_id(f"SI{s}-1-U-{sp}", a, b, 0, 0) for s, sp, a, b in keys]
+    return _product_rows(ids, pine, hard, removed)
+
+
+# =============================================================================
+# WRITERS
+# =============================================================================
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" Type="http://schemas.openxmlformats.org'
+        '/officeDocument/2006/relationships/officeDocument"/></Relationships>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" Type="http://schemas.openxmlformats.org'
+        '/officeDocument/2006/relationships/worksheet"/></Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="{sheet}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+}
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+
+def _xml_escape(s):
+    return s.str.replace("&", "&amp;").str.replace("<", "&lt;").str.replace(">", "&gt;")
+
+
+def _xml_cells(col):
+    """Cell XML for one column: numbers as values, text as inline strings, NaN empty."""
+    if pd.api.types.is_bool_dtype(col):
+        col = col.astype(int)
+    if pd.api.types.is_numeric_dtype(col):
+        cells = "<c><v>" + col.astype(str) + "</v></c>"
+    else:
+        is_num = col.map(lambda v: isinstance(v, (int, float, np.number)))
+        text = "<c t=\"inlineStr\"><is><t>" + _xml_escape(col.astype(str)) + "</t></is></c>"
+        cells = text.where(~is_num, "<c><v>" + col.astype(str) + "</v></c>")
+    return cells.where(col.notna(), "<c/>")
+
+
+def write_workbook(path, sheet, df, chunk_rows=100_000):
+    """
+    Write a single-sheet .xlsx by streaming the sheet XML.
+
+    Cells are formatted column-wise (inline strings, no shared-string table),
+    which is far faster than openpyxl's per-cell writer at these sizes;
+    openpyxl/pandas read the result like any other workbook.
+    """
+    if len(df) + 1 > EXCEL_MAX_ROWS:
+        print(f"  NOTE: {path.name} has {len(df) + 1:,} rows, beyond Excel's "
+              f"{EXCEL_MAX_ROWS:,}-row limit (readable by pandas/openpyxl only)")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for name, xml in _XLSX_PARTS.items():
+            zf.writestr(name, xml.replace("{sheet}", sheet))
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as f:
+            f.write(_SHEET_HEAD.encode())
+            header = _xml_cells(pd.Series(df.columns, dtype=object))
+            f.write(("<row>" + "".join(header) + "</row>").encode())
+            for start in range(0, len(df), chunk_rows):
+                chunk = df.iloc[start:start + chunk_rows]
+                rows = "<row>" + _xml_cells(chunk.iloc[:, 0])
+                for j in range(1, chunk.shape[1]):
+                    rows = rows + _xml_cells(chunk.iloc[:, j])
+                f.write("".join(rows + "</row>").encode())
+            f.write(_SHEET_TAIL.encode())
+
+
+def write_spatial(stands, path):
+    """Square stand polygons of the stand's area on a regular lon/lat grid."""
+    n = len(stands)
+    n_cols = int(np.ceil(np.sqrt(n)))
+    side_m = np.sqrt(stands["area"].to_numpy() * ACRES_TO_HA * 10_000)
+    cos_lat = np.cos(np.radians(ORIGIN_LAT))
+    pitch = np.sqrt(400.0 * ACRES_TO_HA * 10_000) * 1.05 / METERS_PER_DEGREE
+    idx = np.arange(n)
+    x0 = ORIGIN_LON + (idx % n_cols) * pitch / cos_lat
+    y0 = ORIGIN_LAT + (idx // n_cols) * pitch
+    dx = side_m / METERS_PER_DEGREE / cos_lat
+    dy = side_m / METERS_PER_DEGREE
+
+    gdf = gpd.GeoDataFrame({
+        "OBJECTID": idx + 1,
+        "STAND_ID": idx + 100_000,
+        "PROPERTY": "SYNTHETIC FOREST",
+        "STAND_KEY": stands["stand_key"],
+        "GIS_AREA": stands["area"],
+        "ORIGIN": stands["ORIGIN"],
+        "DOMSPECLAB": stands["DOMSPECLAB"],
+        "DOM_SPEC": stands["DOM_SPEC"],
+        "STAND_AGE": stands["age"],
+        "SITE_INDEX": stands["si"],
+    }, geometry=shapely.box(x0, y0, x0 + dx, y0 + dy), crs="EPSG:4326")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    gdf.to_file(path, engine="pyogrio")
+
+
+def _target(root, path):
+    """Same location relative to root as path is relative to PROJECT_ROOT."""
+    return Path(root) / Path(path).relative_to(PROJECT_ROOT)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def generate(root, n_stands, seed=0, condition_periods=None):
+    """
+    Write a synthetic project root.
+
+    Parameters:
+        root: Directory to create (laid out like PROJECT_ROOT)
+        n_stands: Number of stands
+        seed: Random seed (same seed + size = identical files)
+        condition_periods: Condition periods after period 0 to write. Default:
+                           all PROJECTION_LENGTH periods if the sheet stays
+                           within Excel's row limit, else period 0 only
+                           (the pipeline reads period 0 only)
+
+    Returns:
+        dict of the manifest written to root/synthetic_manifest.json
+    """
+    print("=" * 60)
+    print(f"synthetic_data: Generating {n_stands:,} stands (seed {seed})")
+    print("=" * 60)
+
+    root = Path(root)
+    rng = np.random.default_rng(seed)
+    if condition_periods is None:
+        fits = n_stands * (PROJECTION_LENGTH + 1) + 1 <= EXCEL_MAX_ROWS
+        condition_periods = PROJECTION_LENGTH if fits else 0
+
+    stands = make_stands(n_stands, rng)
+    paths = {
+        "shapefile": _target(root, SHAPEFILE),
+        "yields1": _target(root, YIELDS1_CSV),
+        "yields2": _target(root, YIELDS2_CSV),
+        "yields3": _target(root, YIELDS3_CSV),
+        "condition": _target(root, CONDITION_XLSX),
+        "schedule": _target(root, SCHEDULE_XLSX),
+    }
+
+    write_spatial(stands, paths["shapefile"])
+    print(f"  Wrote {paths['shapefile']}")
+
+    counts = {"yields1": 0, "yields3": 0}
+    for path in (paths["yields1"], paths["yields3"]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+    for start in range(0, n_stands, CHUNK_STANDS):
+        y1, y3 = stand_yield_tables(stands.iloc[start:start + CHUNK_STANDS])
+        for name, df in (("yields1", y1), ("yields3", y3)):
+            df.to_csv(paths[name], mode="a", header=start == 0, index=False, float_format="%.8g")
+            counts[name] += len(df)
+    y2 = regen_yield_table()
+    y2.to_csv(paths["yields2"], index=False, float_format="%.8g")
+    counts["yields2"] = len(y2)
+    for name in ("yields1", "yields2", "yields3"):
+        print(f"  Wrote {paths[name]} ({counts[name]:,} rows)")
+
+    schedule, condition = simulate(stands, condition_periods)
+    if len(condition) + 1 > EXCEL_MAX_ROWS:
+        # Split stands have a row per parcel; keep period 0 only
+        condition = condition[condition["PERIOD"] == 0].reset_index(drop=True)
+        condition_periods = 0
+    write_workbook(paths["condition"], "Condition", condition)
+    print(f"  Wrote {paths['condition']} ({len(condition):,} rows, periods 0-{condition_periods})")
+    write_workbook(paths["schedule"], SCHEDULE_SHEET, schedule)
+    print(f"  Wrote {paths['schedule']} ({len(schedule):,} rows)")
+
+    manifest = {
+        "n_stands": n_stands,
+        "seed": seed,
+        "condition_periods": condition_periods,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "rows": {**counts, "condition": len(condition), "schedule": len(schedule)},
+        "files": {k: str(v.relative_to(root)) for k, v in paths.items()},
+    }
+    (root / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def read_manifest(root):
+    """Manifest of a generated root, or None if there is none."""
+    path = Path(root) / MANIFEST_NAME
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic pipeline inputs")
+    parser.add_argument("--stands", type=int, required=True, help="Number of stands")
+    parser.add_argument("--out", default=None,
+                        help="Output project root (default: SYNTHETIC_DIR/<stands>)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--condition-periods", type=int, default=None,
+                        help="Condition periods after period 0 (default: all if they fit one sheet)")
+    args = parser.parse_args()
+
+    generate(
+        args.out or SYNTHETIC_DIR / str(args.stands),
+        n_stands=args.stands,
+        seed=args.seed,
+        condition_periods=args.condition_periods,
+    )